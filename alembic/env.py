@@ -3,7 +3,8 @@ from logging.config import fileConfig
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
-from app.database.database import Base
+from app.database.database import Base, SQLALCHEMY_DATABASE_URL
+from app.models import models  # noqa: F401
 
 from alembic import context
 
@@ -16,6 +17,11 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# Usa a mesma URL de conexão da aplicação
+config.set_main_option(
+    "sqlalchemy.url", SQLALCHEMY_DATABASE_URL.replace("%", "%%")
+)
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
@@ -0,0 +1,106 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Bancos criados antes das migrações já possuem as tabelas, criadas pelo
+    # `Base.metadata.create_all` da aplicação.
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'categories' not in existing:
+        op.create_table(
+            'categories',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(), nullable=True),
+            sa.Column('enabled', sa.Boolean(), nullable=True),
+        )
+        op.create_index('ix_categories_id', 'categories', ['id'])
+        op.create_index(
+            'ix_categories_name', 'categories', ['name'], unique=True
+        )
+
+    if 'products' not in existing:
+        op.create_table(
+            'products',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('price', sa.Float(), nullable=False),
+            sa.Column(
+                'category_id', sa.Integer(),
+                sa.ForeignKey('categories.id'), nullable=True
+            ),
+            sa.Column('enabled', sa.Boolean(), nullable=True),
+        )
+        op.create_index('ix_products_id', 'products', ['id'])
+
+    if 'orders' not in existing:
+        op.create_table(
+            'orders',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('status', sa.String(), nullable=True),
+            sa.Column('payment_status', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('customer_id', sa.Integer(), nullable=False),
+        )
+        op.create_index('ix_orders_id', 'orders', ['id'])
+        op.create_index('ix_orders_status', 'orders', ['status'])
+        op.create_index(
+            'ix_orders_payment_status', 'orders', ['payment_status']
+        )
+
+    if 'order_items' not in existing:
+        op.create_table(
+            'order_items',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column(
+                'order_id', sa.Integer(),
+                sa.ForeignKey('orders.id'), nullable=True
+            ),
+            sa.Column(
+                'product_id', sa.Integer(),
+                sa.ForeignKey('products.id'), nullable=True
+            ),
+            sa.Column('quantity', sa.Integer(), nullable=True),
+            sa.Column('comment', sa.Text(), nullable=True),
+        )
+        op.create_index('ix_order_items_id', 'order_items', ['id'])
+
+    if 'tracking' not in existing:
+        op.create_table(
+            'tracking',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column(
+                'order_id', sa.Integer(),
+                sa.ForeignKey('orders.id'), nullable=True
+            ),
+            sa.Column('status', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_tracking_id', 'tracking', ['id'])
+        op.create_index('ix_tracking_status', 'tracking', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_table('tracking')
+    op.drop_table('order_items')
+    op.drop_table('orders')
+    op.drop_table('products')
+    op.drop_table('categories')
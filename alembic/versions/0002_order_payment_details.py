@@ -0,0 +1,34 @@
+"""order payment details
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'orders', sa.Column('payment_id', sa.String(), nullable=True)
+    )
+    op.add_column('orders', sa.Column('qr_code', sa.Text(), nullable=True))
+    op.add_column(
+        'orders', sa.Column('payment_link', sa.String(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('orders', 'payment_link')
+    op.drop_column('orders', 'qr_code')
+    op.drop_column('orders', 'payment_id')
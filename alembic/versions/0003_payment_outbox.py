@@ -0,0 +1,50 @@
+"""payment outbox
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'payment_outbox',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column(
+            'order_id', sa.Integer(),
+            sa.ForeignKey('orders.id'), nullable=False
+        ),
+        sa.Column('customer_email', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_payment_outbox_id', 'payment_outbox', ['id'])
+    op.create_index(
+        'ix_payment_outbox_status_next_attempt',
+        'payment_outbox',
+        ['status', 'next_attempt_at'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_payment_outbox_status_next_attempt', table_name='payment_outbox'
+    )
+    op.drop_index('ix_payment_outbox_id', table_name='payment_outbox')
+    op.drop_table('payment_outbox')
@@ -0,0 +1,61 @@
+"""order price snapshot
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'order_items', sa.Column('product_name', sa.String(), nullable=True)
+    )
+    op.add_column(
+        'order_items', sa.Column('unit_price', sa.Float(), nullable=True)
+    )
+    op.add_column(
+        'orders',
+        sa.Column(
+            'total_amount', sa.Float(), nullable=False, server_default='0'
+        ),
+    )
+
+    # Pedidos existentes recebem os preços atuais dos produtos
+    op.execute(
+        """
+        UPDATE order_items
+        SET product_name = (
+                SELECT products.name FROM products
+                WHERE products.id = order_items.product_id),
+            unit_price = (
+                SELECT products.price FROM products
+                WHERE products.id = order_items.product_id)
+        """
+    )
+    op.execute(
+        """
+        UPDATE orders
+        SET total_amount = COALESCE((
+            SELECT SUM(order_items.unit_price * order_items.quantity)
+            FROM order_items
+            WHERE order_items.order_id = orders.id), 0)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('orders', 'total_amount')
+    op.drop_column('order_items', 'unit_price')
+    op.drop_column('order_items', 'product_name')
@@ -0,0 +1,39 @@
+"""order filter indexes
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_orders_customer_id_created_at',
+        'orders',
+        ['customer_id', 'created_at'],
+    )
+    op.create_index(
+        'ix_orders_status_created_at', 'orders', ['status', 'created_at']
+    )
+    op.create_index(
+        'ix_orders_payment_status_created_at',
+        'orders',
+        ['payment_status', 'created_at'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_payment_status_created_at', table_name='orders')
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.drop_index('ix_orders_customer_id_created_at', table_name='orders')
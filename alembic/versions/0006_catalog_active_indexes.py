@@ -0,0 +1,48 @@
+"""catalog active partial indexes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_categories_active_id',
+        'categories',
+        ['id'],
+        postgresql_where=sa.text('enabled'),
+        sqlite_where=sa.text('enabled'),
+    )
+    op.create_index(
+        'ix_products_active_id',
+        'products',
+        ['id'],
+        postgresql_where=sa.text('enabled'),
+        sqlite_where=sa.text('enabled'),
+    )
+    op.create_index(
+        'ix_products_active_category_id_id',
+        'products',
+        ['category_id', 'id'],
+        postgresql_where=sa.text('enabled'),
+        sqlite_where=sa.text('enabled'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_active_category_id_id', table_name='products')
+    op.drop_index('ix_products_active_id', table_name='products')
+    op.drop_index('ix_categories_active_id', table_name='categories')
@@ -1,10 +1,22 @@
 from os import environ as env
-from typing import Generator
+from typing import AsyncGenerator, Generator, Optional, Union
 from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+)
 from sqlalchemy.orm import Session, sessionmaker, declarative_base
 import os
 
+from .instrumentation import SQL_INSTRUMENTATION_ENABLED, install
+from .pool import instrument_pool, pool_options
+from .replicas import (
+    DATABASE_REPLICA_URLS, READ_ONLY, REPLICA_CHECK_INTERVAL_SECONDS,
+    REPLICA_MAX_LAG_SECONDS, Replica, ReplicaRouter, RoutingSession
+)
+
 # Força o carregamento do .env.test se os testes estiverem rodando
 if "PYTEST_CURRENT_TEST" in os.environ:
     load_dotenv(".env.test")
@@ -18,11 +30,85 @@ if not SQLALCHEMY_DATABASE_URL:
         "DATABASE_URL não foi definido! Verifique o .env ou .env.test"
         )
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# "async" usa AsyncEngine nas rotas; "sync" usa a sessão síncrona em threads
+DATABASE_MODE: str = env.get(
+    'DATABASE_MODE',
+    'async' if SQLALCHEMY_DATABASE_URL.startswith('postgresql') else 'sync'
+)
+
+# Drivers assíncronos equivalentes aos drivers síncronos
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+if SQL_INSTRUMENTATION_ENABLED:
+    install()
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, **pool_options(SQLALCHEMY_DATABASE_URL)
+)
+instrument_pool("primary", engine.pool)
 
 Base = declarative_base()
 
+DbSession = Union[Session, AsyncSession]
+
+
+def async_database_url(url: str) -> str:
+    """Troca o driver síncrono da URL pelo driver assíncrono equivalente."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Banco sem driver assíncrono suportado: {backend}")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(
+        hide_password=False
+    )
+
+
+async_engine: Optional[AsyncEngine] = None
+AsyncSessionLocal: Optional[async_sessionmaker] = None
+
+if DATABASE_MODE == 'async':
+    async_engine = create_async_engine(
+        async_database_url(SQLALCHEMY_DATABASE_URL),
+        **pool_options(SQLALCHEMY_DATABASE_URL, async_mode=True)
+    )
+    instrument_pool("primary_async", async_engine.sync_engine.pool)
+
+
+def _replica(index: int, url: str) -> Replica:
+    if DATABASE_MODE != 'async':
+        return Replica(f"replica_{index}", url)
+    return Replica(f"replica_{index}", url, create_async_engine(
+        async_database_url(url), **pool_options(url, async_mode=True)
+    ))
+
+
+# Leituras de sessões somente leitura vão para as réplicas, se houver
+replica_router = ReplicaRouter(
+    [_replica(index, url) for index, url in enumerate(DATABASE_REPLICA_URLS)],
+    max_lag=REPLICA_MAX_LAG_SECONDS,
+    check_interval=REPLICA_CHECK_INTERVAL_SECONDS,
+)
+
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    router=replica_router,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+)
+
+if async_engine is not None:
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine,
+        sync_session_class=RoutingSession,
+        router=replica_router,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
 
 def get_db() -> Generator[Session, None, None]:
     """
@@ -33,3 +119,40 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[DbSession, None]:
+    """
+    Sessão de banco de dados para rotas `async def`.
+
+    No modo `async`, entrega uma `AsyncSession`; no modo `sync` (testes com
+    SQLite, por exemplo), entrega uma `Session` comum, que o
+    `async_repository` usa apenas dentro do threadpool.
+    """
+    async for db in _async_session(read_only=False):
+        yield db
+
+
+async def get_async_read_db() -> AsyncGenerator[DbSession, None]:
+    """
+    Como `get_async_db`, para rotas que apenas leem.
+
+    As consultas vão para uma réplica saudável e em dia; sem réplicas, ou se
+    todas estiverem fora ou atrasadas, vão para o primário. Rotas que
+    escrevem, ou que leem o que acabaram de escrever, usam `get_async_db`.
+    """
+    async for db in _async_session(read_only=True):
+        yield db
+
+
+async def _async_session(read_only: bool) -> AsyncGenerator[DbSession, None]:
+    if AsyncSessionLocal is None:
+        db = SessionLocal(info={READ_ONLY: read_only})
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+        return
+
+    async with AsyncSessionLocal(info={READ_ONLY: read_only}) as db:
+        yield db
@@ -0,0 +1,104 @@
+"""
+Contagem e tempo das consultas SQL de cada requisição.
+
+Os eventos do SQLAlchemy são registrados na classe `Engine`, valendo para o
+primário, as réplicas e a engine síncrona por trás do `AsyncEngine`. As
+consultas são somadas ao `QueryStats` da requisição em andamento, guardado
+em uma `ContextVar`: o `run_sync` e o threadpool herdam o contexto da
+requisição, e consultas feitas fora de uma (dispatcher, recarga do JWKS)
+não são contabilizadas.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from os import environ as env
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+load_dotenv()
+
+SQL_INSTRUMENTATION_ENABLED = (
+    env.get('SQL_INSTRUMENTATION_ENABLED', 'true').lower() == 'true'
+)
+# Execuções da mesma consulta em uma requisição que indicam um N+1
+QUERY_REPEAT_THRESHOLD = int(env.get('QUERY_REPEAT_THRESHOLD', '5'))
+
+_STARTED = "query_stats_started"
+
+
+class QueryStats:
+    """Consultas executadas por uma requisição."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        # Execuções por formato da consulta (o SQL sem os parâmetros)
+        self.shapes: Dict[str, int] = {}
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement] = self.shapes.get(statement, 0) + 1
+
+    def repeated(
+            self,
+            threshold: int = QUERY_REPEAT_THRESHOLD
+            ) -> List[Tuple[str, int]]:
+        """Consultas executadas mais de `threshold` vezes."""
+        return sorted(
+            (
+                (statement, count)
+                for statement, count in self.shapes.items()
+                if count > threshold
+            ),
+            key=lambda shape: -shape[1],
+        )
+
+    def server_timing(self) -> str:
+        """Valor do header `Server-Timing` com o tempo total no banco."""
+        return (
+            f'db;dur={self.seconds * 1000:.1f};'
+            f'desc="{self.count} queries"'
+        )
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+
+@contextmanager
+def track_queries(
+        stats: Optional[QueryStats] = None) -> Iterator[QueryStats]:
+    """Contabiliza em `stats` (ou em um novo) as consultas feitas no bloco."""
+    stats = QueryStats() if stats is None else stats
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault(_STARTED, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get(_STARTED)
+    if stats is not None and started:
+        stats.record(statement, time.perf_counter() - started.pop())
+
+
+def install() -> None:
+    """Registra os eventos de contagem em todas as engines."""
+    if not event.contains(
+            Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,184 @@
+import threading
+import time
+import uuid
+from os import environ as env
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+load_dotenv()
+
+DB_POOL_SIZE = int(env.get('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(env.get('DB_MAX_OVERFLOW', '20'))
+DB_POOL_TIMEOUT = float(env.get('DB_POOL_TIMEOUT', '10'))
+DB_POOL_RECYCLE = int(env.get('DB_POOL_RECYCLE', '1800'))
+DB_POOL_PRE_PING = env.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+# PgBouncer em modo transaction não suporta prepared statements no servidor
+DB_PGBOUNCER_MODE = env.get('DB_PGBOUNCER_MODE', 'false').lower() == 'true'
+
+# Limites (segundos) do histograma acumulado de espera por conexão
+WAIT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0
+)
+
+
+class PoolMetrics:
+    """
+    Uso de um pool de conexões do banco.
+
+    O tempo de espera no checkout é medido pelo próprio pool instrumentado;
+    conexões abertas, checkouts e checkins vêm dos eventos do pool.
+    """
+
+    def __init__(self, name: str, pool: Pool) -> None:
+        self.name = name
+        self.pool = pool
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connections_created = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.wait_buckets = [0] * len(WAIT_BUCKETS)
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            for index, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.wait_buckets[index] += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def stats(self) -> dict:
+        pool = self.pool
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connections_created": self.connections_created,
+                "timeouts": self.timeouts,
+                "waits": self.waits,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "wait_buckets": dict(zip(WAIT_BUCKETS, self.wait_buckets)),
+            }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return stats
+
+
+class _TimedCheckout:
+    """Mede o tempo que cada checkout espera por uma conexão livre."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_timeout()
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        if self.metrics is not None:
+            self.metrics.pool = pool
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+# Métricas de todos os pools instrumentados, por nome
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+def instrument_pool(name: str, pool: Pool) -> PoolMetrics:
+    """Registra as métricas de `pool` sob `name`."""
+    metrics = PoolMetrics(name, pool)
+    pool.metrics = metrics
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        with metrics._lock:
+            metrics.connections_created += 1
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        with metrics._lock:
+            metrics.checkouts += 1
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        with metrics._lock:
+            metrics.checkins += 1
+
+    pool_metrics[name] = metrics
+    return metrics
+
+
+def pool_options(url: str, async_mode: bool = False) -> dict:
+    """
+    Argumentos de `create_engine` para o pool de conexões de `url`.
+
+    SQLite em memória mantém o pool padrão do SQLAlchemy, que não aceita
+    as opções de tamanho.
+    """
+    parsed = make_url(url)
+    if (parsed.get_backend_name() == 'sqlite'
+            and parsed.database in (None, '', ':memory:')):
+        return {}
+
+    options = {
+        "poolclass": (
+            InstrumentedAsyncQueuePool if async_mode
+            else InstrumentedQueuePool
+        ),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if (DB_PGBOUNCER_MODE and async_mode
+            and parsed.get_backend_name() == 'postgresql'):
+        # O psycopg2 não prepara statements no servidor; o asyncpg sim
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": (
+                lambda: f"__asyncpg_{uuid.uuid4()}__"
+            ),
+        }
+    return options
+
+
+def pool_stats() -> Dict[str, dict]:
+    """Retorna o uso de todos os pools de conexões instrumentados."""
+    return {name: metrics.stats() for name, metrics in pool_metrics.items()}
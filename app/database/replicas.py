@@ -0,0 +1,219 @@
+import itertools
+import threading
+from contextlib import contextmanager
+from os import environ as env
+from typing import Iterator, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from ..tools.logging import logger
+from .pool import instrument_pool, pool_options
+
+load_dotenv()
+
+DATABASE_REPLICA_URLS: List[str] = [
+    url.strip()
+    for url in env.get('DATABASE_REPLICA_URLS', '').split(',')
+    if url.strip()
+]
+# Atraso máximo de replicação aceito antes de voltar para o primário
+REPLICA_MAX_LAG_SECONDS = float(env.get('REPLICA_MAX_LAG_SECONDS', '5'))
+REPLICA_CHECK_INTERVAL_SECONDS = float(
+    env.get('REPLICA_CHECK_INTERVAL_SECONDS', '10')
+)
+
+# Chave de `Session.info` que marca a sessão como somente leitura
+READ_ONLY = "read_only"
+
+# Zero quando a réplica já aplicou todo o WAL recebido
+POSTGRES_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+    "THEN 0 ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) "
+    "END"
+)
+
+
+class Replica:
+    """Réplica de leitura e o resultado da última verificação de saúde."""
+
+    def __init__(
+            self,
+            name: str,
+            url: str,
+            async_engine: Optional[AsyncEngine] = None) -> None:
+        self.name = name
+        self.url = url
+        self.async_engine = async_engine
+        # Engine síncrona usada pela sessão (a do AsyncEngine, no modo async)
+        self.bind: Engine = (
+            async_engine.sync_engine if async_engine is not None
+            else create_engine(url, **pool_options(url))
+        )
+        instrument_pool(name, self.bind.pool)
+        # Conexão avulsa, fora do pool das requisições
+        self.health_engine = create_engine(url, poolclass=NullPool)
+        self.healthy = True
+        self.lag: Optional[float] = None
+        self.checks_failed = 0
+
+
+class ReplicaRouter:
+    """
+    Distribui as leituras entre as réplicas, em round-robin.
+
+    Uma thread verifica periodicamente cada réplica e mede o atraso de
+    replicação; réplicas que falham na verificação ou estão mais atrasadas
+    que `max_lag` saem do rodízio até a próxima verificação bem-sucedida.
+    Sem réplica disponível, as leituras vão para o primário.
+    """
+
+    def __init__(
+            self,
+            replicas: List[Replica],
+            max_lag: float = 5.0,
+            check_interval: float = 10.0) -> None:
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.routed = 0
+        self.fallbacks = 0
+
+    def pick(self) -> Optional[Replica]:
+        """
+        Próxima réplica disponível, ou `None` para usar o primário.
+
+        Só conta como fallback quando há réplicas e nenhuma está disponível.
+        """
+        if not self.replicas:
+            return None
+        available = [
+            replica for replica in self.replicas
+            if replica.healthy
+            and (replica.lag is None or replica.lag <= self.max_lag)
+        ]
+        with self._lock:
+            if not available:
+                self.fallbacks += 1
+                return None
+            self.routed += 1
+            return available[next(self._counter) % len(available)]
+
+    def check(self) -> None:
+        """Verifica a saúde e o atraso de todas as réplicas."""
+        for replica in self.replicas:
+            try:
+                with replica.health_engine.connect() as conn:
+                    if conn.dialect.name == 'postgresql':
+                        lag = conn.execute(POSTGRES_LAG_QUERY).scalar()
+                    else:
+                        lag = conn.execute(text("SELECT 0")).scalar()
+            except Exception as e:
+                if replica.healthy:
+                    logger.error(f"Réplica {replica.name} indisponível: {e}")
+                replica.healthy = False
+                replica.checks_failed += 1
+                continue
+            replica.lag = float(lag or 0)
+            if not replica.healthy:
+                logger.info(f"Réplica {replica.name} disponível novamente")
+            replica.healthy = True
+            if replica.lag > self.max_lag:
+                logger.warning(
+                    f"Réplica {replica.name} atrasada {replica.lag:.1f}s; "
+                    f"leituras vão para o primário"
+                    )
+
+    def start(self) -> None:
+        """Verifica as réplicas e inicia as verificações periódicas."""
+        if not self.replicas or self._thread is not None:
+            return
+        self.check()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="replica-check", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.check_interval)
+            self._thread = None
+
+    async def dispose(self) -> None:
+        """Fecha as conexões de todas as réplicas."""
+        for replica in self.replicas:
+            if replica.async_engine is not None:
+                await replica.async_engine.dispose()
+            else:
+                replica.bind.dispose()
+            replica.health_engine.dispose()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "routed": self.routed,
+                "fallbacks": self.fallbacks,
+                "replicas": {
+                    replica.name: {
+                        "healthy": replica.healthy,
+                        "lag_seconds": replica.lag,
+                        "checks_failed": replica.checks_failed,
+                    }
+                    for replica in self.replicas
+                },
+            }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            self.check()
+
+
+class RoutingSession(Session):
+    """
+    Sessão que envia as leituras de sessões somente leitura às réplicas.
+
+    Escritas (flush) e sessões comuns usam sempre o primário. A réplica é
+    escolhida uma vez por sessão, para que uma requisição não misture
+    réplicas com atrasos diferentes.
+    """
+
+    def __init__(
+            self,
+            *args,
+            router: Optional[ReplicaRouter] = None,
+            **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.router = router
+        self._replica: Optional[Replica] = None
+        self._replica_picked = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (self.router is None or self._flushing
+                or not self.info.get(READ_ONLY)):
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        if not self._replica_picked:
+            self._replica = self.router.pick()
+            self._replica_picked = True
+        if self._replica is None:
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        return self._replica.bind
+
+
+@contextmanager
+def use_primary(db: Session) -> Iterator[Session]:
+    """Faz as consultas de `db` irem ao primário dentro do bloco."""
+    read_only = db.info.get(READ_ONLY)
+    db.info[READ_ONLY] = False
+    try:
+        yield db
+    finally:
+        db.info[READ_ONLY] = read_only
@@ -5,9 +5,25 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_redoc_html
 from fastapi.responses import JSONResponse, HTMLResponse
 from contextlib import asynccontextmanager
-from app.database.database import Base, SessionLocal, engine
-from app.middleware import ExceptionLoggingMiddleware
-from app.routers import category, order, product
+from app.database.database import (
+    Base, SessionLocal, async_engine, engine, replica_router
+)
+from app.database.pool import pool_stats as db_pool_stats
+from app.middleware import RequestMiddleware
+from app.routers import category, menu, metrics, order, product
+from app.services import http_clients
+from app.services.catalog_cache import CATALOG_ENTITIES, catalog_cache
+from app.services.invalidation import invalidation_bus
+from app.services.order_stream import ORDER_ENTITY, order_broadcaster
+from app.services.pagination import NEXT_CURSOR_HEADER
+from app.services.payment_outbox import payment_dispatcher
+from app.services.repository import payment_breaker
+from app.services.serializers import OrjsonResponse
+from app.services.security import (
+    start_key_refresh,
+    stop_key_refresh,
+    token_cache,
+)
 from app.tools.initialize_db import initialize_db
 from app.tools.logging import logger
 
@@ -33,14 +49,46 @@ def init_admin_user() -> None:
         db.close()
 
 
+def load_catalog() -> None:
+    """Carrega o snapshot do catálogo antes da primeira requisição."""
+    if not catalog_cache.enabled:
+        return
+    db = SessionLocal()
+    try:
+        catalog_cache.load(db)
+    finally:
+        db.close()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Executa tarefas antes de iniciar a API"""
     init_admin_user()
+    invalidation_bus.subscribe(
+        CATALOG_ENTITIES, catalog_cache.on_invalidation
+    )
+    invalidation_bus.subscribe(
+        [ORDER_ENTITY], order_broadcaster.on_invalidation
+    )
+    invalidation_bus.start()
+    replica_router.start()
+    load_catalog()
+    http_clients.init_http_clients()
+    start_key_refresh()
+    payment_dispatcher.start()
     yield
+    order_broadcaster.close()
+    await payment_dispatcher.stop()
+    invalidation_bus.stop()
+    replica_router.stop()
+    stop_key_refresh()
+    await http_clients.close_http_clients()
+    if async_engine is not None:
+        await async_engine.dispose()
+    await replica_router.dispose()
     print("Aplicação encerrando...")
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=OrjsonResponse)
 logger.info('Application startup')
 
 # Configuração do CORS
@@ -57,13 +105,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=['*'],
     allow_headers=['*'],
+    # Lidos pelos clientes: cursor da próxima página e validação de cache
+    expose_headers=[NEXT_CURSOR_HEADER, 'ETag'],
 )
 
+# Mais externo, para medir também o tempo dos demais middlewares
+app.add_middleware(RequestMiddleware)
+
 # Incluindo os roteadores
-app.add_middleware(ExceptionLoggingMiddleware)
 app.include_router(product.router, prefix='/products', tags=['products'])
 app.include_router(order.router, prefix='/orders', tags=['orders'])
 app.include_router(category.router, prefix='/category', tags=['category'])
+app.include_router(menu.router, prefix='/menu', tags=['menu'])
+app.include_router(metrics.router, tags=['metrics'])
 
 
 @app.exception_handler(RequestValidationError)
@@ -116,6 +170,30 @@ def health_check() -> dict:
     return {'status': 'Operational'}
 
 
+@app.get('/health/details', tags=['health'])
+def health_details() -> dict:
+    """Retorna o status da aplicação com o uso dos recursos compartilhados.
+
+    Returns:
+        dict: Status, uso dos pools do banco e HTTP, saúde e atraso das
+        réplicas de leitura, contadores do cache de tokens, do cache de
+        catálogo, do canal de invalidação, da outbox de pagamentos e do
+        stream de pedidos e estado dos circuit breakers.
+    """
+    return {
+        'status': 'Operational',
+        'db_pools': db_pool_stats(),
+        'db_replicas': replica_router.stats(),
+        'http_pools': http_clients.pool_stats(),
+        'auth_cache': token_cache.stats(),
+        'catalog_cache': catalog_cache.stats(),
+        'invalidation_bus': invalidation_bus.stats(),
+        'payment_outbox': payment_dispatcher.stats(),
+        'order_stream': order_broadcaster.stats(),
+        'circuit_breakers': {payment_breaker.name: payment_breaker.stats()},
+    }
+
+
 # Adiciona a rota para a documentação do ReDoc
 @app.get('/redoc', include_in_schema=False)
 async def redoc() -> HTMLResponse:
@@ -1,3 +1,3 @@
-from .middleware import ExceptionLoggingMiddleware
+from .middleware import RequestMiddleware
 
-__all__ = ['ExceptionLoggingMiddleware']
+__all__ = ['RequestMiddleware']
@@ -1,35 +1,130 @@
-from fastapi import HTTPException, Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from ..tools.logging import logger
+import logging
+import re
+import time
+import uuid
 
-class ExceptionLoggingMiddleware(BaseHTTPMiddleware):
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..database.instrumentation import (
+    QUERY_REPEAT_THRESHOLD, SQL_INSTRUMENTATION_ENABLED, QueryStats,
+    track_queries
+)
+from ..services.metrics import UNMATCHED_ROUTE, request_metrics
+from ..tools.logging import REQUEST_ID_HEADER, logger, request_id
+
+# IDs recebidos fora deste formato são substituídos por um novo
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class RequestMiddleware:
     """
-    Middleware para capturar e registrar exceções não tratadas.
+    Middleware ASGI que acompanha cada requisição HTTP em uma só passada.
+
+    - Propaga o header `X-Request-ID` (ou gera um) para a resposta, os logs
+      e as chamadas aos serviços externos.
+    - Mede a latência por template de rota e status para o `/metrics` e
+      envia o tempo da aplicação e do banco no header `Server-Timing`.
+    - Conta as consultas SQL da requisição e avisa sobre possíveis N+1.
+    - Registra no log as exceções não tratadas, com o ID da requisição.
 
-    Este middleware captura todas as exceções não tratadas durante o processamento das requisições
-    e as registra no logger. Em seguida, retorna uma exceção HTTP 500 (Internal Server Error).
+    Por ser ASGI puro, não cria tarefas nem buffers intermediários por
+    requisição, ao contrário do `BaseHTTPMiddleware` do Starlette, e não
+    interfere em respostas em streaming.
 
     Atributos:
-        Nenhum.
+        sql_instrumentation: Se as consultas SQL são contabilizadas.
+        repeat_threshold: Execuções da mesma consulta que indicam um N+1.
     """
 
-    async def dispatch(self, request: Request, call_next):  # noqa PLR6301
-        """
-        Manipula cada requisição, capturando e registrando exceções não tratadas.
+    def __init__(
+            self,
+            app: ASGIApp,
+            sql_instrumentation: bool = SQL_INSTRUMENTATION_ENABLED,
+            repeat_threshold: int = QUERY_REPEAT_THRESHOLD) -> None:
+        self.app = app
+        self.sql_instrumentation = sql_instrumentation
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        Args:
-            request: A requisição atual.
-            call_next: Função que chama o próximo middleware ou endpoint.
+        rid = _request_id(scope)
+        token = request_id.set(rid)
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+        request_metrics.started(method)
+        queries = QueryStats()
 
-        Returns:
-            A resposta da aplicação, caso nenhuma exceção ocorra.
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(REQUEST_ID_HEADER, rid)
+                headers.append("Server-Timing", _server_timing(
+                    time.perf_counter() - started, queries
+                ))
+            await send(message)
 
-        Raises:
-            HTTPException: Se ocorrer uma exceção não tratada, uma exceção 500 é lançada.
-        """
         try:
-            response = await call_next(request)
-            return response
+            if self.sql_instrumentation:
+                with track_queries(queries):
+                    await self.app(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
         except Exception as e:
             logger.error(f'Erro Não Tratado: {e}', exc_info=True)
-            raise HTTPException(status_code=500, detail='Internal Server Error')
+            raise
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            request_metrics.finished(
+                method,
+                route or UNMATCHED_ROUTE,
+                status,
+                time.perf_counter() - started,
+            )
+            if queries.count:
+                self.report_queries(method, route or scope["path"], queries)
+            request_id.reset(token)
+
+    def report_queries(
+            self, method: str, route: str, queries: QueryStats) -> None:
+        """Registra o total de consultas e avisa sobre repetições."""
+        fields = {
+            "db_queries": queries.count,
+            "db_time_ms": round(queries.seconds * 1000, 1),
+        }
+        for statement, count in queries.repeated(self.repeat_threshold):
+            logger.warning(
+                f"Possível N+1 em {method} {route}: consulta executada "
+                f"{count} vezes: {statement[:200]}",
+                extra=fields,
+                )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"{method} {route}: {queries.count} consulta(s) em "
+                f"{fields['db_time_ms']}ms",
+                extra=fields,
+                )
+
+
+def _request_id(scope: Scope) -> str:
+    """ID recebido no header da requisição, se válido, ou um novo."""
+    for name, value in scope["headers"]:
+        if name == b"x-request-id":
+            candidate = value.decode("latin-1")
+            if _REQUEST_ID_PATTERN.match(candidate):
+                return candidate
+            break
+    return uuid.uuid4().hex
+
+
+def _server_timing(seconds: float, queries: QueryStats) -> str:
+    timing = f"app;dur={seconds * 1000:.1f}"
+    if queries.count:
+        timing += f", {queries.server_timing()}"
+    return timing
@@ -1,6 +1,7 @@
 from datetime import datetime, timezone
 from sqlalchemy import (
-    Column, DateTime, Float, ForeignKey, Integer, String, Text, Boolean
+    Column, DateTime, Float, ForeignKey, Index, Integer, String, Text, Boolean,
+    text
 )
 from sqlalchemy.orm import relationship
 from enum import Enum
@@ -10,6 +11,12 @@ from app.database.database import Base
 class Category(Base):
     """Representa uma Categoria de Produtos."""
     __tablename__ = 'categories'
+    __table_args__ = (
+        # Listagem de categorias ativas ordenada por ID
+        Index('ix_categories_active_id', 'id',
+              postgresql_where=text('enabled'),
+              sqlite_where=text('enabled')),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)
@@ -21,6 +28,15 @@ class Category(Base):
 class Product(Base):
     """Representa um Produto."""
     __tablename__ = 'products'
+    __table_args__ = (
+        # Listagens de produtos ativos, geral e por categoria, ordenadas por ID
+        Index('ix_products_active_id', 'id',
+              postgresql_where=text('enabled'),
+              sqlite_where=text('enabled')),
+        Index('ix_products_active_category_id_id', 'category_id', 'id',
+              postgresql_where=text('enabled'),
+              sqlite_where=text('enabled')),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -36,6 +52,14 @@ class Product(Base):
 class Order(Base):
     """Representa um Pedido."""
     __tablename__ = 'orders'
+    __table_args__ = (
+        # Filtros da listagem de pedidos, ordenada por data de criação
+        Index('ix_orders_customer_id_created_at',
+              'customer_id', 'created_at'),
+        Index('ix_orders_status_created_at', 'status', 'created_at'),
+        Index('ix_orders_payment_status_created_at',
+              'payment_status', 'created_at'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     status = Column(String, default='created', index=True)
@@ -47,6 +71,12 @@ class Order(Base):
         onupdate=lambda: datetime.now(timezone.utc)
         )
     customer_id = Column(Integer, nullable=False)
+    # Total calculado na criação, com os preços vigentes naquele momento
+    total_amount = Column(Float, nullable=False, default=0.0)
+    # Preenchidos pelo worker de pagamento após a resposta do payment-service
+    payment_id = Column(String, nullable=True)
+    qr_code = Column(Text, nullable=True)
+    payment_link = Column(String, nullable=True)
 
     order_items = relationship(
         'OrderItem',
@@ -67,6 +97,9 @@ class OrderItem(Base):
     product_id = Column(Integer, ForeignKey('products.id'))
     quantity = Column(Integer, default=1)
     comment = Column(Text, nullable=True)  # ex: "sem cebola"
+    # Retrato do produto no momento do pedido
+    product_name = Column(String, nullable=True)
+    unit_price = Column(Float, nullable=True)
 
     order = relationship('Order', back_populates='order_items')
     product = relationship('Product', back_populates='order_items')
@@ -84,6 +117,42 @@ class Tracking(Base):
     order = relationship('Order', back_populates='tracking')
 
 
+class PaymentOutbox(Base):
+    """Solicitação de pagamento pendente de envio ao payment-service."""
+    __tablename__ = 'payment_outbox'
+    __table_args__ = (
+        Index('ix_payment_outbox_status_next_attempt',
+              'status', 'next_attempt_at'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False)
+    customer_email = Column(String, nullable=True)
+    status = Column(String, default='pending', nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    # Datas em UTC sem fuso, usadas na seleção dos lotes
+    next_attempt_at = Column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc).replace(tzinfo=None),
+        nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc)
+        )
+
+    order = relationship('Order')
+
+
+class OutboxStatus(str, Enum):
+    PENDING = "pending"        # Aguardando envio
+    PROCESSING = "processing"  # Reservado por um dispatcher
+    SENT = "sent"              # Pagamento criado no payment-service
+    DEAD = "dead"              # Tentativas esgotadas
+
+
 class PaymentStatus(str, Enum):
     pending = "pending"        # Aguardando pagamento
     approved = "approved"      # Pago
@@ -48,6 +48,15 @@ class ProductUpdate(BaseModel):
     enabled: Optional[bool] = None
 
 
+# ----------------- Cardápio -----------------
+class MenuProduct(ProductBase):
+    id: int
+
+
+class MenuCategory(CategoryRead):
+    products: List[MenuProduct] = []
+
+
 # ----------------- Pedidos -----------------
 class OrderItemBase(BaseModel):
     product_id: int
@@ -60,6 +69,8 @@ class OrderItemCreate(OrderItemBase):
 
 class OrderItemRead(OrderItemBase):
     id: int
+    name: Optional[str] = None
+    price: Optional[float] = None
     product: Optional[ProductRead] = None
 
 
@@ -76,6 +87,9 @@ class OrderCreate(OrderBase):
 
 class OrderRead(OrderBase):
     id: int
+    amount: Optional[float] = None
+    qr_code: Optional[str] = None
+    payment_link: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     items: List[OrderItemRead] = []
@@ -1,64 +1,94 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from typing import Optional, List
-from ..database.database import get_db
+from ..database.database import DbSession, get_async_db, get_async_read_db
 from ..models import schemas
-from ..services import repository
+from ..services import async_repository, pagination, serializers
+from ..services.catalog_cache import catalog_cache
+from ..services.http_cache import (
+    CATALOG_CACHE_CONTROL, cache_headers, etag_matches, not_modified,
+)
 from ..services.security import verify_token
-from ..tools.logging import logger
+from ..tools.logging import logger, request_logger
 
 router = APIRouter()
 
 
 # ------------------------ CATEGORIAS ------------------------
 @router.post("/", response_model=schemas.CategoryRead)
-def create_category(
+async def create_category(
     category: schemas.CategoryCreate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_async_db),
     user: dict = Depends(verify_token)
 ):
     """Cria uma nova categoria (Apenas para usuários autenticados)."""
-    logger.info(
-        f"Usuário {user['id']} está criando uma categoria: {category.name}"
+    request_logger.info(
+        "Usuário %s está criando uma categoria: %s",
+        user['id'], category.name,
     )
-    new_category = repository.create_category(db, category)
-    logger.info(f"Categoria criada com sucesso: {new_category.id}")
+    new_category = await async_repository.create_category(db, category)
+    request_logger.info("Categoria criada com sucesso: %s", new_category.id)
     return new_category
 
 
-@router.get("/", response_model=List[schemas.CategoryRead])
-def get_categories(
+@router.get(
+    "/",
+    response_model=List[schemas.CategoryRead],
+    responses={304: {"description": "Catálogo não alterado"}},
+)
+async def get_categories(
     category_id: Optional[int] = Query(None),
     skip: int = 0,
     limit: int = 10,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None),
+    if_none_match: Optional[str] = Header(None),
+    db: DbSession = Depends(get_async_read_db),
     user: dict = Depends(verify_token)
 ):
     """
     Obtém todas as categorias ativas ou uma específica.
     - Se `category_id` for informado, retorna um único objeto de categoria.
     - Caso contrário, retorna uma lista paginada de categorias ativas.
+    - Com `cursor` (vazio na primeira página), a paginação é por keyset e o
+      cursor da próxima página vem no header `X-Next-Cursor`.
+    - Com o cache de catálogo ativo, a resposta traz uma `ETag` da versão
+      do catálogo; com `If-None-Match` igual, retorna 304.
     """
+    # ETag e corpo vêm do mesmo snapshot
+    snapshot = await async_repository.get_catalog_snapshot(db)
+    etag = catalog_cache.etag(snapshot) if snapshot is not None else None
+    if etag is not None and etag_matches(if_none_match, etag):
+        return not_modified(etag, CATALOG_CACHE_CONTROL)
+    headers = cache_headers(etag, CATALOG_CACHE_CONTROL)
     if category_id:
-        logger.info(f"Buscando categoria com ID: {category_id}")
-        category = repository.get_category(db, category_id)
+        request_logger.info("Buscando categoria com ID: %s", category_id)
+        category = await async_repository.get_category(
+            db, category_id, snapshot=snapshot
+        )
         if not category:
-            logger.warning(f"Categoria ID {category_id} não encontrada")
+            logger.warning("Categoria ID %s não encontrada", category_id)
             raise HTTPException(
                 status_code=404, detail="Categoria não encontrada"
             )
         # 🔹 Agora retorna uma lista, para evitar conflito no response_model
-        return [category]
+        return serializers.categories_response([category], headers)
 
-    logger.info(f"Buscando todas as categorias (skip={skip}, limit={limit})")
-    return repository.get_categories(db, skip=skip, limit=limit)
+    request_logger.info(
+        "Buscando todas as categorias (skip=%s, limit=%s)", skip, limit
+    )
+    limit = pagination.page_size(limit)
+    categories = await async_repository.get_categories(
+        db, skip=skip, limit=limit, cursor=cursor, snapshot=snapshot
+    )
+    response = serializers.categories_response(categories, headers)
+    pagination.set_next_cursor(response, categories, limit, cursor, "id")
+    return response
 
 
 @router.patch("/{category_id}", response_model=schemas.CategoryRead)
-def update_category(
+async def update_category(
     category_id: int,
     category_data: schemas.CategoryUpdate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_async_db),
     user: dict = Depends(verify_token)
 ):
     """
@@ -74,17 +104,18 @@ def update_category(
         raise HTTPException(status_code=400,
                             detail="Nenhum dado para atualização")
 
-    logger.info(
-        f"Usuário {user['id']} está editando a categoria {category_id}"
+    request_logger.info(
+        "Usuário %s está editando a categoria %s", user['id'], category_id
     )
 
-    updated_category = repository.update_category(db, category_id,
-                                                  category_data)
+    updated_category = await async_repository.update_category(
+        db, category_id, category_data
+    )
     if not updated_category:
         logger.warning(
             f"Tentativa de editar categoria ID {category_id} que não existe"
         )
         raise HTTPException(status_code=404, detail="Categoria não encontrada")
 
-    logger.info(f"Categoria {category_id} atualizada com sucesso")
+    request_logger.info("Categoria %s atualizada com sucesso", category_id)
     return updated_category
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, Header, Response
+from typing import List, Optional
+from ..database.database import DbSession, get_async_read_db
+from ..models import schemas
+from ..services import async_repository
+from ..services.http_cache import (
+    CATALOG_CACHE_CONTROL, cache_headers, etag_matches,
+)
+from ..services.security import verify_token
+from ..tools.logging import request_logger
+
+router = APIRouter()
+
+
+# ------------------------ CARDÁPIO ------------------------
+# Servido em `/menu` sem redirecionar; `/menu/` continua aceito
+@router.get(
+    "",
+    response_model=List[schemas.MenuCategory],
+    responses={304: {"description": "Cardápio não alterado"}},
+)
+@router.get(
+    "/",
+    response_model=List[schemas.MenuCategory],
+    include_in_schema=False,
+)
+async def get_menu(
+    if_none_match: Optional[str] = Header(None),
+    db: DbSession = Depends(get_async_read_db),
+    user: dict = Depends(verify_token)
+):
+    """
+    Obtém o cardápio completo: categorias ativas com seus produtos ativos.
+    - O JSON é montado uma vez por versão do catálogo e reaproveitado.
+    - A resposta traz uma `ETag`; com `If-None-Match` igual, retorna 304.
+    """
+    menu = await async_repository.get_menu(db)
+    headers = cache_headers(menu.etag, CATALOG_CACHE_CONTROL)
+    if etag_matches(if_none_match, menu.etag):
+        request_logger.debug("Cardápio não alterado (versão %s)", menu.version)
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=menu.body,
+        media_type="application/json",
+        headers=headers,
+    )
@@ -0,0 +1,144 @@
+import anyio.to_thread
+from fastapi import APIRouter, Response
+from ..database.pool import WAIT_BUCKETS, pool_stats
+from ..services.http_clients import ASYNC_UPSTREAM_CLIENTS
+from ..services.metrics import Exposition, format_value, request_samples
+from ..services.order_stream import order_broadcaster
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def upstream_samples(exposition: Exposition) -> None:
+    """Latência e uso dos clientes HTTP dos serviços externos."""
+    clients = ASYNC_UPSTREAM_CLIENTS
+
+    exposition.family(
+        "upstream_request_duration_seconds", "histogram",
+        "Latência das chamadas aos serviços externos.")
+    for client in clients:
+        exposition.histogram(
+            "upstream_request_duration_seconds",
+            client.latency,
+            {"upstream": client.name},
+        )
+
+    exposition.family(
+        "upstream_requests_in_flight", "gauge",
+        "Chamadas em andamento por serviço externo.")
+    for client in clients:
+        exposition.sample(
+            "upstream_requests_in_flight", client.in_flight,
+            {"upstream": client.name})
+
+    exposition.family(
+        "upstream_errors_total", "counter",
+        "Chamadas que falharam, inclusive por prazo excedido.")
+    for client in clients:
+        exposition.sample(
+            "upstream_errors_total", client.errors_total,
+            {"upstream": client.name})
+
+
+def db_pool_samples(exposition: Exposition) -> None:
+    """Uso e espera no checkout dos pools de conexões do banco."""
+    pools = pool_stats()
+
+    exposition.family(
+        "db_pool_connections", "gauge",
+        "Conexões do pool por estado.")
+    for name, stats in pools.items():
+        for state in ("in_use", "idle", "overflow"):
+            if state in stats:
+                exposition.sample(
+                    "db_pool_connections", stats[state],
+                    {"pool": name, "state": state})
+
+    exposition.family(
+        "db_pool_timeouts_total", "counter",
+        "Checkouts que desistiram de esperar por uma conexão livre.")
+    for name, stats in pools.items():
+        exposition.sample(
+            "db_pool_timeouts_total", stats["timeouts"], {"pool": name})
+
+    exposition.family(
+        "db_pool_wait_seconds", "histogram",
+        "Espera por uma conexão livre no checkout.")
+    for name, stats in pools.items():
+        # O histograma do pool já é acumulado
+        for bound in WAIT_BUCKETS:
+            exposition.sample(
+                "db_pool_wait_seconds_bucket", stats["wait_buckets"][bound],
+                {"pool": name, "le": format_value(bound)})
+        exposition.sample(
+            "db_pool_wait_seconds_bucket", stats["waits"],
+            {"pool": name, "le": "+Inf"})
+        exposition.sample(
+            "db_pool_wait_seconds_sum", stats["wait_seconds_total"],
+            {"pool": name})
+        exposition.sample(
+            "db_pool_wait_seconds_count", stats["waits"], {"pool": name})
+
+
+def threadpool_samples(exposition: Exposition) -> None:
+    """Ocupação do threadpool usado pelo código síncrono das rotas."""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    statistics = limiter.statistics()
+
+    exposition.family(
+        "threadpool_threads", "gauge",
+        "Threads do threadpool por estado.")
+    exposition.sample(
+        "threadpool_threads", statistics.borrowed_tokens, {"state": "busy"})
+    exposition.sample(
+        "threadpool_threads", statistics.total_tokens, {"state": "max"})
+
+    exposition.family(
+        "threadpool_queue_depth", "gauge",
+        "Chamadas esperando uma thread livre.")
+    exposition.sample("threadpool_queue_depth", statistics.tasks_waiting)
+
+
+def order_stream_samples(exposition: Exposition) -> None:
+    """Conexões e entregas do stream de pedidos (SSE)."""
+    stats = order_broadcaster.stats()
+
+    exposition.family(
+        "order_stream_connections", "gauge",
+        "Conexões abertas no stream de pedidos.")
+    exposition.sample("order_stream_connections", stats["connections"])
+
+    exposition.family(
+        "order_stream_events_total", "counter",
+        "Eventos entregues às conexões do stream.")
+    exposition.sample("order_stream_events_total", stats["delivered"])
+
+    exposition.family(
+        "order_stream_resyncs_total", "counter",
+        "Conexões lentas que perderam eventos e receberam um resync.")
+    exposition.sample("order_stream_resyncs_total", stats["resyncs"])
+
+    exposition.family(
+        "order_stream_rejected_total", "counter",
+        "Conexões recusadas pelo limite do stream.")
+    exposition.sample("order_stream_rejected_total", stats["rejected"])
+
+
+# ------------------------ MÉTRICAS ------------------------
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    """
+    Expõe as métricas da aplicação no formato texto do Prometheus.
+    - Requisições: contagem e latência por rota e status, e em andamento.
+    - Serviços externos: latência, chamadas em andamento e falhas.
+    - Banco e threadpool: conexões, espera no checkout e fila de threads.
+    - Stream de pedidos: conexões abertas, entregas e resyncs.
+    """
+    exposition = Exposition()
+    request_samples(exposition)
+    upstream_samples(exposition)
+    db_pool_samples(exposition)
+    threadpool_samples(exposition)
+    order_stream_samples(exposition)
+    return Response(content=exposition.render(), media_type=CONTENT_TYPE)
@@ -1,97 +1,193 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from typing import Optional, List
 
-from ..database.database import get_db
+from ..database.database import DbSession, get_async_db, get_async_read_db
 from ..models import schemas
-from ..services import repository
-from ..services.security import verify_token
-from ..tools.logging import logger
+from ..services import async_repository, pagination, serializers
+from ..services.http_cache import (
+    ORDER_CACHE_CONTROL, cache_headers, etag_matches, not_modified,
+    order_etag,
+)
+from ..services.order_stream import (
+    OrderFilter, TooManySubscribers, order_broadcaster, stream_events,
+)
+from ..services.payment_outbox import payment_dispatcher
+from ..services.security import verify_stream_token, verify_token
+from ..tools.logging import logger, request_logger
 
 router = APIRouter()
 
 
 # ------------------------ CRIAÇÃO DE PEDIDOS ------------------------
 @router.post("/", response_model=dict)
-def create_order(
+async def create_order(
     order: schemas.OrderCreate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_async_db),
     user: dict = Depends(verify_token)
 ):
     """
     Cria um novo pedido. Apenas clientes autenticados podem criar pedidos.
+
+    O pedido é retornado com `payment_status=pending`; o pagamento é
+    solicitado em background e atualizado no pedido quando concluído.
     """
-    logger.info(
-        f"Cliente {user['id']} criando pedido com "
-        f"{len(order.order_items)} itens."
+    request_logger.info(
+        "Cliente %s criando pedido com %d itens.",
+        user['id'], len(order.order_items),
         )
 
-    new_order = repository.create_order(db, order)
+    new_order = await async_repository.create_order(db, order)
+    payment_dispatcher.notify()
 
-    logger.info(f"Pedido criado com sucesso: ID {new_order['id']}")
+    request_logger.info("Pedido criado com sucesso: ID %s", new_order['id'])
     return new_order
 
 
 # ------------------------ CONSULTAR PEDIDOS ------------------------
-@router.get("/", response_model=List[schemas.OrderRead])
-def get_orders(
+@router.get(
+    "/",
+    response_model=List[schemas.OrderRead],
+    responses={304: {"description": "Pedido não alterado"}},
+)
+async def get_orders(
     order_id: Optional[int] = Query(None),
     customer_id: Optional[int] = Query(None),
     status: Optional[str] = Query(None),
+    payment_status: Optional[str] = Query(None),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, gt=0),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None),
+    if_none_match: Optional[str] = Header(None),
+    db: DbSession = Depends(get_async_read_db),
     user: dict = Depends(verify_token)
 ):
     """
     Obtém pedidos com base em filtros opcionais.
-    """
-    logger.info(
-        f"🔍 Recebida requisição para buscar pedidos "
-        f"(skip={skip}, limit={limit}, "
-        f"customer_id={customer_id}, order_id={order_id}, status={status})"
-        f"customer_id={customer_id}, order_id={order_id}, status={status})"
-    )
 
+    Os filtros são aplicados no banco de dados antes da paginação;
+    `created_from` é inclusivo e `created_to` é exclusivo.
+    - Sem `cursor`, a paginação usa `skip`/`limit`.
+    - Com `cursor` (vazio na primeira página), a paginação é por keyset.
+    - Nos dois modos, `limit` é limitado a `MAX_PAGE_SIZE`.
+    - Quando há próxima página, o cursor dela vem no header `X-Next-Cursor`.
+    - Os pedidos já saem do repositório no formato de `OrderRead` e são
+      codificados direto, sem nova validação pelo `response_model`.
+    - Com `order_id`, a resposta traz uma `ETag` derivada do `updated_at`
+      do pedido; com `If-None-Match` igual, retorna 304 consultando só
+      essa coluna, sem carregar o pedido e seus itens.
+    """
     if order_id:
-        order = repository.get_order(db, order_id)
+        if if_none_match:
+            updated_at = await async_repository.get_order_updated_at(
+                db, order_id
+            )
+            if updated_at is not None:
+                etag = order_etag(order_id, updated_at)
+                if etag_matches(if_none_match, etag):
+                    return not_modified(etag, ORDER_CACHE_CONTROL)
+
+        order = await async_repository.get_order(db, order_id)
         if not order:
-            logger.warning(f"⚠️ Pedido ID {order_id} não encontrado!")
+            logger.warning("⚠️ Pedido ID %s não encontrado!", order_id)
             raise HTTPException(
                 status_code=404,
                 detail="Pedido não encontrado")
-        return [order]
+        etag = (
+            order_etag(order_id, order["updated_at"])
+            if order["updated_at"] else None
+        )
+        return serializers.OrjsonResponse(
+            [order], headers=cache_headers(etag, ORDER_CACHE_CONTROL)
+        )
 
-    orders = repository.get_orders(db, skip=skip, limit=limit)
+    limit = pagination.page_size(limit)
+    orders = await async_repository.get_orders(
+        db,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        customer_id=customer_id,
+        status=status,
+        payment_status=payment_status,
+        created_from=created_from,
+        created_to=created_to,
+    )
 
-    if customer_id:
-        filtered_orders = [
-            o for o in orders if o["customer_id"] == customer_id
-        ]
-        logger.info(
-            f"🔍 {len(filtered_orders)} pedidos encontrados para o cliente "
-            f"{customer_id}"
-        )
-        return filtered_orders
+    response = serializers.OrjsonResponse(orders)
+    pagination.set_next_cursor(
+        response, orders, limit, cursor, "created_at", "id"
+    )
+    request_logger.info(
+        "✅ Retornando %d pedidos (skip=%s, limit=%s, customer_id=%s, "
+        "status=%s, payment_status=%s)",
+        len(orders), skip, limit, customer_id, status, payment_status,
+    )
+    return response
 
-    if status:
-        filtered_orders = [o for o in orders if o["status"] == status]
-        logger.info(
-            f"🔍 {len(filtered_orders)} pedidos encontrados com status "
-            f"'{status}'"
-            )
-        return filtered_orders
 
-    logger.info(f"✅ Retornando {len(orders)} pedidos encontrados")
-    return orders
+# ------------------------ STREAM DE PEDIDOS ------------------------
+@router.get(
+    "/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def stream_orders(
+    customer_id: Optional[int] = Query(None),
+    order_id: Optional[int] = Query(None),
+    status: Optional[str] = Query(None),
+    payment_status: Optional[str] = Query(None),
+    user: dict = Depends(verify_stream_token)
+):
+    """
+    Acompanha as alterações de pedidos por Server-Sent Events.
+
+    Substitui o polling de `GET /orders/`: a conexão fica aberta e recebe um
+    evento `order` (ID, cliente, status, status de pagamento e `updated_at`)
+    a cada criação, mudança de status ou atualização do pagamento de um
+    pedido que atenda aos filtros. Não há consulta ao banco.
+    - Um evento `resync` indica que eventos foram perdidos (conexão lenta
+      ou reconexão do canal); o cliente deve recarregar os pedidos.
+    - O stream é encerrado periodicamente e o cliente reconecta sozinho.
+    - Como o `EventSource` do navegador não envia headers, o token também
+      é aceito no parâmetro `access_token`.
+    """
+    try:
+        order_broadcaster.check_capacity()
+    except TooManySubscribers:
+        logger.warning("Limite de conexões do stream de pedidos atingido")
+        raise HTTPException(
+            status_code=503,
+            detail="Limite de conexões do stream atingido")
+
+    request_logger.info(
+        "Usuário %s acompanhando pedidos (customer_id=%s, order_id=%s, "
+        "status=%s, payment_status=%s)",
+        user['id'], customer_id, order_id, status, payment_status,
+    )
+    filters = OrderFilter(
+        customer_id=customer_id,
+        order_id=order_id,
+        status=status,
+        payment_status=payment_status,
+    )
+    return StreamingResponse(
+        stream_events(order_broadcaster, filters),
+        media_type="text/event-stream",
+        # Sem cache e sem buffer em proxies (nginx), para entregar na hora
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # ------------------------ ATUALIZAR STATUS DO PEDIDO ------------------------
 @router.patch("/{order_id}", response_model=schemas.OrderRead)
-def update_order_status(
+async def update_order_status(
     order_id: int,
     order_update: schemas.OrderUpdate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_async_db),
     user: dict = Depends(verify_token)
 ):
     """
@@ -107,12 +203,14 @@ def update_order_status(
             detail="Status do pedido é obrigatório para atualização"
         )
 
-    logger.info(
-        f"Usuário {user['id']} alterando status do pedido {order_id} "
-        f"para {order_update.status}"
+    request_logger.info(
+        "Usuário %s alterando status do pedido %s para %s",
+        user['id'], order_id, order_update.status,
         )
 
-    updated_order = repository.update_order_status(db, order_id, order_update)
+    updated_order = await async_repository.update_order_status(
+        db, order_id, order_update
+    )
     if not updated_order:
         logger.warning(
             f"Tentativa de atualizar pedido ID {order_id} que não existe"
@@ -122,7 +220,8 @@ def update_order_status(
             detail="Pedido não encontrado"
             )
 
-    logger.info(
-        f"Pedido {order_id} atualizado com sucesso para {order_update.status}"
+    request_logger.info(
+        "Pedido %s atualizado com sucesso para %s",
+        order_id, order_update.status,
         )
     return updated_order
@@ -1,36 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from typing import Optional, List
-from ..database.database import get_db
+from ..database.database import DbSession, get_async_db, get_async_read_db
 from ..models import schemas
-from ..services import repository
+from ..services import async_repository, pagination, serializers
+from ..services.catalog_cache import catalog_cache
+from ..services.http_cache import (
+    CATALOG_CACHE_CONTROL, cache_headers, etag_matches, not_modified,
+)
 from ..services.security import verify_token
-from ..tools.logging import logger
+from ..tools.logging import logger, request_logger
 
 router = APIRouter()
 
 
 # ------------------------ PRODUTOS ------------------------
 @router.post("/", response_model=schemas.ProductRead)
-def create_product(
+async def create_product(
     product: schemas.ProductCreate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_async_db),
     user: dict = Depends(verify_token)
 ):
     """Cria um novo produto (Apenas para usuários autenticados)."""
-    logger.info(f"Usuário {user['id']} criando produto: {product.name}")
-    new_product = repository.create_product(db, product)
-    logger.info(f"Produto criado com sucesso: {new_product.id}")
+    request_logger.info(
+        "Usuário %s criando produto: %s", user['id'], product.name
+    )
+    new_product = await async_repository.create_product(db, product)
+    request_logger.info("Produto criado com sucesso: %s", new_product.id)
     return new_product
 
 
-@router.get("/", response_model=List[schemas.ProductRead])
-def get_products(
+@router.get(
+    "/",
+    response_model=List[schemas.ProductRead],
+    responses={304: {"description": "Catálogo não alterado"}},
+)
+async def get_products(
     product_id: Optional[int] = Query(None),
     category_id: Optional[int] = Query(None),
     skip: int = 0,
     limit: int = 10,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None),
+    if_none_match: Optional[str] = Header(None),
+    db: DbSession = Depends(get_async_read_db),
     user: dict = Depends(verify_token)
 ):
     """
@@ -38,34 +49,52 @@ def get_products(
     - Se `product_id` for informado, retorna um único produto.
     - Se `category_id` for informado, retorna produtos apenas dessa categoria.
     - Caso contrário, retorna uma lista paginada de produtos ativos.
+    - Com `cursor` (vazio na primeira página), a paginação é por keyset e o
+      cursor da próxima página vem no header `X-Next-Cursor`.
+    - Com o cache de catálogo ativo, a resposta traz uma `ETag` da versão
+      do catálogo; com `If-None-Match` igual, retorna 304.
     """
+    # ETag e corpo vêm do mesmo snapshot
+    snapshot = await async_repository.get_catalog_snapshot(db)
+    etag = catalog_cache.etag(snapshot) if snapshot is not None else None
+    if etag is not None and etag_matches(if_none_match, etag):
+        return not_modified(etag, CATALOG_CACHE_CONTROL)
+    headers = cache_headers(etag, CATALOG_CACHE_CONTROL)
 
     if product_id:
-        logger.info(f"Buscando produto com ID: {product_id}")
-        product = repository.get_product(db, product_id)
+        request_logger.info("Buscando produto com ID: %s", product_id)
+        product = await async_repository.get_product(
+            db, product_id, snapshot=snapshot
+        )
         if not product:
-            logger.warning(f"Produto ID {product_id} não encontrado")
+            logger.warning("Produto ID %s não encontrado", product_id)
             raise HTTPException(
                 status_code=404,
                 detail="Produto não encontrado"
                 )
-        return [product]
+        return serializers.products_response([product], headers)
 
-    logger.info(
-        f"Buscando produtos ativos (skip={skip}, "
-        f"limit={limit}, categoria={category_id})"
+    request_logger.info(
+        "Buscando produtos ativos (skip=%s, limit=%s, categoria=%s)",
+        skip, limit, category_id,
         )
-    return repository.get_products(db,
-                                   category_id=category_id,
-                                   skip=skip, limit=limit
-                                   )  # 🔹 Agora passa category_id
+    limit = pagination.page_size(limit)
+    products = await async_repository.get_products(
+        db,
+        category_id=category_id,
+        skip=skip, limit=limit,
+        cursor=cursor, snapshot=snapshot
+    )  # 🔹 Agora passa category_id
+    response = serializers.products_response(products, headers)
+    pagination.set_next_cursor(response, products, limit, cursor, "id")
+    return response
 
 
 @router.patch("/{product_id}", response_model=schemas.ProductRead)
-def update_product(
+async def update_product(
     product_id: int,
     product_data: schemas.ProductUpdate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_async_db),
     user: dict = Depends(verify_token)
 ):
     """
@@ -85,9 +114,13 @@ def update_product(
             detail="Nenhum dado para atualização."
             )
 
-    logger.info(f"Usuário {user['id']} editando produto {product_id}")
+    request_logger.info(
+        "Usuário %s editando produto %s", user['id'], product_id
+    )
 
-    updated_product = repository.update_product(db, product_id, product_data)
+    updated_product = await async_repository.update_product(
+        db, product_id, product_data
+    )
     if not updated_product:
         logger.warning(
             f"Tentativa de editar produto ID {product_id} que não existe"
@@ -103,7 +136,5 @@ def update_product(
             f"{product_id}, mas ele está desativado!"
             )
 
-    logger.info(
-        f"Produto {product_id} atualizado com sucesso"
-        )
+    request_logger.info("Produto %s atualizado com sucesso", product_id)
     return updated_product
@@ -0,0 +1,208 @@
+"""
+Versões assíncronas das funções de `repository`, usadas pelas rotas.
+
+Cada função executa a versão síncrona correspondente: com uma
+`AsyncSession`, via `run_sync`, que roda o código do ORM sobre o driver
+assíncrono sem bloquear o event loop; com uma `Session` comum (modo `sync`),
+no threadpool do Starlette. Objetos do ORM são convertidos em schemas ainda
+dentro da execução síncrona, pois carregamentos tardios não são permitidos
+fora dela no modo assíncrono.
+"""
+from datetime import datetime
+from typing import Any, Callable, List, Optional, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..database.database import DbSession
+from ..models import schemas
+from . import repository
+from .catalog_cache import CatalogSnapshot, Menu, catalog_cache
+
+T = TypeVar("T")
+
+
+async def run(
+        db: DbSession,
+        fn: Callable[..., T],
+        *args: Any,
+        **kwargs: Any) -> T:
+    """Executa `fn(session, *args, **kwargs)` sem bloquear o event loop."""
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+# ------------------------ CATEGORIAS ------------------------
+async def get_categories(
+        db: DbSession,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        snapshot: Optional[CatalogSnapshot] = None
+        ) -> List[schemas.CategoryRead]:
+    return await run(
+        db, repository.get_categories,
+        skip=skip, limit=limit, cursor=cursor, snapshot=snapshot,
+    )
+
+
+async def get_category(
+        db: DbSession,
+        category_id: int,
+        snapshot: Optional[CatalogSnapshot] = None
+        ) -> Optional[schemas.CategoryRead]:
+    return await run(
+        db, repository.get_category, category_id, snapshot=snapshot
+    )
+
+
+def _create_category(
+        db: Session, category: schemas.CategoryCreate) -> schemas.CategoryRead:
+    created = repository.create_category(db, category)
+    return schemas.CategoryRead.model_validate(created, from_attributes=True)
+
+
+async def create_category(
+        db: DbSession,
+        category: schemas.CategoryCreate) -> schemas.CategoryRead:
+    return await run(db, _create_category, category)
+
+
+def _update_category(
+        db: Session,
+        category_id: int,
+        category_data: schemas.CategoryUpdate
+        ) -> Optional[schemas.CategoryRead]:
+    updated = repository.update_category(db, category_id, category_data)
+    if updated is None:
+        return None
+    return schemas.CategoryRead.model_validate(updated, from_attributes=True)
+
+
+async def update_category(
+        db: DbSession,
+        category_id: int,
+        category_data: schemas.CategoryUpdate
+        ) -> Optional[schemas.CategoryRead]:
+    return await run(db, _update_category, category_id, category_data)
+
+
+# ------------------------ PRODUTOS ------------------------
+async def get_products(
+        db: DbSession,
+        category_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        snapshot: Optional[CatalogSnapshot] = None
+        ) -> List[schemas.ProductRead]:
+    return await run(
+        db, repository.get_products,
+        category_id=category_id, skip=skip, limit=limit, cursor=cursor,
+        snapshot=snapshot,
+    )
+
+
+async def get_product(
+        db: DbSession,
+        product_id: int,
+        snapshot: Optional[CatalogSnapshot] = None
+        ) -> Optional[schemas.ProductRead]:
+    return await run(
+        db, repository.get_product, product_id, snapshot=snapshot
+    )
+
+
+def _create_product(
+        db: Session, product: schemas.ProductCreate) -> schemas.ProductRead:
+    created = repository.create_product(db, product)
+    return schemas.ProductRead.model_validate(created, from_attributes=True)
+
+
+async def create_product(
+        db: DbSession,
+        product: schemas.ProductCreate) -> schemas.ProductRead:
+    return await run(db, _create_product, product)
+
+
+def _update_product(
+        db: Session,
+        product_id: int,
+        product_data: schemas.ProductUpdate) -> Optional[schemas.ProductRead]:
+    updated = repository.update_product(db, product_id, product_data)
+    if updated is None:
+        return None
+    return schemas.ProductRead.model_validate(updated, from_attributes=True)
+
+
+async def update_product(
+        db: DbSession,
+        product_id: int,
+        product_data: schemas.ProductUpdate) -> Optional[schemas.ProductRead]:
+    return await run(db, _update_product, product_id, product_data)
+
+
+# ------------------------ CARDÁPIO ------------------------
+async def get_menu(db: DbSession) -> Menu:
+    return await run(db, catalog_cache.menu)
+
+
+async def get_catalog_snapshot(
+        db: DbSession) -> Optional[CatalogSnapshot]:
+    """
+    Snapshot atual do catálogo, ou `None` sem o cache de catálogo.
+
+    Uma rota que envia a ETag do catálogo monta o corpo com este mesmo
+    snapshot, para que a ETag nunca acompanhe dados de outra versão.
+    """
+    if not catalog_cache.enabled:
+        return None
+    return await run(db, catalog_cache.snapshot)
+
+
+# ------------------------ PEDIDOS ------------------------
+async def get_order(db: DbSession, order_id: int) -> Optional[dict]:
+    return await run(db, repository.get_order, order_id)
+
+
+async def get_order_updated_at(
+        db: DbSession, order_id: int) -> Optional[datetime]:
+    return await run(db, repository.get_order_updated_at, order_id)
+
+
+async def get_orders(
+        db: DbSession,
+        skip: int = 0,
+        limit: int = 10,
+        customer_id: Optional[int] = None,
+        status: Optional[str] = None,
+        payment_status: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        cursor: Optional[str] = None) -> List[dict]:
+    return await run(
+        db, repository.get_orders,
+        skip=skip,
+        limit=limit,
+        customer_id=customer_id,
+        status=status,
+        payment_status=payment_status,
+        created_from=created_from,
+        created_to=created_to,
+        cursor=cursor,
+    )
+
+
+async def create_order(db: DbSession, order_data: schemas.OrderCreate) -> dict:
+    return await run(db, repository.create_order, order_data)
+
+
+async def update_order_status(
+        db: DbSession,
+        order_id: int,
+        order_update: schemas.OrderUpdate) -> dict:
+    return await run(
+        db, repository.update_order_status, order_id, order_update
+    )
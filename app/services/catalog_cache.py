@@ -0,0 +1,387 @@
+import bisect
+import hashlib
+import threading
+import time
+from os import environ as env
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from dotenv import load_dotenv
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from ..database.replicas import use_primary
+from ..models import models, schemas
+from ..tools.logging import logger
+from .invalidation import InvalidationEvent
+
+load_dotenv()
+
+CATALOG_CACHE_ENABLED = (
+    env.get('CATALOG_CACHE_ENABLED', 'true').lower() == 'true'
+)
+# Idade máxima do snapshot antes de uma recarga completa
+CATALOG_CACHE_TTL_SECONDS = float(env.get('CATALOG_CACHE_TTL_SECONDS', '300'))
+
+# Entidades cujos eventos de invalidação afetam o catálogo
+CATALOG_ENTITIES = ("category", "product")
+
+_menu_adapter = TypeAdapter(List[schemas.MenuCategory])
+_categories_adapter = TypeAdapter(List[schemas.CategoryRead])
+_products_adapter = TypeAdapter(List[schemas.ProductRead])
+
+
+class CatalogSnapshot(NamedTuple):
+    """Retrato imutável do catálogo, indexado por ID e por categoria."""
+    version: int
+    loaded_at: float
+    categories: Dict[int, schemas.CategoryRead]
+    products: Dict[int, schemas.ProductRead]
+    # IDs ativos em ordem crescente, usados na paginação
+    enabled_category_ids: Tuple[int, ...]
+    enabled_product_ids: Tuple[int, ...]
+    enabled_products_by_category: Dict[int, Tuple[int, ...]]
+
+
+def _category_read(category: models.Category) -> schemas.CategoryRead:
+    return schemas.CategoryRead(
+        id=category.id,
+        name=category.name,
+        enabled=category.enabled,
+    )
+
+
+def _product_read(
+        product: models.Product,
+        category: Optional[schemas.CategoryRead]) -> schemas.ProductRead:
+    return schemas.ProductRead(
+        id=product.id,
+        name=product.name,
+        price=product.price,
+        category_id=product.category_id,
+        enabled=product.enabled,
+        category=category,
+    )
+
+
+def _build_snapshot(
+        version: int,
+        loaded_at: float,
+        categories: Dict[int, schemas.CategoryRead],
+        products: Dict[int, schemas.ProductRead]) -> CatalogSnapshot:
+    enabled_products = sorted(
+        product_id for product_id, product in products.items()
+        if product.enabled
+    )
+    by_category: Dict[int, List[int]] = {}
+    for product_id in enabled_products:
+        category_id = products[product_id].category_id
+        by_category.setdefault(category_id, []).append(product_id)
+    return CatalogSnapshot(
+        version=version,
+        loaded_at=loaded_at,
+        categories=categories,
+        products=products,
+        enabled_category_ids=tuple(sorted(
+            category_id for category_id, category in categories.items()
+            if category.enabled
+        )),
+        enabled_product_ids=tuple(enabled_products),
+        enabled_products_by_category={
+            category_id: tuple(ids) for category_id, ids in by_category.items()
+        },
+    )
+
+
+class Menu(NamedTuple):
+    """Cardápio serializado para uma versão do snapshot."""
+    version: int
+    body: bytes
+    etag: str
+
+
+def build_menu(snapshot: CatalogSnapshot) -> Menu:
+    """Serializa as categorias ativas com seus produtos ativos."""
+    menu = []
+    for category_id in snapshot.enabled_category_ids:
+        category = snapshot.categories[category_id]
+        product_ids = snapshot.enabled_products_by_category.get(
+            category_id, ()
+        )
+        menu.append(schemas.MenuCategory(
+            id=category.id,
+            name=category.name,
+            enabled=category.enabled,
+            products=[
+                schemas.MenuProduct(**snapshot.products[product_id]
+                                    .model_dump(exclude={"category"}))
+                for product_id in product_ids
+            ],
+        ))
+    body = _menu_adapter.dump_json(menu)
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return Menu(snapshot.version, body, etag)
+
+
+def catalog_etag(snapshot: CatalogSnapshot) -> str:
+    """
+    ETag fraca do catálogo, derivada do conteúdo do snapshot.
+
+    Ao contrário de `version`, que é local ao processo e muda a cada
+    recarga, o conteúdo é o mesmo em todas as réplicas do serviço.
+    """
+    digest = hashlib.sha256()
+    digest.update(_categories_adapter.dump_json([
+        snapshot.categories[category_id]
+        for category_id in sorted(snapshot.categories)
+    ]))
+    digest.update(_products_adapter.dump_json([
+        snapshot.products[product_id]
+        for product_id in sorted(snapshot.products)
+    ]))
+    return f'W/"catalog-{digest.hexdigest()[:32]}"'
+
+
+def _page(
+        ids: Tuple[int, ...],
+        skip: int,
+        limit: int,
+        after_id: Optional[int]) -> Tuple[int, ...]:
+    if after_id is not None:
+        start = bisect.bisect_right(ids, after_id)
+    else:
+        start = skip
+    return ids[start:start + limit]
+
+
+class CatalogCache:
+    """
+    Snapshot em memória de produtos e categorias.
+
+    O catálogo inteiro é carregado de uma vez e servido sem acessar o banco.
+    O snapshot nunca é alterado: escritas geram uma cópia com o registro
+    alterado e trocam a referência sob lock, de modo que leituras
+    concorrentes sempre enxergam uma versão consistente. Um snapshot mais
+    velho que `ttl` é recarregado na próxima leitura, limitando a defasagem
+    em relação a escritas feitas por outras réplicas.
+    """
+
+    def __init__(self, ttl: float = 300.0, enabled: bool = True) -> None:
+        self.ttl = ttl
+        self.enabled = enabled
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+        # Incrementado a cada escrita; descarta recargas concorrentes
+        self._generation = 0
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.patches = 0
+        self.invalidations = 0
+        self._menu: Optional[Menu] = None
+        self.menu_builds = 0
+        # (versão do snapshot, ETag)
+        self._etag: Optional[Tuple[int, str]] = None
+
+    def snapshot(self, db: Session) -> CatalogSnapshot:
+        """Retorna o snapshot atual, recarregando-o com `db` se necessário."""
+        snapshot = self._snapshot
+        if snapshot is not None and not self._expired(snapshot):
+            with self._lock:
+                self.hits += 1
+            return snapshot
+        with self._lock:
+            self.misses += 1
+        return self.load(db)
+
+    def menu(self, db: Session) -> Menu:
+        """
+        Retorna o cardápio serializado do snapshot atual.
+
+        O JSON é gerado uma única vez por versão do snapshot, ou seja, só
+        volta a ser montado depois de uma escrita ou recarga do catálogo.
+        """
+        snapshot = self.snapshot(db)
+        menu = self._menu
+        if menu is not None and menu.version == snapshot.version:
+            return menu
+        menu = build_menu(snapshot)
+        with self._lock:
+            self._menu = menu
+            self.menu_builds += 1
+        return menu
+
+    def etag(self, snapshot: CatalogSnapshot) -> str:
+        """
+        Retorna a ETag de `snapshot`.
+
+        Como o cardápio, é calculada uma única vez por versão do snapshot;
+        validar um `If-None-Match` não serializa nem consulta o banco.
+        """
+        cached = self._etag
+        if cached is not None and cached[0] == snapshot.version:
+            return cached[1]
+        etag = catalog_etag(snapshot)
+        with self._lock:
+            self._etag = (snapshot.version, etag)
+        return etag
+
+    def load(self, db: Session) -> CatalogSnapshot:
+        """Carrega o catálogo completo do banco e substitui o snapshot."""
+        with self._lock:
+            generation = self._generation
+        # Uma réplica atrasada deixaria o snapshot desatualizado até o TTL
+        with use_primary(db):
+            categories = {
+                category.id: _category_read(category)
+                for category in db.query(models.Category).all()
+            }
+            products = {
+                product.id: _product_read(
+                    product, categories.get(product.category_id)
+                )
+                for product in db.query(models.Product).all()
+            }
+        with self._lock:
+            self._version += 1
+            snapshot = _build_snapshot(
+                self._version, time.monotonic(), categories, products
+            )
+            # Uma escrita durante a leitura pode não estar no resultado
+            if generation == self._generation:
+                self._snapshot = snapshot
+            self.reloads += 1
+        logger.info(
+            f"Catálogo carregado: {len(categories)} categoria(s), "
+            f"{len(products)} produto(s) [versão {snapshot.version}]"
+            )
+        return snapshot
+
+    def invalidate(self) -> None:
+        """Descarta o snapshot; a próxima leitura recarrega o catálogo."""
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+            self.invalidations += 1
+
+    def put_category(self, category: models.Category) -> None:
+        """Grava no snapshot uma categoria criada ou alterada."""
+        category_read = _category_read(category)
+        with self._lock:
+            self._generation += 1
+            current = self._snapshot
+            if current is None:
+                return
+            categories = dict(current.categories)
+            categories[category_read.id] = category_read
+            products = {
+                product_id: (
+                    product.model_copy(update={"category": category_read})
+                    if product.category_id == category_read.id else product
+                )
+                for product_id, product in current.products.items()
+            }
+            self._replace(current, categories, products)
+
+    def put_product(self, product: models.Product) -> None:
+        """Grava no snapshot um produto criado ou alterado."""
+        with self._lock:
+            self._generation += 1
+            current = self._snapshot
+            if current is None:
+                return
+            product_read = _product_read(
+                product, current.categories.get(product.category_id)
+            )
+            products = dict(current.products)
+            products[product_read.id] = product_read
+            self._replace(current, current.categories, products)
+
+    def on_invalidation(self, event: InvalidationEvent) -> None:
+        """
+        Descarta o snapshot quando outra réplica altera o catálogo.
+
+        Os eventos da própria réplica são ignorados: a escrita já foi
+        aplicada ao snapshot por `put_category`/`put_product`.
+        """
+        if event.remote:
+            self.invalidate()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self._generation += 1
+            self._menu = None
+            self._etag = None
+            self.hits = self.misses = self.reloads = 0
+            self.patches = self.invalidations = self.menu_builds = 0
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "loaded": snapshot is not None,
+                "version": snapshot.version if snapshot else None,
+                "age_seconds": (
+                    round(time.monotonic() - snapshot.loaded_at, 3)
+                    if snapshot else None
+                ),
+                "categories": len(snapshot.categories) if snapshot else 0,
+                "products": len(snapshot.products) if snapshot else 0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "reloads": self.reloads,
+                "patches": self.patches,
+                "invalidations": self.invalidations,
+                "menu_builds": self.menu_builds,
+            }
+
+    def _expired(self, snapshot: CatalogSnapshot) -> bool:
+        return (self.ttl > 0
+                and time.monotonic() - snapshot.loaded_at >= self.ttl)
+
+    def _replace(
+            self,
+            current: CatalogSnapshot,
+            categories: Dict[int, schemas.CategoryRead],
+            products: Dict[int, schemas.ProductRead]) -> None:
+        # Chamado com o lock adquirido; mantém o instante da carga original
+        self._version += 1
+        self._snapshot = _build_snapshot(
+            self._version, current.loaded_at, categories, products
+        )
+        self.patches += 1
+
+
+def list_categories(
+        snapshot: CatalogSnapshot,
+        skip: int,
+        limit: int,
+        after_id: Optional[int] = None) -> List[schemas.CategoryRead]:
+    """Página de categorias ativas do snapshot, ordenadas por ID."""
+    ids = _page(snapshot.enabled_category_ids, skip, limit, after_id)
+    return [snapshot.categories[category_id] for category_id in ids]
+
+
+def list_products(
+        snapshot: CatalogSnapshot,
+        category_id: Optional[int],
+        skip: int,
+        limit: int,
+        after_id: Optional[int] = None) -> List[schemas.ProductRead]:
+    """Página de produtos ativos do snapshot, ordenados por ID."""
+    if category_id:
+        ids = snapshot.enabled_products_by_category.get(category_id, ())
+    else:
+        ids = snapshot.enabled_product_ids
+    page = _page(ids, skip, limit, after_id)
+    return [snapshot.products[product_id] for product_id in page]
+
+
+catalog_cache = CatalogCache(
+    ttl=CATALOG_CACHE_TTL_SECONDS,
+    enabled=CATALOG_CACHE_ENABLED,
+)
@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from enum import Enum
+from typing import Deque, Iterator, Optional
+
+from ..tools.logging import logger
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"        # Chamadas liberadas
+    OPEN = "open"            # Chamadas bloqueadas até o fim do cool-down
+    HALF_OPEN = "half_open"  # Chamadas de teste liberadas
+
+
+class CircuitOpenError(Exception):
+    """Chamada recusada porque o circuito está aberto."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(
+            f"Circuito {name} aberto; nova tentativa em {retry_after:.1f}s"
+        )
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker baseado na taxa de falhas das últimas chamadas.
+
+    Com o circuito fechado, o resultado das últimas `window_size` chamadas é
+    mantido; quando há pelo menos `minimum_calls` resultados e a taxa de
+    falhas atinge `failure_rate_threshold`, o circuito abre e as chamadas
+    falham imediatamente durante `cooldown` segundos. Depois disso, até
+    `half_open_max_calls` chamadas de teste são liberadas: um sucesso fecha o
+    circuito e uma falha o abre novamente. Chamadas feitas dentro de `call`
+    devolvem a vaga de teste se terminarem sem registrar um resultado.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            failure_rate_threshold: float = 0.5,
+            window_size: int = 20,
+            minimum_calls: int = 5,
+            cooldown: float = 30.0,
+            half_open_max_calls: int = 1) -> None:
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.cooldown = cooldown
+        self.half_open_max_calls = half_open_max_calls
+        self._results: Deque[bool] = deque(maxlen=window_size)
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        # Muda a cada transição; identifica a que estado semiaberto
+        # pertence uma vaga de teste reservada
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.transitions = 0
+        self.rejected = 0
+        self.last_transition_at: Optional[float] = None
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def before_call(self) -> None:
+        """
+        Reserva a execução de uma chamada.
+
+        Raises:
+            CircuitOpenError: Se o circuito estiver aberto ou se as chamadas
+                de teste do estado semiaberto já estiverem em andamento.
+        """
+        self._reserve()
+
+    @contextmanager
+    def call(self) -> Iterator[None]:
+        """
+        Reserva a execução de uma chamada pelo tempo do bloco `with`.
+
+        Se o bloco terminar sem `record_success` ou `record_failure` (por
+        cancelamento ou um erro não classificado), a vaga de teste do estado
+        semiaberto é devolvida; sem isso o circuito recusaria tudo até o
+        processo reiniciar.
+
+        Raises:
+            CircuitOpenError: Nas mesmas condições de `before_call`.
+        """
+        generation = self._reserve()
+        try:
+            yield
+        finally:
+            if generation is not None:
+                self._release(generation)
+
+    def _reserve(self) -> Optional[int]:
+        """Reserva uma chamada; retorna a geração se ela for de teste."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CircuitState.CLOSED:
+                return None
+            if (self._state == CircuitState.HALF_OPEN
+                    and self._half_open_calls < self.half_open_max_calls):
+                self._half_open_calls += 1
+                return self._generation
+            self.rejected += 1
+            raise CircuitOpenError(self.name, self._retry_after())
+
+    def _release(self, generation: int) -> None:
+        with self._lock:
+            # Um resultado registrado já trocou o estado (e a geração)
+            if generation == self._generation and self._half_open_calls:
+                self._half_open_calls -= 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN:
+                self._transition(CircuitState.CLOSED)
+                return
+            self._results.append(True)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN:
+                self._transition(CircuitState.OPEN)
+                return
+            self._results.append(False)
+            if (self._state == CircuitState.CLOSED
+                    and self._failure_rate() >= self.failure_rate_threshold
+                    and len(self._results) >= self.minimum_calls):
+                self._transition(CircuitState.OPEN)
+
+    def retry_after(self) -> float:
+        """Segundos até o circuito aceitar uma chamada de teste."""
+        with self._lock:
+            return self._retry_after()
+
+    def reset(self) -> None:
+        """Fecha o circuito e descarta o histórico de chamadas."""
+        with self._lock:
+            self._state = CircuitState.CLOSED
+            self._results.clear()
+            self._half_open_calls = 0
+            self._generation += 1
+            self.transitions = self.rejected = 0
+            self.last_transition_at = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._maybe_half_open()
+            return {
+                "state": self._state.value,
+                "failure_rate": round(self._failure_rate(), 3),
+                "calls_in_window": len(self._results),
+                "transitions": self.transitions,
+                "rejected": self.rejected,
+                "retry_after": round(self._retry_after(), 3),
+            }
+
+    def _failure_rate(self) -> float:
+        if not self._results:
+            return 0.0
+        return self._results.count(False) / len(self._results)
+
+    def _retry_after(self) -> float:
+        if self._state != CircuitState.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.cooldown - time.monotonic())
+
+    def _maybe_half_open(self) -> None:
+        if (self._state == CircuitState.OPEN
+                and time.monotonic() - self._opened_at >= self.cooldown):
+            self._transition(CircuitState.HALF_OPEN)
+
+    def _transition(self, state: CircuitState) -> None:
+        if state == self._state:
+            return
+        logger.warning(
+            f"Circuito {self.name}: {self._state.value} -> {state.value}"
+            )
+        self._state = state
+        self.transitions += 1
+        self.last_transition_at = time.time()
+        self._half_open_calls = 0
+        self._generation += 1
+        if state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+        if state == CircuitState.CLOSED:
+            self._results.clear()
@@ -0,0 +1,66 @@
+"""
+ETags e respostas condicionais (`If-None-Match` / 304) das leituras.
+
+As ETags são fracas: identificam a versão dos dados (o catálogo ou o
+`updated_at` do pedido), não os bytes exatos da resposta. A comparação
+com `If-None-Match` é feita antes de montar o corpo, de modo que um 304
+não serializa nada.
+"""
+from datetime import datetime
+from os import environ as env
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+from fastapi import Response
+
+load_dotenv()
+
+# Tempo que o cliente pode reaproveitar o catálogo sem revalidar
+CATALOG_MAX_AGE_SECONDS = int(env.get('CATALOG_MAX_AGE_SECONDS', '0'))
+
+# Respostas autenticadas: só o cliente guarda, nunca caches compartilhados
+CATALOG_CACHE_CONTROL = (
+    f"private, max-age={CATALOG_MAX_AGE_SECONDS}"
+    if CATALOG_MAX_AGE_SECONDS > 0 else "private, no-cache"
+)
+ORDER_CACHE_CONTROL = "private, no-cache"
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Compara o header `If-None-Match` com a ETag atual.
+
+    A comparação é fraca, como pede o `If-None-Match`: `W/"x"` e `"x"`
+    são equivalentes.
+    """
+    if not if_none_match:
+        return False
+    candidates = {_opaque(tag.strip()) for tag in if_none_match.split(",")}
+    return "*" in candidates or _opaque(etag) in candidates
+
+
+def weak_etag(value: str) -> str:
+    return f'W/"{value}"'
+
+
+def order_etag(order_id: int, updated_at: datetime) -> str:
+    """ETag de um pedido, que muda a cada escrita (`updated_at`)."""
+    return weak_etag(f"order-{order_id}-{updated_at.isoformat()}")
+
+
+def cache_headers(
+        etag: Optional[str], cache_control: str) -> Dict[str, str]:
+    headers = {"Cache-Control": cache_control}
+    if etag is not None:
+        headers["ETag"] = etag
+    return headers
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(
+        status_code=304, headers=cache_headers(etag, cache_control)
+    )
@@ -0,0 +1,287 @@
+import threading
+import time
+from os import environ as env
+from typing import Dict, Optional
+
+import anyio
+import httpx
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from ..tools.logging import REQUEST_ID_HEADER, request_id, NO_REQUEST_ID
+from .metrics import Histogram
+
+load_dotenv()
+
+
+class UpstreamClient:
+    """
+    Cliente HTTP compartilhado para um serviço externo.
+
+    Mantém uma única `requests.Session` com pool de conexões keep-alive,
+    aplica timeouts de conexão e leitura padrão e contabiliza o uso do pool.
+    A sessão é criada sob demanda e fechada no encerramento da aplicação.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            base_url: Optional[str],
+            pool_size: int = 10,
+            connect_timeout: float = 1.0,
+            read_timeout: float = 2.0) -> None:
+        self.name = name
+        self.base_url = (base_url or "").rstrip("/")
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self._session: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests_total = 0
+        self.errors_total = 0
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    def open(self) -> requests.Session:
+        """Cria a sessão antecipadamente, se ainda não existir."""
+        return self.session
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self._send("get", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self._send("post", url, **kwargs)
+
+    def close(self) -> None:
+        """Fecha a sessão e todas as conexões abertas do pool."""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def stats(self) -> dict:
+        """Retorna o uso atual do pool de conexões."""
+        connections = idle = 0
+        if self._session is not None:
+            for adapter in self._session.adapters.values():
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is None:
+                        continue
+                    connections += pool.num_connections
+                    if pool.pool is not None:
+                        idle += pool.pool.qsize()
+        return {
+            "pool_size": self.pool_size,
+            "connections_created": connections,
+            "idle_connections": idle,
+            "in_flight": self.in_flight,
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+        }
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _url(self, url: str) -> str:
+        if url.startswith(("http://", "https://")):
+            return url
+        return f"{self.base_url}{url}"
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        with self._lock:
+            self.in_flight += 1
+            self.requests_total += 1
+        try:
+            return getattr(self.session, method)(self._url(url), **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                self.errors_total += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class AsyncUpstreamClient:
+    """
+    Cliente HTTP assíncrono compartilhado para um serviço externo.
+
+    Usa um único `httpx.AsyncClient`, com pool de conexões keep-alive, para
+    que muitas chamadas em andamento compartilhem o event loop em vez de
+    ocupar uma thread cada. Além dos timeouts de conexão e leitura, cada
+    chamada tem um prazo total (`deadline`), que pode ser reduzido por
+    chamada. O cliente é criado sob demanda, dentro do event loop em uso.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            base_url: Optional[str],
+            pool_size: int = 10,
+            connect_timeout: float = 1.0,
+            read_timeout: float = 2.0,
+            deadline: float = 3.0,
+            transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        self.name = name
+        self.base_url = (base_url or "").rstrip("/")
+        self.pool_size = pool_size
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.deadline = deadline
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.in_flight = 0
+        self.requests_total = 0
+        self.errors_total = 0
+        self.deadlines_exceeded = 0
+        # Latência de todas as chamadas, inclusive as que falharam
+        self.latency = Histogram()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+                transport=self.transport,
+            )
+        return self._client
+
+    async def get(
+            self,
+            url: str,
+            deadline: Optional[float] = None,
+            **kwargs) -> httpx.Response:
+        return await self._send("GET", url, deadline, **kwargs)
+
+    async def post(
+            self,
+            url: str,
+            deadline: Optional[float] = None,
+            **kwargs) -> httpx.Response:
+        return await self._send("POST", url, deadline, **kwargs)
+
+    async def aclose(self) -> None:
+        """Fecha o cliente e todas as conexões abertas do pool."""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    async def use_transport(
+            self, transport: Optional[httpx.AsyncBaseTransport]) -> None:
+        """Troca o transporte HTTP, fechando o cliente atual (testes)."""
+        await self.aclose()
+        self.transport = transport
+
+    def stats(self) -> dict:
+        return {
+            "pool_size": self.pool_size,
+            "in_flight": self.in_flight,
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+            "deadlines_exceeded": self.deadlines_exceeded,
+        }
+
+    async def _send(
+            self,
+            method: str,
+            url: str,
+            deadline: Optional[float],
+            **kwargs) -> httpx.Response:
+        deadline = self.deadline if deadline is None else deadline
+        headers = dict(kwargs.pop("headers", None) or {})
+        # Propaga o ID da requisição que originou a chamada, se houver uma
+        rid = request_id.get()
+        if rid != NO_REQUEST_ID:
+            headers.setdefault(REQUEST_ID_HEADER, rid)
+        self.in_flight += 1
+        self.requests_total += 1
+        started = time.perf_counter()
+        try:
+            with anyio.fail_after(deadline):
+                return await self.client.request(
+                    method, url, headers=headers, **kwargs
+                )
+        except TimeoutError as e:
+            self.errors_total += 1
+            self.deadlines_exceeded += 1
+            raise httpx.TimeoutException(
+                f"Prazo de {deadline}s excedido em {self.name}"
+            ) from e
+        except httpx.HTTPError:
+            self.errors_total += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.latency.observe(time.perf_counter() - started)
+
+
+# Cliente síncrono usado pela recarga do JWKS, que roda em uma thread
+auth_client = UpstreamClient(
+    "auth-service-jwks",
+    env.get('AUTH_SERVICE_URL'),
+    pool_size=2,
+    connect_timeout=float(env.get('AUTH_HTTP_CONNECT_TIMEOUT', '1')),
+    read_timeout=float(env.get('AUTH_HTTP_READ_TIMEOUT', '2')),
+)
+
+auth_async_client = AsyncUpstreamClient(
+    "auth-service",
+    env.get('AUTH_SERVICE_URL'),
+    pool_size=int(env.get('AUTH_HTTP_POOL_SIZE', '20')),
+    connect_timeout=float(env.get('AUTH_HTTP_CONNECT_TIMEOUT', '1')),
+    read_timeout=float(env.get('AUTH_HTTP_READ_TIMEOUT', '2')),
+    deadline=float(env.get('AUTH_HTTP_DEADLINE_SECONDS', '3')),
+)
+
+payment_async_client = AsyncUpstreamClient(
+    "payment-service",
+    env.get('PAYMENT_SERVICE_URL'),
+    pool_size=int(env.get('PAYMENT_HTTP_POOL_SIZE', '10')),
+    connect_timeout=float(env.get('PAYMENT_HTTP_CONNECT_TIMEOUT', '1')),
+    read_timeout=float(env.get('PAYMENT_HTTP_READ_TIMEOUT', '2')),
+    deadline=float(env.get('PAYMENT_HTTP_DEADLINE_SECONDS', '5')),
+)
+
+UPSTREAM_CLIENTS = (auth_client,)
+ASYNC_UPSTREAM_CLIENTS = (auth_async_client, payment_async_client)
+
+
+def init_http_clients() -> None:
+    """Abre as sessões dos serviços externos no início da aplicação."""
+    for client in UPSTREAM_CLIENTS:
+        client.open()
+
+
+async def close_http_clients() -> None:
+    """Fecha as sessões e os clientes dos serviços externos no encerramento."""
+    for client in UPSTREAM_CLIENTS:
+        client.close()
+    for async_client in ASYNC_UPSTREAM_CLIENTS:
+        await async_client.aclose()
+
+
+def pool_stats() -> Dict[str, dict]:
+    """Retorna o uso dos pools de todos os serviços externos."""
+    clients = UPSTREAM_CLIENTS + ASYNC_UPSTREAM_CLIENTS
+    return {client.name: client.stats() for client in clients}
@@ -0,0 +1,318 @@
+import itertools
+import json
+import os
+import queue
+import select
+import socket
+import threading
+import uuid
+from os import environ as env
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from ..database.database import SQLALCHEMY_DATABASE_URL, engine
+from ..tools.logging import logger
+
+load_dotenv()
+
+# "postgres" usa LISTEN/NOTIFY; "local" entrega os eventos só no processo
+INVALIDATION_BUS = env.get(
+    'INVALIDATION_BUS',
+    'postgres' if SQLALCHEMY_DATABASE_URL.startswith('postgres') else 'local'
+)
+INVALIDATION_CHANNEL = env.get('INVALIDATION_CHANNEL', 'order_service_cache')
+INVALIDATION_RECONNECT_SECONDS = float(
+    env.get('INVALIDATION_RECONNECT_SECONDS', '2')
+)
+
+# Identifica a réplica que publicou o evento
+ORIGIN = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Entidade curinga: o receptor deve descartar tudo o que tem em cache
+ALL = "*"
+
+
+class InvalidationEvent(NamedTuple):
+    entity: str
+    entity_id: Optional[int]
+    # Sequência crescente por réplica de origem
+    version: int
+    origin: str
+    data: Optional[dict] = None
+
+    @property
+    def remote(self) -> bool:
+        """Indica se o evento foi publicado por outra réplica."""
+        return self.origin != ORIGIN
+
+
+Handler = Callable[[InvalidationEvent], None]
+
+
+class InvalidationBus:
+    """
+    Canal de invalidação de caches entre as réplicas do serviço.
+
+    Cada escrita publica um evento com a entidade, o ID e uma versão; todas
+    as réplicas, inclusive a que publicou, recebem o evento e os handlers
+    inscritos decidem o que descartar. Esta implementação entrega os eventos
+    apenas dentro do processo e serve para testes e para uma única réplica.
+    """
+
+    def __init__(self, origin: str = ORIGIN) -> None:
+        self.origin = origin
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.received = 0
+        self.handler_errors = 0
+
+    def subscribe(self, entities: Iterable[str], handler: Handler) -> None:
+        """Inscreve `handler` nos eventos das entidades informadas."""
+        with self._lock:
+            for entity in entities:
+                handlers = self._handlers.setdefault(entity, [])
+                if handler not in handlers:
+                    handlers.append(handler)
+
+    def publish(
+            self,
+            entity: str,
+            entity_id: Optional[int],
+            data: Optional[dict] = None) -> InvalidationEvent:
+        """Publica a alteração de uma entidade, após o commit da escrita."""
+        event = InvalidationEvent(
+            entity, entity_id, next(self._sequence), self.origin, data
+        )
+        with self._lock:
+            self.published += 1
+        self._send(event)
+        return event
+
+    def deliver(self, event: InvalidationEvent) -> None:
+        """Entrega um evento recebido aos handlers inscritos."""
+        with self._lock:
+            self.received += 1
+            if event.entity == ALL:
+                handlers = []
+                for entity_handlers in self._handlers.values():
+                    handlers.extend(
+                        h for h in entity_handlers if h not in handlers
+                    )
+            else:
+                handlers = list(self._handlers.get(event.entity, ()))
+        for handler in handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                with self._lock:
+                    self.handler_errors += 1
+                logger.error(
+                    f"Erro ao processar invalidação de {event.entity}: {e}"
+                    )
+
+    def start(self) -> None:
+        """Inicia o recebimento de eventos de outras réplicas."""
+
+    def stop(self) -> None:
+        """Interrompe o recebimento de eventos."""
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "local",
+                "origin": self.origin,
+                "published": self.published,
+                "received": self.received,
+                "handler_errors": self.handler_errors,
+            }
+
+    def _send(self, event: InvalidationEvent) -> None:
+        self.deliver(event)
+
+
+class PostgresInvalidationBus(InvalidationBus):
+    """
+    Canal de invalidação via `LISTEN/NOTIFY` do Postgres.
+
+    A publicação apenas enfileira o evento: uma thread própria executa os
+    `pg_notify` pendentes em uma conexão do pool, em uma única transação.
+    Assim quem publica não espera o banco, o que importa no modo `async`,
+    em que as escritas do repositório rodam no event loop (`run_sync`).
+    Antes de `start`, os eventos são enviados na hora.
+
+    O recebimento usa uma conexão dedicada, fora do pool, mantida por outra
+    thread. Eventos emitidos enquanto a conexão está caída são perdidos, por
+    isso cada reconexão entrega um evento `ALL` para que os caches sejam
+    descartados.
+    """
+
+    def __init__(
+            self,
+            engine: Engine,
+            channel: str,
+            reconnect_delay: float = 2.0,
+            origin: str = ORIGIN) -> None:
+        super().__init__(origin)
+        self.engine = engine
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pending: "queue.Queue[Optional[InvalidationEvent]]" = (
+            queue.Queue()
+        )
+        self._publisher: Optional[threading.Thread] = None
+        self.publish_errors = 0
+        self.reconnects = 0
+
+    def start(self) -> None:
+        self._start_publisher()
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="cache-invalidation", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.reconnect_delay + 1)
+            self._thread = None
+        if self._publisher is not None:
+            # Os eventos já enfileirados ainda são enviados
+            self._pending.put(None)
+            self._publisher.join(timeout=self.reconnect_delay + 1)
+            self._publisher = None
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        with self._lock:
+            stats.update({
+                "backend": "postgres",
+                "channel": self.channel,
+                "listening": self._thread is not None,
+                "publish_pending": self._pending.qsize(),
+                "publish_errors": self.publish_errors,
+                "reconnects": self.reconnects,
+            })
+        return stats
+
+    def _send(self, event: InvalidationEvent) -> None:
+        if self._publisher is None:
+            self._notify([event])
+        else:
+            self._pending.put(event)
+
+    def _start_publisher(self) -> None:
+        if self._publisher is not None:
+            return
+        self._publisher = threading.Thread(
+            target=self._publish_pending, name="cache-invalidation-publisher",
+            daemon=True)
+        self._publisher.start()
+
+    def _publish_pending(self) -> None:
+        while True:
+            events = [self._pending.get()]
+            # Os eventos acumulados durante o último envio vão juntos
+            while not self._pending.empty():
+                events.append(self._pending.get_nowait())
+            stopping = None in events
+            events = [event for event in events if event is not None]
+            if events:
+                self._notify(events)
+            if stopping:
+                return
+
+    def _notify(self, events: List[InvalidationEvent]) -> None:
+        try:
+            with self.engine.connect() as conn:
+                for event in events:
+                    conn.execute(
+                        text("SELECT pg_notify(:channel, :payload)"),
+                        {
+                            "channel": self.channel,
+                            "payload": json.dumps(
+                                event._asdict(), separators=(",", ":")
+                            ),
+                        },
+                    )
+                conn.commit()
+        except Exception as e:
+            # A escrita já foi gravada; o TTL dos caches limita a defasagem
+            with self._lock:
+                self.publish_errors += len(events)
+            logger.error(
+                "Erro ao publicar invalidação de "
+                f"{', '.join(event.entity for event in events)}: {e}"
+                )
+
+    def _connect(self):
+        dialect = self.engine.dialect
+        cargs, cparams = dialect.create_connect_args(self.engine.url)
+        conn = dialect.connect(*cargs, **cparams)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return conn
+
+    def _run(self) -> None:
+        first = True
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                if not first:
+                    with self._lock:
+                        self.reconnects += 1
+                    self.deliver(InvalidationEvent(ALL, None, 0, "listener"))
+                first = False
+                logger.info(f"Escutando invalidações em {self.channel}")
+                self._listen(conn)
+            except Exception as e:
+                logger.error(f"Conexão de invalidação perdida: {e}")
+                self._stop.wait(self.reconnect_delay)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def _listen(self, conn) -> None:
+        while not self._stop.is_set():
+            readable, _, _ = select.select([conn], [], [], 1.0)
+            if not readable:
+                continue
+            conn.poll()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                self._receive(notify.payload)
+
+    def _receive(self, payload: str) -> None:
+        try:
+            event = InvalidationEvent(**json.loads(payload))
+        except (TypeError, ValueError) as e:
+            logger.error(f"Evento de invalidação inválido: {e}")
+            return
+        self.deliver(event)
+
+
+def build_invalidation_bus() -> InvalidationBus:
+    """Cria o canal configurado em `INVALIDATION_BUS`."""
+    if INVALIDATION_BUS == 'postgres':
+        return PostgresInvalidationBus(
+            engine,
+            INVALIDATION_CHANNEL,
+            reconnect_delay=INVALIDATION_RECONNECT_SECONDS,
+        )
+    return InvalidationBus()
+
+
+invalidation_bus = build_invalidation_bus()
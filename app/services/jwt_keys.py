@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+from typing import Dict, Optional
+
+import jwt
+import requests
+
+from ..tools.logging import logger
+
+
+class SigningKeyError(Exception):
+    """Indica que nenhuma chave pública está disponível para validar tokens."""
+
+
+class SigningKeyStore:
+    """
+    Mantém em memória as chaves públicas usadas para validar os JWTs.
+
+    As chaves são obtidas do JWKS exposto pelo auth-service ou de um arquivo
+    local (JWKS em JSON ou chave pública em PEM). Uma thread em background
+    recarrega as chaves periodicamente; um `kid` desconhecido também força
+    uma recarga, respeitando um intervalo mínimo entre tentativas.
+    """
+
+    def __init__(
+            self,
+            jwks_url: Optional[str] = None,
+            key_file: Optional[str] = None,
+            refresh_interval: float = 300.0,
+            min_refresh_interval: float = 10.0,
+            timeout: float = 2.0,
+            http_client=requests) -> None:
+        self.jwks_url = jwks_url
+        self.key_file = key_file
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.http_client = http_client
+        self._keys: Dict[Optional[str], object] = {}
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def get_key(self, kid: Optional[str]) -> object:
+        """Retorna a chave para o `kid` informado, recarregando se preciso."""
+        key = self._lookup(kid)
+        if key is None and self._can_refresh():
+            self.refresh()
+            key = self._lookup(kid)
+        if key is None:
+            raise SigningKeyError(f"Chave de assinatura não encontrada: {kid}")
+        return key
+
+    def has_key(self, kid: Optional[str]) -> bool:
+        """Indica se a chave está em memória, sem recarregar."""
+        return self._lookup(kid) is not None
+
+    def refresh(self) -> None:
+        """Recarrega as chaves a partir do arquivo local ou do auth-service."""
+        self._last_refresh = time.monotonic()
+        try:
+            keys = self._load()
+        except (OSError, ValueError, requests.RequestException,
+                jwt.PyJWTError) as e:
+            logger.error(f"Erro ao carregar chaves de assinatura: {e}")
+            return
+
+        with self._lock:
+            self._keys = keys
+        logger.info(f"{len(keys)} chave(s) de assinatura carregada(s)")
+
+    def start(self) -> None:
+        """Carrega as chaves e inicia a recarga periódica em background."""
+        self.refresh()
+        if self._thread is not None or self.refresh_interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="jwks-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Interrompe a recarga periódica."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+    def _lookup(self, kid: Optional[str]) -> Optional[object]:
+        with self._lock:
+            if kid in self._keys:
+                return self._keys[kid]
+            # Um único par de chaves dispensa o `kid` no cabeçalho do token
+            if len(self._keys) == 1:
+                return next(iter(self._keys.values()))
+            return None
+
+    def _can_refresh(self) -> bool:
+        elapsed = time.monotonic() - self._last_refresh
+        return elapsed >= self.min_refresh_interval
+
+    def _load(self) -> Dict[Optional[str], object]:
+        if self.key_file:
+            with open(self.key_file, encoding="utf-8") as key_file:
+                content = key_file.read()
+            if content.lstrip().startswith("{"):
+                return self._parse_jwks(json.loads(content))
+            return {None: content}
+
+        if not self.jwks_url:
+            raise ValueError("Nenhuma origem de chaves configurada")
+        response = self.http_client.get(self.jwks_url, timeout=self.timeout)
+        response.raise_for_status()
+        return self._parse_jwks(response.json())
+
+    @staticmethod
+    def _parse_jwks(data: dict) -> Dict[Optional[str], object]:
+        jwk_set = jwt.PyJWKSet.from_dict(data)
+        return {jwk.key_id: jwk.key for jwk in jwk_set.keys}
@@ -0,0 +1,159 @@
+"""
+Métricas no formato texto do Prometheus, sem dependências externas.
+
+As observações de requisições e de chamadas aos serviços externos acontecem
+no event loop, uma thread só; por isso os contadores são atualizados sem
+lock e o custo por requisição é o de uma busca em dicionário e uma busca
+binária nos limites do histograma. As agregações ficam para a coleta.
+"""
+import bisect
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Limites (segundos) dos histogramas de latência
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Rótulo das requisições que não casaram com nenhuma rota
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    """Histograma de latências; a contagem acumulada é feita na coleta."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        # Uma posição por limite, mais a do `+Inf`
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Pares (`le`, contagem acumulada), terminando em `+Inf`."""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((format_value(bound), total))
+        return result
+
+
+class RequestMetrics:
+    """Latência por rota e status, e requisições em andamento por método."""
+
+    def __init__(self) -> None:
+        self.latency: Dict[Tuple[str, str, str], Histogram] = {}
+        self.in_flight: Dict[str, int] = {}
+
+    def started(self, method: str) -> None:
+        self.in_flight[method] = self.in_flight.get(method, 0) + 1
+
+    def finished(
+            self,
+            method: str,
+            route: str,
+            status: int,
+            seconds: float) -> None:
+        self.in_flight[method] -= 1
+        key = (method, route, str(status))
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency.setdefault(key, Histogram())
+        histogram.observe(seconds)
+
+    def clear(self) -> None:
+        self.latency.clear()
+        self.in_flight.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+class Exposition:
+    """Monta o texto de exposição, uma família de métricas por vez."""
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(
+            self,
+            name: str,
+            value: float,
+            labels: Optional[Dict[str, str]] = None) -> None:
+        self.lines.append(
+            f"{name}{_format_labels(labels)} {format_value(value)}"
+        )
+
+    def histogram(
+            self,
+            name: str,
+            histogram: Histogram,
+            labels: Optional[Dict[str, str]] = None) -> None:
+        labels = labels or {}
+        for bound, count in histogram.cumulative():
+            self.sample(f"{name}_bucket", count, {**labels, "le": bound})
+        self.sample(f"{name}_sum", histogram.sum, labels)
+        self.sample(f"{name}_count", histogram.count, labels)
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def request_samples(exposition: Exposition) -> None:
+    """Acrescenta as métricas de requisições HTTP à exposição."""
+    latency = list(request_metrics.latency.items())
+
+    exposition.family(
+        "http_requests_total", "counter",
+        "Requisições atendidas por método, rota e status.")
+    for (method, route, status), histogram in latency:
+        exposition.sample("http_requests_total", histogram.count, {
+            "method": method, "route": route, "status": status,
+        })
+
+    exposition.family(
+        "http_request_duration_seconds", "histogram",
+        "Latência das requisições por método, rota e status.")
+    for (method, route, status), histogram in latency:
+        exposition.histogram("http_request_duration_seconds", histogram, {
+            "method": method, "route": route, "status": status,
+        })
+
+    exposition.family(
+        "http_requests_in_flight", "gauge",
+        "Requisições em andamento por método.")
+    for method, count in list(request_metrics.in_flight.items()):
+        exposition.sample(
+            "http_requests_in_flight", count, {"method": method})
+
+
+def _format_labels(labels: Optional[Dict[str, str]]) -> str:
+    if not labels:
+        return ""
+    pairs: Iterable[str] = (
+        f'{key}="{_escape(str(value))}"' for key, value in labels.items()
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    )
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
@@ -0,0 +1,313 @@
+"""
+Transmissão das alterações de pedidos para as conexões SSE.
+
+As alterações chegam pelos eventos "order" do canal de invalidação, que
+trazem as escritas de todas as réplicas (`publish_order_change`). O
+`OrderBroadcaster` repassa cada evento às inscrições cujos filtros o
+aceitam. Cada inscrição tem um buffer limitado no event loop: uma conexão
+lenta que enche o buffer perde os eventos pendentes e recebe um `resync`,
+sem atrasar as demais conexões nem quem publicou a alteração.
+"""
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from os import environ as env
+from typing import (
+    AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Set,
+)
+
+from dotenv import load_dotenv
+
+from ..tools.logging import logger
+from .invalidation import ALL, InvalidationEvent
+from .serializers import dumps
+
+load_dotenv()
+
+# Eventos pendentes por conexão antes de ela precisar se ressincronizar
+ORDER_STREAM_BUFFER_SIZE = int(env.get('ORDER_STREAM_BUFFER_SIZE', '100'))
+ORDER_STREAM_MAX_CONNECTIONS = int(
+    env.get('ORDER_STREAM_MAX_CONNECTIONS', '1000')
+)
+# Intervalo dos comentários que mantêm a conexão aberta em proxies
+ORDER_STREAM_HEARTBEAT_SECONDS = float(
+    env.get('ORDER_STREAM_HEARTBEAT_SECONDS', '15')
+)
+# Duração máxima de um stream; o cliente reconecta sozinho (`retry`), o que
+# redistribui as conexões entre as réplicas e não prende o shutdown
+ORDER_STREAM_MAX_SECONDS = float(env.get('ORDER_STREAM_MAX_SECONDS', '300'))
+ORDER_STREAM_RETRY_MS = int(env.get('ORDER_STREAM_RETRY_MS', '3000'))
+
+ORDER_ENTITY = "order"
+
+# Marcadores internos do buffer de cada inscrição
+_RESYNC = object()
+_CLOSE = object()
+
+
+class TooManySubscribers(Exception):
+    """O limite de conexões do stream de pedidos foi atingido."""
+
+
+class OrderFilter(NamedTuple):
+    """Filtros de uma inscrição; `None` aceita qualquer valor."""
+    customer_id: Optional[int] = None
+    order_id: Optional[int] = None
+    status: Optional[str] = None
+    payment_status: Optional[str] = None
+
+    def matches(self, change: dict) -> bool:
+        return (
+            (self.customer_id is None
+             or change.get("customer_id") == self.customer_id)
+            and (self.order_id is None or change.get("id") == self.order_id)
+            and (self.status is None or change.get("status") == self.status)
+            and (self.payment_status is None
+                 or change.get("payment_status") == self.payment_status)
+        )
+
+
+class OrderSubscription:
+    """
+    Uma conexão do stream, com seu buffer no event loop da requisição.
+
+    `offer`, `resync` e `close` só rodam no event loop; o
+    `OrderBroadcaster` os agenda com `call_soon_threadsafe` a partir da
+    thread que publicou.
+    """
+
+    def __init__(
+            self,
+            filters: OrderFilter,
+            loop: asyncio.AbstractEventLoop,
+            buffer_size: int) -> None:
+        self.filters = filters
+        self.loop = loop
+        self.buffer_size = buffer_size
+        # Sem `maxsize`: o limite vale só para eventos, e os marcadores de
+        # controle sempre cabem
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.delivered = 0
+        self.dropped = 0
+        self.resyncs = 0
+
+    def offer(self, item: object) -> None:
+        if self._queue.qsize() < self.buffer_size:
+            self._queue.put_nowait(item)
+            self.delivered += 1
+            return
+        # Conexão lenta: descarta o que está pendente e pede que o cliente
+        # recarregue os pedidos
+        self.dropped += self._drain()
+        self.resync()
+
+    def resync(self) -> None:
+        self.resyncs += 1
+        self._queue.put_nowait(_RESYNC)
+
+    def close(self) -> None:
+        # Os eventos pendentes ainda são enviados antes do fim do stream
+        self._queue.put_nowait(_CLOSE)
+
+    async def next(self, timeout: float) -> Optional[object]:
+        """Próximo item do buffer, ou `None` se nada chegar em `timeout`."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _drain(self) -> int:
+        drained = 0
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            drained += 1
+        return drained
+
+
+class OrderBroadcaster:
+    """
+    Distribui as alterações de pedidos às inscrições do processo.
+
+    `on_invalidation` é chamado na thread de quem publicou (threadpool,
+    event loop ou a thread do `LISTEN`); os filtros são avaliados ali e a
+    entrega é agendada uma única vez por event loop.
+    """
+
+    def __init__(
+            self,
+            buffer_size: int = 100,
+            max_connections: int = 1000) -> None:
+        self.buffer_size = buffer_size
+        self.max_connections = max_connections
+        self._subscriptions: Set[OrderSubscription] = set()
+        self._lock = threading.Lock()
+        self.events = 0
+        self.rejected = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.resyncs = 0
+
+    def check_capacity(self) -> None:
+        """
+        Confere se há vaga para uma nova conexão, sem reservá-la.
+
+        Raises:
+            TooManySubscribers: se já houver `max_connections` conexões.
+        """
+        with self._lock:
+            self._check_capacity()
+
+    def subscribe(self, filters: OrderFilter) -> OrderSubscription:
+        """
+        Inscreve uma conexão no event loop em execução.
+
+        Raises:
+            TooManySubscribers: se já houver `max_connections` conexões.
+        """
+        subscription = OrderSubscription(
+            filters, asyncio.get_running_loop(), self.buffer_size
+        )
+        with self._lock:
+            self._check_capacity()
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def _check_capacity(self) -> None:
+        if len(self._subscriptions) >= self.max_connections:
+            self.rejected += 1
+            raise TooManySubscribers()
+
+    def unsubscribe(self, subscription: OrderSubscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.discard(subscription)
+                self.delivered += subscription.delivered
+                self.dropped += subscription.dropped
+                self.resyncs += subscription.resyncs
+
+    def on_invalidation(self, event: InvalidationEvent) -> None:
+        """
+        Repassa um evento "order" às inscrições cujos filtros o aceitam.
+
+        Um evento `ALL` indica que o canal perdeu eventos (reconexão do
+        `LISTEN`); todas as conexões recebem um `resync`.
+        """
+        if event.entity == ALL:
+            self._dispatch(lambda subscription: True, _RESYNC)
+            return
+        if event.entity != ORDER_ENTITY or not event.data:
+            return
+        change = event.data
+        with self._lock:
+            self.events += 1
+        self._dispatch(
+            lambda subscription: subscription.filters.matches(change), change
+        )
+
+    def close(self) -> None:
+        """Encerra todos os streams abertos (shutdown da aplicação)."""
+        self._dispatch(lambda subscription: True, _CLOSE)
+
+    def stats(self) -> dict:
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+            return {
+                "connections": len(subscriptions),
+                "max_connections": self.max_connections,
+                "events": self.events,
+                "rejected": self.rejected,
+                "delivered": self.delivered + sum(
+                    s.delivered for s in subscriptions),
+                "dropped": self.dropped + sum(
+                    s.dropped for s in subscriptions),
+                "resyncs": self.resyncs + sum(
+                    s.resyncs for s in subscriptions),
+            }
+
+    def _dispatch(
+            self,
+            accepts: Callable[[OrderSubscription], bool],
+            item: object) -> None:
+        grouped: Dict[
+            asyncio.AbstractEventLoop, List[OrderSubscription]
+        ] = defaultdict(list)
+        with self._lock:
+            for subscription in self._subscriptions:
+                if accepts(subscription):
+                    grouped[subscription.loop].append(subscription)
+        for loop, subscriptions in grouped.items():
+            try:
+                loop.call_soon_threadsafe(_offer_all, subscriptions, item)
+            except RuntimeError:
+                # O event loop das conexões já foi encerrado
+                logger.debug("Stream de pedidos com event loop encerrado")
+
+
+def _offer_all(subscriptions: List[OrderSubscription], item: object) -> None:
+    for subscription in subscriptions:
+        if item is _CLOSE:
+            subscription.close()
+        elif item is _RESYNC:
+            subscription.resync()
+        else:
+            subscription.offer(item)
+
+
+def format_event(event: str, data: object) -> bytes:
+    """Um evento no formato `text/event-stream`."""
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+async def stream_events(
+        broadcaster: OrderBroadcaster,
+        filters: OrderFilter,
+        heartbeat: float = ORDER_STREAM_HEARTBEAT_SECONDS,
+        max_seconds: float = ORDER_STREAM_MAX_SECONDS,
+        retry_ms: int = ORDER_STREAM_RETRY_MS) -> AsyncIterator[bytes]:
+    """
+    Corpo da resposta SSE de uma inscrição com `filters`.
+
+    Emite um evento `order` por alteração, `resync` quando o cliente deve
+    recarregar os pedidos por `GET /orders/` e comentários de heartbeat
+    enquanto não há alterações.
+
+    A inscrição só é criada quando o corpo começa a ser enviado, dentro do
+    `try` que a remove: um cliente que desconecta antes disso não deixa
+    inscrição para trás. Ela é removida quando o cliente desconecta, o
+    stream atinge `max_seconds` ou a aplicação encerra. Se as vagas
+    acabarem entre a checagem da rota e a inscrição, o stream termina e o
+    cliente reconecta depois de `retry_ms`.
+    """
+    retry = f"retry: {retry_ms}\n\n".encode()
+    deadline = time.monotonic() + max_seconds
+    subscription: Optional[OrderSubscription] = None
+    try:
+        try:
+            subscription = broadcaster.subscribe(filters)
+        except TooManySubscribers:
+            yield retry
+            return
+        yield retry
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            item = await subscription.next(min(heartbeat, remaining))
+            if item is _CLOSE:
+                return
+            if item is None:
+                yield b": keepalive\n\n"
+            elif item is _RESYNC:
+                yield format_event("resync", {})
+            else:
+                yield format_event("order", item)
+    finally:
+        if subscription is not None:
+            broadcaster.unsubscribe(subscription)
+
+
+order_broadcaster = OrderBroadcaster(
+    buffer_size=ORDER_STREAM_BUFFER_SIZE,
+    max_connections=ORDER_STREAM_MAX_CONNECTIONS,
+)
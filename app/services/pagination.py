@@ -0,0 +1,94 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from os import environ as env
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+
+# Tamanho máximo de página, nos modos offset e cursor
+MAX_PAGE_SIZE = int(env.get('MAX_PAGE_SIZE', '100'))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    """Gera um cursor opaco a partir dos valores da última linha da página."""
+    payload = [
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[List[Any]]:
+    """
+    Decodifica um cursor gerado por `encode_cursor`.
+
+    Um cursor vazio indica a primeira página do modo cursor.
+
+    Raises:
+        HTTPException: 400 se o cursor for inválido.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, binascii.Error):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return values
+
+
+def decode_order_cursor(cursor: Optional[str]) -> Optional[tuple]:
+    """Decodifica o cursor `(created_at, id)` da listagem de pedidos."""
+    values = decode_cursor(cursor, 2)
+    if values is None:
+        return None
+    try:
+        return datetime.fromisoformat(values[0]), int(values[1])
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def decode_id_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Decodifica o cursor `id` das listagens do catálogo."""
+    values = decode_cursor(cursor, 1)
+    if values is None:
+        return None
+    try:
+        return int(values[0])
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def page_size(limit: int) -> int:
+    """Aplica o limite máximo de página (`MAX_PAGE_SIZE`)."""
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def set_next_cursor(
+        response: Response,
+        items: Sequence[Any],
+        limit: int,
+        cursor: Optional[str],
+        *fields: str) -> None:
+    """
+    Informa em `X-Next-Cursor` o cursor da próxima página, se houver.
+
+    Só vale para o modo cursor (`cursor` não é `None`); no modo offset o
+    header não é enviado. O cursor é montado com os `fields` do último
+    item; uma página incompleta indica que não há mais resultados.
+    """
+    if cursor is None or not items or len(items) < limit:
+        return
+    last = items[-1]
+    if isinstance(last, dict):
+        values = [last[field] for field in fields]
+    else:
+        values = [getattr(last, field) for field in fields]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*values)
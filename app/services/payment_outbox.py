@@ -0,0 +1,366 @@
+import asyncio
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from os import environ as env
+from typing import Callable, List, NamedTuple, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..database.database import SessionLocal
+from ..models import models
+from ..tools.logging import logger
+from .repository import (
+    PaymentRequestError,
+    PaymentServiceUnavailable,
+    payment_payload,
+    publish_order_change,
+    request_payment,
+)
+
+PAYMENT_WORKER_CONCURRENCY = int(env.get('PAYMENT_WORKER_CONCURRENCY', '4'))
+PAYMENT_OUTBOX_BATCH_SIZE = int(env.get('PAYMENT_OUTBOX_BATCH_SIZE', '20'))
+PAYMENT_OUTBOX_POLL_SECONDS = float(
+    env.get('PAYMENT_OUTBOX_POLL_SECONDS', '1')
+)
+PAYMENT_OUTBOX_MAX_ATTEMPTS = int(env.get('PAYMENT_OUTBOX_MAX_ATTEMPTS', '5'))
+PAYMENT_OUTBOX_BACKOFF_SECONDS = float(
+    env.get('PAYMENT_OUTBOX_BACKOFF_SECONDS', '2')
+)
+PAYMENT_OUTBOX_MAX_BACKOFF_SECONDS = float(
+    env.get('PAYMENT_OUTBOX_MAX_BACKOFF_SECONDS', '300')
+)
+PAYMENT_OUTBOX_LEASE_SECONDS = float(
+    env.get('PAYMENT_OUTBOX_LEASE_SECONDS', '30')
+)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _describe(error: Exception) -> str:
+    return f"{type(error).__name__}: {error}"
+
+
+class OutboxEntry(NamedTuple):
+    id: int
+    order_id: int
+    customer_email: Optional[str]
+    attempts: int
+
+
+class PaymentOutboxDispatcher:
+    """
+    Envia ao `payment-service` as solicitações gravadas em `payment_outbox`.
+
+    Os lotes são reservados com `SELECT ... FOR UPDATE SKIP LOCKED`, o que
+    permite várias réplicas drenarem a mesma tabela. Cada entrada reservada
+    recebe um prazo (`lease`); se a réplica morrer durante o envio, a entrada
+    volta a ser elegível quando o prazo vence. Falhas são reagendadas com
+    backoff exponencial com jitter até `max_attempts`, quando a entrada vai
+    para `dead`. Com o circuito do payment-service aberto, o pedido é marcado
+    como indisponível na hora e a entrada aguarda o fim do cool-down, sem
+    consumir tentativas.
+
+    O polling roda como uma task no event loop da aplicação: até
+    `concurrency` chamadas ao payment-service ficam em andamento ao mesmo
+    tempo sem ocupar threads, e só o acesso ao banco vai para o threadpool.
+    """
+
+    def __init__(
+            self,
+            session_factory: Callable[[], Session],
+            concurrency: int = 4,
+            batch_size: int = 20,
+            poll_interval: float = 1.0,
+            max_attempts: int = 5,
+            backoff: float = 2.0,
+            max_backoff: float = 300.0,
+            lease: float = 30.0) -> None:
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lease = lease
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.dead = 0
+
+    def notify(self) -> None:
+        """Antecipa o próximo ciclo, sem esperar o intervalo de polling."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Inicia o polling da outbox no event loop em execução."""
+        if self._task is not None:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(
+            self._run(), name="payment-outbox")
+        logger.info(
+            f"Dispatcher de pagamentos iniciado com {self.concurrency} "
+            f"envios simultâneos"
+            )
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Interrompe o polling e aguarda os envios em andamento."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Dispatcher de pagamentos interrompido no prazo")
+        self._task = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"sent": self.sent, "failed": self.failed,
+                    "dead": self.dead}
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                claimed = await self.dispatch_batch()
+            except SQLAlchemyError as e:
+                logger.error(f"Erro ao ler a outbox de pagamentos: {e}")
+                claimed = 0
+            except Exception:
+                # Nenhum erro inesperado pode encerrar o polling
+                logger.exception("Erro no dispatcher de pagamentos")
+                claimed = 0
+            if claimed < self.batch_size and not self._stopping:
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def dispatch_batch(self) -> int:
+        """Reserva e envia um lote. Retorna a quantidade reservada."""
+        entries = await run_in_threadpool(self.claim_batch)
+        if not entries:
+            return 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def deliver(entry: OutboxEntry) -> None:
+            async with semaphore:
+                try:
+                    await self.deliver(entry)
+                except Exception as e:
+                    # Uma entrada com erro não interrompe o restante do lote
+                    logger.exception(
+                        f"Erro ao processar a outbox do pedido "
+                        f"{entry.order_id}"
+                        )
+                    await run_in_threadpool(
+                        self._save, entry,
+                        partial(self._record_failure, error=_describe(e)),
+                    )
+
+        await asyncio.gather(*(deliver(entry) for entry in entries))
+        return len(entries)
+
+    def claim_batch(self) -> List[OutboxEntry]:
+        """Reserva as entradas elegíveis, marcando-as como `processing`."""
+        db = self.session_factory()
+        try:
+            now = _utcnow()
+            rows = (
+                db.query(models.PaymentOutbox)
+                .filter(
+                    models.PaymentOutbox.status.in_([
+                        models.OutboxStatus.PENDING.value,
+                        models.OutboxStatus.PROCESSING.value,
+                    ]),
+                    models.PaymentOutbox.next_attempt_at <= now,
+                )
+                .order_by(models.PaymentOutbox.next_attempt_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            entries = []
+            for row in rows:
+                row.status = models.OutboxStatus.PROCESSING.value
+                row.attempts += 1
+                row.next_attempt_at = now + timedelta(seconds=self.lease)
+                entries.append(OutboxEntry(
+                    row.id, row.order_id, row.customer_email, row.attempts
+                ))
+            db.commit()
+            return entries
+        except SQLAlchemyError:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def deliver(self, entry: OutboxEntry) -> None:
+        """Envia uma solicitação e registra o resultado na outbox."""
+        payload = await run_in_threadpool(self._load_payload, entry)
+        if payload is None:
+            return
+        try:
+            payment = await request_payment(payload)
+        except PaymentServiceUnavailable as e:
+            outcome = partial(self._record_unavailable,
+                              retry_after=e.retry_after)
+        except PaymentRequestError as e:
+            outcome = partial(self._record_failure, error=str(e))
+        except Exception as e:
+            logger.exception(
+                f"Erro inesperado no pagamento do pedido {entry.order_id}"
+                )
+            outcome = partial(self._record_failure, error=_describe(e))
+        else:
+            outcome = partial(self._record_success, payment=payment)
+        await run_in_threadpool(self._save, entry, outcome)
+
+    def _load_payload(self, entry: OutboxEntry) -> Optional[dict]:
+        db = self.session_factory()
+        try:
+            order = db.get(models.Order, entry.order_id)
+            if order is None:
+                return None
+            return payment_payload(order, entry.customer_email)
+        except SQLAlchemyError as e:
+            logger.error(
+                f"Erro ao ler o pedido {entry.order_id} da outbox: {e}"
+                )
+            return None
+        finally:
+            db.close()
+
+    def _save(
+            self,
+            entry: OutboxEntry,
+            outcome: Callable[[models.PaymentOutbox, models.Order], None]
+            ) -> None:
+        try:
+            self._apply(entry, outcome)
+        except Exception as e:
+            # Um resultado que não pôde ser gravado conta como tentativa
+            # falha; a entrada não fica presa em `processing`
+            logger.exception(
+                f"Erro ao registrar pagamento do pedido {entry.order_id}"
+                )
+            self._apply(
+                entry, partial(self._record_failure, error=_describe(e))
+            )
+
+    def _apply(
+            self,
+            entry: OutboxEntry,
+            outcome: Callable[[models.PaymentOutbox, models.Order], None]
+            ) -> None:
+        db = self.session_factory()
+        try:
+            row = db.get(models.PaymentOutbox, entry.id)
+            order = db.get(models.Order, entry.order_id)
+            if row is None or order is None:
+                return
+            payment_status = order.payment_status
+            outcome(row, order)
+            db.commit()
+            if order.payment_status != payment_status:
+                publish_order_change(order)
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(
+                f"Erro ao gravar pagamento do pedido {entry.order_id}: {e}"
+                )
+        finally:
+            db.close()
+
+    def backoff_delay(self, attempts: int) -> float:
+        """
+        Atraso antes da próxima tentativa.
+
+        O teto dobra a cada falha; metade dele é fixa e a outra metade é
+        sorteada, espalhando as novas tentativas das várias réplicas.
+        """
+        ceiling = min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    def _record_success(
+            self,
+            row: models.PaymentOutbox,
+            order: models.Order,
+            payment: dict) -> None:
+        order.payment_status = "awaiting_payment"
+        order.payment_id = str(payment.get("payment_id"))
+        order.qr_code = payment.get("qr_code")
+        order.payment_link = payment.get("payment_link")
+        row.status = models.OutboxStatus.SENT.value
+        row.last_error = None
+        with self._lock:
+            self.sent += 1
+
+    def _record_unavailable(
+            self,
+            row: models.PaymentOutbox,
+            order: models.Order,
+            retry_after: float) -> None:
+        order.payment_status = "payment_service_unavailable"
+        row.attempts -= 1
+        row.status = models.OutboxStatus.PENDING.value
+        row.last_error = "payment_service_unavailable"
+        delay = retry_after + random.uniform(0, self.backoff)
+        row.next_attempt_at = _utcnow() + timedelta(seconds=delay)
+        with self._lock:
+            self.failed += 1
+
+    def _record_failure(
+            self,
+            row: models.PaymentOutbox,
+            order: models.Order,
+            error: str) -> None:
+        row.last_error = error
+        if row.attempts >= self.max_attempts:
+            row.status = models.OutboxStatus.DEAD.value
+            order.payment_status = "payment_service_unavailable"
+            logger.error(
+                f"Falha ao processar pagamento para pedido {order.id} "
+                f"após {row.attempts} tentativas."
+                )
+            with self._lock:
+                self.dead += 1
+            return
+
+        delay = self.backoff_delay(row.attempts)
+        row.status = models.OutboxStatus.PENDING.value
+        row.next_attempt_at = _utcnow() + timedelta(seconds=delay)
+        logger.warning(
+            f"Pagamento do pedido {order.id} reagendado em {delay:.1f}s "
+            f"[Tentativa {row.attempts}/{self.max_attempts}]"
+            )
+        with self._lock:
+            self.failed += 1
+
+
+payment_dispatcher = PaymentOutboxDispatcher(
+    SessionLocal,
+    concurrency=PAYMENT_WORKER_CONCURRENCY,
+    batch_size=PAYMENT_OUTBOX_BATCH_SIZE,
+    poll_interval=PAYMENT_OUTBOX_POLL_SECONDS,
+    max_attempts=PAYMENT_OUTBOX_MAX_ATTEMPTS,
+    backoff=PAYMENT_OUTBOX_BACKOFF_SECONDS,
+    max_backoff=PAYMENT_OUTBOX_MAX_BACKOFF_SECONDS,
+    lease=PAYMENT_OUTBOX_LEASE_SECONDS,
+)
@@ -1,101 +1,167 @@
-import requests
+import httpx
 from fastapi import HTTPException
 from datetime import datetime, timezone
-from typing import List, Optional
-from sqlalchemy.orm import Session, joinedload
+from typing import Any, List, Optional
+from sqlalchemy import and_, insert, or_, true
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy.exc import SQLAlchemyError
 from os import environ as env
-import time
 
+from ..database.replicas import use_primary
 from ..models import models, schemas
-from ..tools.logging import logger
-
-# Definição da URL do serviço de pagamento
-PAYMENT_SERVICE_URL = env.get("PAYMENT_SERVICE_URL")
-PRODUCT_NOT_FOUND = "Produto não encontrado"
+from ..tools.logging import logger, request_logger
+from . import pagination, serializers
+from .catalog_cache import (
+    CatalogSnapshot, catalog_cache, list_categories, list_products,
+)
+from .invalidation import invalidation_bus
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .http_clients import payment_async_client
+
+# Circuit breaker que protege as chamadas ao payment-service
+payment_breaker = CircuitBreaker(
+    "payment-service",
+    failure_rate_threshold=float(env.get('PAYMENT_CB_FAILURE_RATE', '0.5')),
+    window_size=int(env.get('PAYMENT_CB_WINDOW_SIZE', '20')),
+    minimum_calls=int(env.get('PAYMENT_CB_MINIMUM_CALLS', '5')),
+    cooldown=float(env.get('PAYMENT_CB_COOLDOWN_SECONDS', '30')),
+)
 
 
 # ---------------------- INTEGRAÇÃO COM O PAYMENT-SERVICE ------------------
-def request_payment(
-        order: models.Order,
-        customer_email: str,
-        db: Session,
-        max_retries: int = 3) -> dict:
-    """
-    Solicita a geração de um pagamento no `payment-service`,
-    com tentativas de retry.
-    """
+class PaymentRequestError(Exception):
+    """Falha ao solicitar um pagamento ao `payment-service`."""
+
+
+class PaymentServiceUnavailable(PaymentRequestError):
+    """O circuito do `payment-service` está aberto; a chamada não foi feita."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__("payment_service_unavailable")
+        self.retry_after = retry_after
 
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    }
 
-    payment_payload = {
+def payment_payload(
+        order: models.Order,
+        customer_email: Optional[str]) -> dict:
+    """Monta a solicitação de pagamento de um pedido."""
+    return {
         "order_id": str(order.id),
-        "amount": calculate_total_amount(order, db),
+        "amount": calculate_total_amount(order),
         "customer_id": order.customer_id,
         "currency": "BRL",
         "email": customer_email or "cliente@example.com",
         "description": f"Pedido {order.id} - {len(order.order_items)} itens"
     }
 
-    logger.info(f"Solicitando pagamento para pedido {order.id}")
-
-    for attempt in range(1, max_retries + 1):
-        try:
-            response = requests.post(
-                f"{PAYMENT_SERVICE_URL}/payments/",
-                json=payment_payload,
-                headers=headers,
-                timeout=2)
-            logger.info(response)
-
-            if response.status_code == 200:
-                payment_data = response.json()
-                logger.info(
-                    f"Pagamento criado para pedido {order.id}: {payment_data}"
-                    )
 
-                # Atualiza status de pagamento no pedido
-                order.payment_status = "awaiting_payment"
-                db.commit()
-                return payment_data
+async def request_payment(payment_payload: dict) -> dict:
+    """
+    Solicita a geração de um pagamento no `payment-service`.
 
-            else:
-                logger.error(
-                    f"⚠️ Erro ao criar pagamento para pedido {order.id} "
-                    f"[Tentativa {attempt}/{max_retries}]: {response.text}"
-                    )
+    Faz uma única tentativa; novas tentativas são agendadas pelo
+    dispatcher da outbox de pagamentos. Com o circuito aberto a chamada
+    falha imediatamente, sem tocar a rede.
 
-        except requests.RequestException as e:
-            logger.error(
-                f"Erro de conexão com `payment-service` "
-                f"[Tentativa {attempt}/{max_retries}]: {e}"
-                )
+    Raises:
+        PaymentServiceUnavailable: Se o circuito estiver aberto.
+        PaymentRequestError: Se o `payment-service` falhar ou recusar.
+    """
 
-        time.sleep(1)
+    headers = {
+        "Content-Type": "application/json",
+        "Accept": "application/json"
+    }
+    order_id = payment_payload["order_id"]
 
-    # Se todas as tentativas falharem, marca o pedido como
-    # "payment_service_unavailable"
-    order.payment_status = "payment_service_unavailable"
-    db.commit()
-    logger.error(
-        f"Falha ao processar pagamento para pedido "
-        f"{order.id} após {max_retries} tentativas.")
+    logger.info("Solicitando pagamento para pedido %s", order_id)
 
-    return {"error": "payment_service_unavailable"}
+    # Uma chamada cancelada no meio devolve a vaga de teste do circuito
+    try:
+        with payment_breaker.call():
+            try:
+                response = await payment_async_client.post(
+                    "/payments/",
+                    json=payment_payload,
+                    headers=headers)
+            except httpx.HTTPError as e:
+                payment_breaker.record_failure()
+                logger.error(f"Erro de conexão com `payment-service`: {e}")
+                raise PaymentRequestError(str(e)) from e
+
+            # Erros 4xx indicam um problema na solicitação, não no serviço
+            if response.status_code >= 500:
+                payment_breaker.record_failure()
+            else:
+                payment_breaker.record_success()
+    except CircuitOpenError as e:
+        raise PaymentServiceUnavailable(e.retry_after) from e
+
+    if response.status_code != 200:
+        logger.error(
+            f"⚠️ Erro ao criar pagamento para pedido {order_id}: "
+            f"{response.text}"
+            )
+        raise PaymentRequestError(
+            f"HTTP {response.status_code}: {response.text}"
+        )
+
+    # Uma resposta 200 sem o JSON esperado é uma falha desta tentativa
+    try:
+        payment_data = response.json()
+    except ValueError as e:
+        raise PaymentRequestError(
+            f"Resposta inválida do `payment-service`: {e}"
+        ) from e
+    if not isinstance(payment_data, dict):
+        raise PaymentRequestError(
+            "Resposta inválida do `payment-service`: "
+            f"{type(payment_data).__name__}"
+        )
+    logger.info("Pagamento criado para pedido %s", order_id)
+    return payment_data
+
+
+def _catalog(
+        db: Session,
+        snapshot: Optional[CatalogSnapshot]) -> CatalogSnapshot:
+    return snapshot if snapshot is not None else catalog_cache.snapshot(db)
 
 
 # ------------------------ CATEGORIAS ------------------------
 def get_categories(
         db: Session,
         skip: int = 0,
-        limit: int = 10) -> List[schemas.CategoryRead]:
-    """Obtém categorias ativas com paginação."""
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        snapshot: Optional[CatalogSnapshot] = None
+        ) -> List[schemas.CategoryRead]:
+    """
+    Obtém categorias ativas com paginação, ordenadas por ID.
+
+    Com `cursor` (modo keyset), `skip` é ignorado e a página começa após o
+    ID codificado no cursor. Com o cache de catálogo ativo, a página é
+    montada a partir do snapshot em memória (`snapshot`, se informado, ou
+    o atual).
+    """
+    if catalog_cache.enabled:
+        return list_categories(
+            _catalog(db, snapshot), skip, limit,
+            pagination.decode_id_cursor(cursor)
+        )
+
+    query = db.query(models.Category).filter(
+        models.Category.enabled == true()
+    )
+    if cursor is not None:
+        after_id = pagination.decode_id_cursor(cursor)
+        if after_id is not None:
+            query = query.filter(models.Category.id > after_id)
+        skip = 0
+
     categories = (
-        db.query(models.Category)
-        .filter(models.Category.enabled is True)
+        query
+        .order_by(models.Category.id)
         .offset(skip)
         .limit(limit)
         .all()
@@ -112,8 +178,14 @@ def get_categories(
 
 
 def get_category(
-        db: Session, category_id: int) -> Optional[schemas.CategoryRead]:
+        db: Session,
+        category_id: int,
+        snapshot: Optional[CatalogSnapshot] = None
+        ) -> Optional[schemas.CategoryRead]:
     """Obtém uma categoria pelo ID."""
+    if catalog_cache.enabled:
+        return _catalog(db, snapshot).categories.get(category_id)
+
     category = (
         db.query(models.Category)
         .filter(models.Category.id == category_id)
@@ -139,6 +211,8 @@ def create_category(
     db.add(db_category)
     db.commit()
     db.refresh(db_category)
+    catalog_cache.put_category(db_category)
+    invalidation_bus.publish("category", db_category.id)
     return db_category
 
 
@@ -161,6 +235,8 @@ def update_category(
 
     db.commit()
     db.refresh(category)
+    catalog_cache.put_category(category)
+    invalidation_bus.publish("category", category.id)
     return category
 
 
@@ -169,17 +245,40 @@ def get_products(
         db: Session,
         category_id: Optional[int] = None,
         skip: int = 0,
-        limit: int = 10) -> List[schemas.ProductRead]:
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        snapshot: Optional[CatalogSnapshot] = None
+        ) -> List[schemas.ProductRead]:
     """
-    Obtém uma lista paginada de produtos ativos.
+    Obtém uma lista paginada de produtos ativos, ordenados por ID.
     Se `category_id` for informado, filtra por essa categoria.
+    Com `cursor` (modo keyset), `skip` é ignorado e a página começa após o
+    ID codificado no cursor. Com o cache de catálogo ativo, a página é
+    montada a partir do snapshot em memória (`snapshot`, se informado, ou
+    o atual).
     """
-    query = db.query(models.Product).filter(models.Product.enabled is True)
+    if catalog_cache.enabled:
+        return list_products(
+            _catalog(db, snapshot), category_id, skip, limit,
+            pagination.decode_id_cursor(cursor)
+        )
+
+    query = db.query(models.Product).filter(
+        models.Product.enabled == true()
+    )
 
     if category_id:
         query = query.filter(models.Product.category_id == category_id)
 
-    products = query.offset(skip).limit(limit).all()
+    if cursor is not None:
+        after_id = pagination.decode_id_cursor(cursor)
+        if after_id is not None:
+            query = query.filter(models.Product.id > after_id)
+        skip = 0
+
+    products = (
+        query.order_by(models.Product.id).offset(skip).limit(limit).all()
+    )
 
     return [
         schemas.ProductRead(
@@ -197,8 +296,15 @@ def get_products(
     ]
 
 
-def get_product(db: Session, product_id: int) -> Optional[schemas.ProductRead]:
+def get_product(
+        db: Session,
+        product_id: int,
+        snapshot: Optional[CatalogSnapshot] = None
+        ) -> Optional[schemas.ProductRead]:
     """Obtém um produto pelo ID, incluindo detalhes da categoria."""
+    if catalog_cache.enabled:
+        return _catalog(db, snapshot).products.get(product_id)
+
     product = (
         db.query(models.Product)
         .filter(models.Product.id == product_id)
@@ -234,6 +340,8 @@ def create_product(
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
+    catalog_cache.put_product(db_product)
+    invalidation_bus.publish("product", db_product.id)
     return db_product
 
 
@@ -258,218 +366,257 @@ def update_product(
 
     db.commit()
     db.refresh(product)
+    catalog_cache.put_product(product)
+    invalidation_bus.publish("product", product.id)
     return product
 
 
 # ------------------------ PEDIDOS ------------------------
+def publish_order_change(order: Any) -> None:
+    """
+    Publica no canal de invalidação o estado de um pedido após o commit.
+
+    `order` é um `models.Order` ou uma linha com as mesmas colunas. Os
+    eventos alimentam o stream de pedidos (`GET /orders/stream`) de todas
+    as réplicas.
+    """
+    invalidation_bus.publish("order", order.id, {
+        "id": order.id,
+        "customer_id": order.customer_id,
+        "status": order.status,
+        "payment_status": order.payment_status,
+        "updated_at": (
+            order.updated_at.isoformat() if order.updated_at else None
+        ),
+    })
+
+
 def get_order(db: Session, order_id: int) -> Optional[dict]:
-    """Obtém um pedido pelo ID, garantindo que os itens sejam carregados."""
-    logger.info(f"🔍 Buscando pedido {order_id} no banco de dados...")
-
-    order = (
-        db.query(models.Order)
-        .options(
-            joinedload(models.Order.order_items)
-            .joinedload(models.OrderItem.product)
+    """
+    Obtém um pedido pelo ID, garantindo que os itens sejam carregados.
+
+    O total e os preços vêm das colunas gravadas na criação do pedido,
+    sem consultar a tabela de produtos. A leitura vai ao primário, como a
+    de `get_order_updated_at`: a ETag da resposta vem do `updated_at` e
+    precisa refletir a última alteração do pedido.
+    """
+    request_logger.debug(
+        "🔍 Buscando pedido %s no banco de dados...", order_id
+        )
+
+    with use_primary(db):
+        order = (
+            db.query(models.Order)
+            .options(joinedload(models.Order.order_items))
+            .filter(models.Order.id == order_id)
+            .first()
         )
-        .filter(models.Order.id == order_id)
-        .first()
-    )
 
     if not order:
         logger.warning(
-            f"⚠️ Pedido {order_id} não encontrado no banco de dados!"
+            "⚠️ Pedido %s não encontrado no banco de dados!", order_id
             )
         return None
 
-    logger.info(
-        f"✅ Pedido {order_id} encontrado! Preparando resposta..."
+    request_logger.debug(
+        "✅ Pedido %s encontrado! Preparando resposta...", order_id
         )
 
-    total_amount = sum(
-        (item.product.price * item.quantity) if item.product else 0
-        for item in order.order_items
-    )
+    return serializers.order(order, order.order_items)
 
-    return {
-        "id": order.id,
-        "customer_id": order.customer_id,
-        "status": order.status,
-        "payment_status": order.payment_status,
-        "amount": total_amount,
-        "qr_code": (
-            order.qr_code if hasattr(order, "qr_code") else None
-            ),
-        "payment_link": (
-            order.payment_link if hasattr(order, "payment_link") else None
-        ),
-        "created_at": order.created_at,
-        "updated_at": order.updated_at,
-        "items": [
-            {
-                "id": item.id,
-                "product_id": item.product.id if item.product else None,
-                "name": (
-                    item.product.name
-                    if item.product
-                    else PRODUCT_NOT_FOUND
-                ),
-                "price": item.product.price if item.product else 0.0,
-                "quantity": item.quantity
-            }
-            for item in order.order_items
-        ]
-    }
 
+def get_order_updated_at(db: Session, order_id: int) -> Optional[datetime]:
+    """
+    Obtém só o `updated_at` de um pedido, pela chave primária.
 
-def get_orders(db: Session, skip: int = 0, limit: int = 10) -> List[dict]:
+    Usado para validar a ETag de um pedido sem carregar o pedido e seus
+    itens; retorna `None` se o pedido não existir. Lê do primário: logo
+    após um PATCH ou uma atualização do pagamento, uma réplica atrasada
+    ainda teria o `updated_at` antigo e a validação responderia 304.
+    """
+    with use_primary(db):
+        return (
+            db.query(models.Order.updated_at)
+            .filter(models.Order.id == order_id)
+            .scalar()
+        )
+
+
+def get_orders(
+        db: Session,
+        skip: int = 0,
+        limit: int = 10,
+        customer_id: Optional[int] = None,
+        status: Optional[str] = None,
+        payment_status: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        cursor: Optional[str] = None) -> List[dict]:
     """
     Obtém uma lista paginada de pedidos,
     incluindo detalhes de itens e pagamento.
+
+    Os filtros são aplicados na consulta, antes da paginação, e usam os
+    índices compostos `(customer_id, created_at)`, `(status, created_at)` e
+    `(payment_status, created_at)`. Os pedidos mais recentes vêm primeiro.
+
+    Com `cursor` (modo keyset), `skip` é ignorado e a página começa logo
+    após o par `(created_at, id)` codificado no cursor; um cursor vazio
+    indica a primeira página.
+    Os itens são carregados em uma segunda consulta (`selectinload`), e
+    total e preços vêm das colunas gravadas no pedido.
     """
-    logger.info(
-        f"🔍 Buscando pedidos (skip={skip}, limit={limit}) no banco de dados..."
+    request_logger.debug(
+        "🔍 Buscando pedidos (skip=%s, limit=%s, customer_id=%s, status=%s, "
+        "payment_status=%s) no banco de dados...",
+        skip, limit, customer_id, status, payment_status,
         )
 
+    query = db.query(models.Order)
+    if customer_id is not None:
+        query = query.filter(models.Order.customer_id == customer_id)
+    if status is not None:
+        query = query.filter(models.Order.status == status)
+    if payment_status is not None:
+        query = query.filter(models.Order.payment_status == payment_status)
+    if created_from is not None:
+        query = query.filter(models.Order.created_at >= created_from)
+    if created_to is not None:
+        query = query.filter(models.Order.created_at < created_to)
+
+    if cursor is not None:
+        after = pagination.decode_order_cursor(cursor)
+        if after is not None:
+            created_at, order_id = after
+            query = query.filter(or_(
+                models.Order.created_at < created_at,
+                and_(models.Order.created_at == created_at,
+                     models.Order.id < order_id),
+            ))
+        skip = 0
+
     orders = (
-        db.query(models.Order)
-        .options(
-            joinedload(models.Order.order_items)
-            .joinedload(models.OrderItem.product)
-            )
+        query
+        .options(selectinload(models.Order.order_items))
+        .order_by(models.Order.created_at.desc(), models.Order.id.desc())
         .offset(skip)
         .limit(limit)
         .all()
     )
 
     if not orders:
-        logger.warning("⚠️ Nenhum pedido encontrado no banco de dados!")
+        request_logger.debug("⚠️ Nenhum pedido encontrado no banco de dados!")
         return []
 
-    logger.info(f"✅ {len(orders)} pedidos encontrados. Preparando resposta...")
+    request_logger.debug(
+        "✅ %d pedidos encontrados. Preparando resposta...", len(orders)
+        )
 
     return [
-        {
-            "id": order.id,
-            "customer_id": order.customer_id,
-            "status": order.status,
-            "payment_status": order.payment_status,
-            "amount": sum(
-                (item.product.price * item.quantity) if item.product else 0
-                for item in order.order_items
-            ),
-            "qr_code": order.qr_code if hasattr(order, "qr_code") else None,
-            "payment_link": (
-                order.payment_link if hasattr(order, "payment_link") else None
-            ),
-            "created_at": order.created_at,
-            "updated_at": order.updated_at,
-            "items": [
-                {
-                    "id": item.id,
-                    "product_id": item.product.id if item.product else None,
-                    "name": (
-                        item.product.name
-                        if item.product
-                        else PRODUCT_NOT_FOUND
-                    ),
-                    "price": item.product.price if item.product else 0.0,
-                    "quantity": item.quantity
-                }
-                for item in order.order_items
-            ]
-        }
-        for order in orders
+        serializers.order(order, order.order_items) for order in orders
     ]
 
 
 def create_order(db: Session, order_data: schemas.OrderCreate) -> dict:
-    """Cria um novo pedido e solicita um link de pagamento."""
-    try:
-        logger.info(
-            f"Criando novo pedido para cliente {order_data.customer_id}"
-            )
-
-        # Criando o pedido no banco de dados
-        db_order = models.Order(
-            customer_id=order_data.customer_id,
-            status="created",
-            payment_status="pending",
-            created_at=datetime.now(timezone.utc),
-            updated_at=datetime.now(timezone.utc)
+    """
+    Cria um novo pedido em uma única transação.
+
+    Os produtos referenciados são carregados com uma única consulta `IN`;
+    produtos inexistentes ou inativos recusam o pedido antes de qualquer
+    escrita. O pedido, seus itens (via `INSERT ... RETURNING`) e a
+    solicitação de pagamento (`PaymentOutbox`) são gravados com um único
+    commit. O total do pedido e o nome e preço de cada item são gravados
+    como retrato do catálogo no momento da compra. O pagamento é enviado
+    depois, pelo dispatcher da outbox, e o pedido criado é publicado no
+    stream de pedidos.
+    """
+    request_logger.debug(
+        "Criando novo pedido para cliente %s", order_data.customer_id
         )
-        db.add(db_order)
-        db.commit()
-        db.refresh(db_order)
 
-        # Criar itens do pedido em lote
-        order_items = [
-            models.OrderItem(
-                order_id=db_order.id,
-                product_id=item.product_id,
-                quantity=item.quantity)
-            for item in order_data.order_items
-        ]
-        db.bulk_save_objects(order_items)
-        db.commit()
-
-        # Recuperar os itens do pedido com detalhes do produto
-        order_with_items = db.query(models.Order).options(
-            joinedload(models.Order.order_items)
-            .joinedload(models.OrderItem.product)
-        ).filter(models.Order.id == db_order.id).first()
+    product_ids = {item.product_id for item in order_data.order_items}
+    products = {
+        product.id: product
+        for product in db.query(models.Product)
+        .filter(models.Product.id.in_(product_ids))
+        .all()
+    }
+    unavailable = sorted(
+        product_id for product_id in product_ids
+        if product_id not in products or not products[product_id].enabled
+    )
+    if unavailable:
+        logger.warning(
+            f"Pedido recusado, produtos indisponíveis: {unavailable}"
+            )
+        raise HTTPException(
+            status_code=400,
+            detail=f"Produtos não encontrados ou inativos: {unavailable}"
+            )
+    # Copiados antes do commit, que expira as instâncias carregadas
+    product_info = {pid: (p.name, p.price) for pid, p in products.items()}
+    total_amount = sum(
+        product_info[item.product_id][1] * item.quantity
+        for item in order_data.order_items
+    )
 
-        # **INTEGRAÇÃO COM O PAYMENT-SERVICE**
-        customer_email = (
-            order_data.email if order_data.email else "cliente@example.com"
+    try:
+        now = datetime.now(timezone.utc)
+        # Todas as colunas, para montar a resposta sem reler o pedido
+        db_order = db.execute(
+            insert(models.Order)
+            .values(
+                customer_id=order_data.customer_id,
+                status="created",
+                payment_status="pending",
+                total_amount=total_amount,
+                created_at=now,
+                updated_at=now)
+            .returning(*models.Order.__table__.columns)
+        ).one()
+
+        item_rows = []
+        if order_data.order_items:
+            item_rows = db.execute(
+                insert(models.OrderItem).returning(
+                    models.OrderItem.id,
+                    models.OrderItem.product_id,
+                    models.OrderItem.product_name,
+                    models.OrderItem.unit_price,
+                    models.OrderItem.quantity),
+                [
+                    {
+                        "order_id": db_order.id,
+                        "product_id": item.product_id,
+                        "product_name": product_info[item.product_id][0],
+                        "unit_price": product_info[item.product_id][1],
+                        "quantity": item.quantity,
+                    }
+                    for item in order_data.order_items
+                ],
+            ).all()
+
+        # A solicitação de pagamento é gravada na mesma transação do pedido
+        db.execute(
+            insert(models.PaymentOutbox).values(
+                order_id=db_order.id,
+                customer_email=order_data.email,
+                status=models.OutboxStatus.PENDING.value)
         )
-        payment_response = request_payment(db_order, customer_email, db)
-
-        payment_details = {
-            "payment_id": None,
-            "amount": None,
-            "qr_code": None,
-            "payment_link": None
-        }
-
-        if payment_response and "payment_id" in payment_response:
-            db_order.payment_status = "awaiting_payment"
-            payment_details = {
-                "payment_id": payment_response["payment_id"],
-                "amount": payment_response["amount"],
-                "qr_code": payment_response["qr_code"],
-                "payment_link": payment_response["payment_link"]
-            }
-            db.commit()
-            db.refresh(db_order)
-
-        # **Retornar os detalhes completos do pedido**
-        return {
-            "id": db_order.id,
-            "customer_id": db_order.customer_id,
-            "status": db_order.status,
-            "payment_status": db_order.payment_status,
-            "amount": payment_details["amount"],
-            "qr_code": payment_details["qr_code"],
-            "payment_link": payment_details["payment_link"],
-            "created_at": db_order.created_at,
-            "updated_at": db_order.updated_at,
-            "items": [
-                {
-                    "product_id": item.product.id,
-                    "name": item.product.name,
-                    "price": item.product.price,
-                    "quantity": item.quantity
-                }
-                for item in order_with_items.order_items
-            ]
-        }
+        db.commit()
 
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"Erro ao criar pedido: {e}")
         raise HTTPException(status_code=500, detail="Erro ao criar pedido.")
 
+    publish_order_change(db_order)
+
+    # O pedido é devolvido imediatamente com `payment_status=pending`
+    return serializers.order(
+        db_order, sorted(item_rows, key=lambda row: row.id)
+    )
+
 
 def update_order_status(
     db: Session,
@@ -531,38 +678,17 @@ def update_order_status(
             order.updated_at = datetime.now(timezone.utc)
             db.commit()
             db.refresh(order)
-            logger.info(
-                f"✅ Pedido {order_id} atualizado para status {order.status} "
-                f"e pagamento {order.payment_status}"
+            publish_order_change(order)
+            request_logger.info(
+                "✅ Pedido %s atualizado para status %s e pagamento %s",
+                order_id, order.status, order.payment_status,
                 )
         else:
-            logger.info(
-                f"⚠️ Nenhuma mudança realizada para o pedido {order_id}"
+            request_logger.info(
+                "⚠️ Nenhuma mudança realizada para o pedido %s", order_id
                 )
 
-        return {
-            "id": order.id,
-            "customer_id": order.customer_id,
-            "status": order.status,  # Já é string, não precisa acessar
-            # `.value`
-            "payment_status": order.payment_status,  # Já é string
-            "created_at": order.created_at,
-            "updated_at": order.updated_at,
-            "items": [
-                {
-                    "id": item.id,
-                    "product_id": item.product.id if item.product else None,
-                    "name": (
-                        item.product.name
-                        if item.product
-                        else PRODUCT_NOT_FOUND
-                    ),
-                    "price": item.product.price if item.product else 0.0,
-                    "quantity": item.quantity
-                }
-                for item in order.order_items
-            ]
-        }
+        return serializers.order(order, order.order_items)
 
     except SQLAlchemyError as e:
         db.rollback()
@@ -604,12 +730,10 @@ def get_tracking(db: Session, order_id: int) -> List[schemas.TrackingRead]:
 
 
 # ------------------------ CÁLCULO DO TOTAL DO PEDIDO ------------------------
-def calculate_total_amount(order: models.Order, db: Session) -> float:
-    total = 0.0
-    for item in order.order_items:
-        product = db.query(models.Product).filter(
-            models.Product.id == item.product_id
-        ).first()
-        if product:
-            total += product.price * item.quantity
-    return total
+def calculate_total_amount(order: models.Order) -> float:
+    """Total do pedido, a partir dos preços gravados na criação."""
+    if order.total_amount is not None:
+        return order.total_amount
+    return sum(
+        (item.unit_price or 0.0) * item.quantity for item in order.order_items
+    )
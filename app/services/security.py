@@ -1,28 +1,67 @@
-import requests
-from fastapi import HTTPException, Depends
-from fastapi.security import HTTPBearer
+import httpx
+import jwt
+from fastapi import HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from starlette.status import (
     HTTP_401_UNAUTHORIZED,
     HTTP_500_INTERNAL_SERVER_ERROR
     )
 from dotenv import load_dotenv
 from os import environ as env
+from typing import Optional
 
-from ..tools.logging import logger
+from ..tools.logging import logger, request_logger
+from .http_clients import auth_async_client, auth_client
+from .jwt_keys import SigningKeyError, SigningKeyStore
+from .token_cache import INVALID_TOKEN, TokenCache
 
 load_dotenv()
 
 AUTH_SERVICE_URL = env.get('AUTH_SERVICE_URL')
+AUTH_CACHE_TTL_SECONDS = float(env.get('AUTH_CACHE_TTL_SECONDS', '60'))
+AUTH_CACHE_NEGATIVE_TTL_SECONDS = float(
+    env.get('AUTH_CACHE_NEGATIVE_TTL_SECONDS', '5')
+)
+AUTH_CACHE_MAX_ENTRIES = int(env.get('AUTH_CACHE_MAX_ENTRIES', '10000'))
+
+# "remote" valida cada token no auth-service; "local" valida a assinatura
+# do JWT com as chaves públicas do auth-service, sem chamada de rede.
+AUTH_VERIFICATION_MODE = env.get('AUTH_VERIFICATION_MODE', 'remote')
+AUTH_JWKS_URL = env.get(
+    'AUTH_JWKS_URL', f"{AUTH_SERVICE_URL}/.well-known/jwks.json"
+)
+AUTH_PUBLIC_KEY_FILE = env.get('AUTH_PUBLIC_KEY_FILE')
+AUTH_JWKS_REFRESH_SECONDS = float(env.get('AUTH_JWKS_REFRESH_SECONDS', '300'))
+AUTH_JWT_ALGORITHMS = env.get('AUTH_JWT_ALGORITHMS', 'RS256').split(',')
+AUTH_JWT_AUDIENCE = env.get('AUTH_JWT_AUDIENCE')
+AUTH_JWT_ISSUER = env.get('AUTH_JWT_ISSUER')
 
 security = HTTPBearer()
+# Para rotas que também aceitam o token fora do header `Authorization`
+optional_security = HTTPBearer(auto_error=False)
+
+# Cache dos resultados do auth-service, compartilhado entre as requisições
+token_cache = TokenCache(
+    ttl=AUTH_CACHE_TTL_SECONDS,
+    negative_ttl=AUTH_CACHE_NEGATIVE_TTL_SECONDS,
+    max_entries=AUTH_CACHE_MAX_ENTRIES,
+)
 
+# Chaves públicas usadas no modo de validação local
+signing_keys = SigningKeyStore(
+    jwks_url=AUTH_JWKS_URL,
+    key_file=AUTH_PUBLIC_KEY_FILE,
+    refresh_interval=AUTH_JWKS_REFRESH_SECONDS,
+    http_client=auth_client,
+)
 
-def authenticate_user(username: str, password: str):
+
+async def authenticate_user(username: str, password: str):
     """Autentica um usuário com o auth-service e retorna um token."""
-    url = f"{AUTH_SERVICE_URL}/token"
     try:
-        response = requests.post(
-            url,
+        response = await auth_async_client.post(
+            "/token",
             data={
                 "username": username,
                 "password": password
@@ -35,8 +74,8 @@ def authenticate_user(username: str, password: str):
             raise HTTPException(
                 status_code=HTTP_401_UNAUTHORIZED,
                 detail="Credenciais inválidas")
-    # except requests.RequestException as e:
-    except requests.RequestException:
+    # except httpx.HTTPError as e:
+    except httpx.HTTPError:
         logger.error(HTTPException(
             status_code=HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro ao conectar com o serviço de autenticação"))
@@ -45,36 +84,143 @@ def authenticate_user(username: str, password: str):
             detail="Erro ao conectar com o serviço de autenticação")
 
 
-def verify_token(token: str = Depends(security)) -> dict:
+def start_key_refresh() -> None:
+    """Carrega as chaves de assinatura quando a validação é local."""
+    if AUTH_VERIFICATION_MODE == "local":
+        signing_keys.start()
+
+
+def stop_key_refresh() -> None:
+    """Interrompe a recarga das chaves de assinatura."""
+    signing_keys.stop()
+
+
+def claims_to_user(claims: dict) -> dict:
     """
-    Valida o token JWT no auth-service e
-    retorna os detalhes do usuário autenticado.
+    Monta o dicionário de usuário esperado pelos roteadores a partir dos
+    claims do token.
+    """
+    user = dict(claims)
+    user_id = claims.get("id", claims.get("user_id", claims.get("sub")))
+    if isinstance(user_id, str) and user_id.isdigit():
+        user_id = int(user_id)
+    user["id"] = user_id
+    user.setdefault("username", claims.get("sub"))
+    return user
+
+
+def verify_token_locally(token_value: str) -> dict:
+    """Valida assinatura e expiração do JWT com as chaves em cache."""
+    try:
+        header = jwt.get_unverified_header(token_value)
+        key = signing_keys.get_key(header.get("kid"))
+        claims = jwt.decode(
+            token_value,
+            key=key,
+            algorithms=AUTH_JWT_ALGORITHMS,
+            audience=AUTH_JWT_AUDIENCE,
+            issuer=AUTH_JWT_ISSUER,
+            options={"verify_aud": AUTH_JWT_AUDIENCE is not None},
+        )
+    except SigningKeyError as e:
+        logger.error(f"Chave de assinatura indisponível: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Erro ao obter chaves de assinatura")
+    except jwt.PyJWTError:
+        logger.error("Token inválido ou expirado")
+        raise HTTPException(
+            status_code=401,
+            detail="Token inválido ou expirado"
+            )
+    return claims_to_user(claims)
+
+
+def signing_key_cached(token_value: str) -> bool:
+    """Indica se a chave do token já está em memória."""
+    try:
+        kid = jwt.get_unverified_header(token_value).get("kid")
+    except jwt.PyJWTError:
+        # Token malformado é recusado sem buscar chaves
+        return True
+    return signing_keys.has_key(kid)
+
+
+async def verify_token(token: str = Depends(security)) -> dict:
+    """
+    Valida o token JWT e retorna os detalhes do usuário autenticado.
+
+    No modo `local` a assinatura é conferida com as chaves públicas do
+    auth-service. No modo `remote` o token é validado no auth-service e o
+    resultado fica em `token_cache` para que chamadas repetidas com o mesmo
+    token não dependam de um novo round-trip.
     """
     if isinstance(token, str):
         token_value = token  # Token já é uma string vinda da URL
     else:
         token_value = token.credentials  # Token veio do `Authorization` Header
 
-    url = f"{AUTH_SERVICE_URL}/auth"
+    if AUTH_VERIFICATION_MODE == "local":
+        if signing_key_cached(token_value):
+            return verify_token_locally(token_value)
+        # Uma chave desconhecida força a recarga bloqueante do JWKS
+        return await run_in_threadpool(verify_token_locally, token_value)
+
+    cached = token_cache.get(token_value)
+    if cached is INVALID_TOKEN:
+        raise HTTPException(
+            status_code=401,
+            detail="Token inválido ou expirado"
+            )
+    if cached is not None:
+        return cached
+
     headers = {"Authorization": f"Bearer {token_value}"}
 
     try:
-        response = requests.get(url, headers=headers)
+        response = await auth_async_client.get("/auth", headers=headers)
         if response.status_code == 200:
-            logger.info(
-                f"Resposta do auth-service: "
-                f"{response.status_code} - {response.text}"
+            user = response.json()
+            request_logger.info(
+                "Token validado no auth-service para o usuário %s",
+                user.get("id"),
                 )
-            return response.json()
+            token_cache.set_user(token_value, user)
+            return user
         # Retorna os detalhes do usuário autenticado
         else:
             logger.error("Token inválido ou expirado")
+            if response.status_code == HTTP_401_UNAUTHORIZED:
+                token_cache.set_invalid(token_value)
             raise HTTPException(
                 status_code=401,
                 detail="Token inválido ou expirado"
                 )
-    except requests.RequestException:
+    except httpx.HTTPError:
         logger.error("Erro ao conectar com o auth-service")
         raise HTTPException(
             status_code=500,
             detail="Erro ao conectar com o auth-service")
+
+
+
+async def verify_stream_token(
+        credentials: Optional[HTTPAuthorizationCredentials] = Depends(
+            optional_security),
+        access_token: Optional[str] = Query(None)) -> dict:
+    """
+    Valida o token de rotas consumidas por `EventSource` no navegador.
+
+    O `EventSource` não envia headers, então o token pode vir no parâmetro
+    `access_token`; o header `Authorization`, se presente, tem precedência.
+    Os dois passam por `verify_token`, inclusive a checagem de expiração,
+    por isso o cliente deve usar um token de curta duração na URL.
+    """
+    if credentials is not None:
+        return await verify_token(credentials)
+    if access_token:
+        return await verify_token(access_token)
+    raise HTTPException(
+        status_code=HTTP_401_UNAUTHORIZED,
+        detail="Token não informado"
+        )
@@ -0,0 +1,97 @@
+"""
+Serialização das respostas de pedidos e do catálogo.
+
+Cada entidade tem um único serializador. Pedidos são montados como dicts a
+partir de linhas do ORM ou de tuplas do `RETURNING` e codificados pelo
+orjson; listas do catálogo, que já são schemas, vão direto para bytes pelo
+serializador do pydantic. As rotas de listagem devolvem esses bytes em uma
+`Response`, sem a nova validação do `response_model` (que continua
+documentando o formato no OpenAPI).
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from ..models import schemas
+
+PRODUCT_NOT_FOUND = "Produto não encontrado"
+
+# Datas em UTC terminam em "Z", como no serializador do pydantic
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+_products_adapter = TypeAdapter(List[schemas.ProductRead])
+_categories_adapter = TypeAdapter(List[schemas.CategoryRead])
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+class OrjsonResponse(JSONResponse):
+    """Resposta JSON padrão da aplicação, codificada pelo orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def order_item(item: Any) -> dict:
+    """Item de pedido no formato de `schemas.OrderItemRead`."""
+    return {
+        "product_id": item.product_id,
+        "quantity": item.quantity,
+        "id": item.id,
+        "name": item.product_name or PRODUCT_NOT_FOUND,
+        "price": float(item.unit_price or 0.0),
+        "product": None,
+    }
+
+
+def order(row: Any, items: Iterable[Any]) -> dict:
+    """
+    Pedido no formato de `schemas.OrderRead`.
+
+    `row` é um `models.Order` ou uma linha com as mesmas colunas; o total e
+    os preços são os gravados na criação do pedido. Valores vindos do
+    `RETURNING` podem chegar como inteiros no SQLite, por isso os campos
+    monetários são convertidos para `float`, como faria o `OrderRead`.
+    """
+    return {
+        "customer_id": row.customer_id,
+        "status": row.status,
+        "payment_status": row.payment_status,
+        "id": row.id,
+        "amount": _money(row.total_amount),
+        "qr_code": row.qr_code,
+        "payment_link": row.payment_link,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+        "items": [order_item(item) for item in items],
+    }
+
+
+def _money(value: Any) -> Any:
+    return None if value is None else float(value)
+
+
+def products_response(
+        products: Sequence[schemas.ProductRead],
+        headers: Optional[Dict[str, str]] = None) -> Response:
+    return _json_bytes(_products_adapter.dump_json(list(products)), headers)
+
+
+def categories_response(
+        categories: Sequence[schemas.CategoryRead],
+        headers: Optional[Dict[str, str]] = None) -> Response:
+    return _json_bytes(
+        _categories_adapter.dump_json(list(categories)), headers
+    )
+
+
+def _json_bytes(
+        body: bytes, headers: Optional[Dict[str, str]]) -> Response:
+    return Response(
+        content=body, media_type="application/json", headers=headers
+    )
@@ -0,0 +1,126 @@
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# Marcador usado para armazenar respostas 401 do auth-service
+INVALID_TOKEN = object()
+
+
+def hash_token(token: str) -> str:
+    """Gera a chave do cache a partir do token, sem guardá-lo em claro."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def token_expiration(token: str) -> Optional[float]:
+    """
+    Lê o claim `exp` do payload do JWT sem validar a assinatura.
+
+    A validação continua sendo responsabilidade do auth-service; o valor é
+    usado apenas para não manter no cache um token que já expirou.
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        exp = claims.get("exp")
+        return float(exp) if exp is not None else None
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return None
+
+
+class TokenCache:
+    """
+    Cache LRU com TTL para os resultados de `verify_token`.
+
+    As entradas válidas expiram no menor valor entre o TTL configurado e o
+    `exp` do token. Respostas 401 ficam armazenadas por um TTL curto para
+    evitar que tokens inválidos repetidos cheguem ao auth-service.
+    """
+
+    def __init__(
+            self,
+            ttl: float = 60.0,
+            negative_ttl: float = 5.0,
+            max_entries: int = 10000) -> None:
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, object]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token: str) -> Optional[object]:
+        """
+        Retorna o usuário em cache, `INVALID_TOKEN` para um 401 em cache ou
+        `None` quando o token não está no cache.
+        """
+        key = hash_token(token)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set_user(self, token: str, user: dict) -> None:
+        """Armazena o usuário autenticado até o token ou o TTL expirar."""
+        ttl = self.ttl
+        exp = token_expiration(token)
+        if exp is not None:
+            ttl = min(ttl, exp - time.time())
+        if ttl <= 0:
+            return
+        self._store(token, user, ttl)
+
+    def set_invalid(self, token: str) -> None:
+        """Armazena uma resposta 401 pelo TTL negativo."""
+        if self.negative_ttl > 0:
+            self._store(token, INVALID_TOKEN, self.negative_ttl)
+
+    def invalidate(self, token: str) -> bool:
+        """Remove um token do cache. Retorna `True` se ele estava presente."""
+        with self._lock:
+            return self._entries.pop(hash_token(token), None) is not None
+
+    def clear(self) -> None:
+        """Remove todas as entradas e zera os contadores."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Retorna os contadores de uso do cache."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _store(self, token: str, value: object, ttl: float) -> None:
+        key = hash_token(token)
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
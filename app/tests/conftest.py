@@ -0,0 +1,110 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import httpx
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from ..services.http_clients import auth_async_client, payment_async_client
+
+
+class FakeUpstream:
+    """
+    Serviço externo falso, atendido em memória pelo transporte do httpx.
+
+    As rotas respondem com o status e o JSON (ou o corpo bruto `content`)
+    configurados, opcionalmente após um atraso, e as requisições recebidas
+    ficam em `requests`.
+    """
+
+    def __init__(self) -> None:
+        self.routes: Dict[Tuple[str, str], dict] = {}
+        self.requests: List[httpx.Request] = []
+        self.transport = httpx.MockTransport(self.handle)
+
+    def route(
+            self,
+            method: str,
+            path: str,
+            status_code: int = 200,
+            json: Optional[object] = None,
+            delay: float = 0.0,
+            error: Optional[Exception] = None,
+            content: Optional[bytes] = None) -> None:
+        self.routes[(method, path)] = {
+            "status_code": status_code,
+            "json": json,
+            "content": content,
+            "delay": delay,
+            "error": error,
+        }
+
+    def calls(self, method: str, path: str) -> int:
+        return sum(
+            1 for request in self.requests
+            if request.method == method and request.url.path == path
+        )
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        route = self.routes.get((request.method, request.url.path))
+        if route is None:
+            return httpx.Response(404, json={"detail": "Not Found"})
+        if route["delay"]:
+            await asyncio.sleep(route["delay"])
+        if route["error"] is not None:
+            raise route["error"]
+        if route["content"] is not None:
+            return httpx.Response(
+                route["status_code"], content=route["content"]
+            )
+        return httpx.Response(route["status_code"], json=route["json"])
+
+
+def _install(client, fake: FakeUpstream):
+    base_url = client.base_url
+    client.base_url = f"http://{client.name}.test"
+    asyncio.run(client.use_transport(fake.transport))
+    yield fake
+    asyncio.run(client.use_transport(None))
+    client.base_url = base_url
+
+
+@pytest.fixture
+def fake_auth_service():
+    """Substitui o auth-service por um `FakeUpstream`."""
+    yield from _install(auth_async_client, FakeUpstream())
+
+
+@pytest.fixture
+def fake_payment_service():
+    """Substitui o payment-service por um `FakeUpstream`."""
+    yield from _install(payment_async_client, FakeUpstream())
+
+
+@pytest.fixture
+def assert_max_queries():
+    """
+    Falha o teste se o bloco executar mais de `limit` consultas SQL.
+
+        with assert_max_queries(2) as statements:
+            repository.get_orders(db)
+    """
+    @contextmanager
+    def check(limit: int):
+        statements: List[str] = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", count)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, "before_cursor_execute", count)
+        assert len(statements) <= limit, (
+            f"{len(statements)} consultas (máximo {limit}):\n"
+            + "\n".join(statements)
+        )
+
+    return check
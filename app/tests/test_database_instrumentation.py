@@ -0,0 +1,68 @@
+import logging
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from ..database.instrumentation import install, track_queries
+from ..middleware import RequestMiddleware
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+install()
+
+app = FastAPI()
+app.add_middleware(
+    RequestMiddleware, sql_instrumentation=True, repeat_threshold=3
+)
+
+
+@app.get("/items")
+def get_items(n: int = 1):
+    # Rota síncrona: as consultas rodam no threadpool
+    with engine.connect() as conn:
+        for index in range(n):
+            conn.execute(text("SELECT :index"), {"index": index})
+    return {"n": n}
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+client = TestClient(app)
+
+
+def test_queries_are_reported_in_server_timing():
+    response = client.get("/items", params={"n": 2})
+
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith("app;dur=")
+    assert ", db;dur=" in timing
+    assert timing.endswith('desc="2 queries"')
+    assert "db;" not in client.get("/health").headers["Server-Timing"]
+
+
+def test_repeated_statement_is_flagged(caplog):
+    with caplog.at_level(logging.WARNING, logger="Application"):
+        client.get("/items", params={"n": 3})
+        client.get("/items", params={"n": 4})
+
+    warnings = [r for r in caplog.records if "N+1" in r.getMessage()]
+    assert len(warnings) == 1
+    assert "GET /items" in warnings[0].getMessage()
+    assert warnings[0].db_queries == 4
+
+
+def test_queries_outside_tracking_are_ignored():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with track_queries() as stats:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+
+    assert stats.count == 2
+    assert stats.repeated(threshold=0) == [("SELECT 1", 1), ("SELECT 2", 1)]
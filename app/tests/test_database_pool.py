@@ -0,0 +1,77 @@
+import threading
+import pytest
+from sqlalchemy import create_engine, exc, text
+from ..database import pool
+from ..database.pool import InstrumentedQueuePool, instrument_pool
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    yield engine
+    engine.dispose()
+    pool.pool_metrics.pop("test", None)
+
+
+def test_pool_metrics_track_usage(engine):
+    metrics = instrument_pool("test", engine.pool)
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        in_use = metrics.stats()["in_use"]
+
+    stats = metrics.stats()
+    assert in_use == 1
+    assert stats["in_use"] == 0
+    assert stats["checkouts"] == stats["checkins"] == 1
+    assert stats["connections_created"] == 1
+    assert stats["wait_buckets"][5.0] == 1
+    assert pool.pool_stats()["test"]["size"] == 1
+
+
+def test_pool_metrics_count_timeouts(engine):
+    metrics = instrument_pool("test", engine.pool)
+    held = engine.connect()
+    errors = []
+
+    def checkout():
+        try:
+            engine.connect()
+        except exc.TimeoutError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=checkout)
+    thread.start()
+    thread.join()
+    held.close()
+
+    assert len(errors) == 1
+    assert metrics.stats()["timeouts"] == 1
+
+
+def test_metrics_survive_pool_recreate(engine):
+    metrics = instrument_pool("test", engine.pool)
+    engine.dispose()
+
+    with engine.connect():
+        pass
+
+    assert engine.pool.metrics is metrics
+    assert metrics.stats()["checkouts"] == 1
+
+
+def test_pool_options(monkeypatch):
+    assert pool.pool_options("sqlite://") == {}
+
+    monkeypatch.setattr(pool, "DB_PGBOUNCER_MODE", True)
+    options = pool.pool_options("postgresql://db/orders", async_mode=True)
+    assert options["poolclass"] is pool.InstrumentedAsyncQueuePool
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"]["statement_cache_size"] == 0
+    assert "connect_args" not in pool.pool_options("postgresql://db/orders")
@@ -0,0 +1,112 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from ..database.database import Base
+from ..database.replicas import (
+    READ_ONLY, Replica, ReplicaRouter, RoutingSession, use_primary
+)
+from ..models import models
+from ..services import repository
+
+
+@pytest.fixture
+def databases(tmp_path):
+    """Primário e duas réplicas em arquivos SQLite distintos."""
+    replicas = [
+        Replica(f"test_replica_{index}", f"sqlite:///{tmp_path}/r{index}.db")
+        for index in range(2)
+    ]
+    router = ReplicaRouter(replicas, max_lag=5.0)
+    primary = Replica("test_primary", f"sqlite:///{tmp_path}/primary.db").bind
+    for index, bind in enumerate([primary] + [r.bind for r in replicas]):
+        Base.metadata.create_all(bind=bind)
+        with bind.begin() as conn:
+            conn.execute(models.Category.__table__.insert(), [
+                {"id": 1, "name": f"banco {index}", "enabled": True}
+            ])
+    factory = sessionmaker(
+        class_=RoutingSession, router=router, bind=primary, autoflush=False
+    )
+    yield factory, router
+    for bind in [primary] + [r.bind for r in replicas]:
+        bind.dispose()
+
+
+def _source(db) -> str:
+    return db.get(models.Category, 1).name
+
+
+def test_read_only_sessions_rotate_between_replicas(databases):
+    factory, router = databases
+    sources = []
+    for _ in range(4):
+        with factory(info={READ_ONLY: True}) as db:
+            # A réplica é escolhida uma vez por sessão
+            assert _source(db) == _source(db)
+            sources.append(_source(db))
+
+    assert sources == ["banco 1", "banco 2", "banco 1", "banco 2"]
+    assert router.stats()["routed"] == 4
+
+
+def test_writes_and_regular_sessions_use_primary(databases):
+    factory, _ = databases
+    with factory() as db:
+        assert _source(db) == "banco 0"
+
+    with factory(info={READ_ONLY: True}) as db:
+        db.add(models.Category(id=2, name="Nova", enabled=True))
+        db.commit()
+        with use_primary(db):
+            assert db.get(models.Category, 2).name == "Nova"
+
+    with factory() as db:
+        assert db.query(models.Category).count() == 2
+
+
+def test_unhealthy_or_lagging_replicas_fall_back_to_primary(databases):
+    factory, router = databases
+    first, second = router.replicas
+    first.health_engine = create_engine(
+        "sqlite:////nonexistent/dir/replica.db", poolclass=NullPool
+    )
+    router.check()
+
+    assert not first.healthy
+    with factory(info={READ_ONLY: True}) as db:
+        assert _source(db) == "banco 2"
+
+    second.lag = 30.0
+    with factory(info={READ_ONLY: True}) as db:
+        assert _source(db) == "banco 0"
+    assert router.stats()["fallbacks"] == 1
+
+    router.check()
+    assert second.lag == 0.0
+    assert router.stats()["replicas"]["test_replica_0"]["checks_failed"] == 2
+
+
+def test_without_replicas_reads_are_not_fallbacks():
+    router = ReplicaRouter([])
+
+    assert router.pick() is None
+    assert router.stats()["fallbacks"] == 0
+
+
+def test_order_etag_reads_go_to_primary(databases):
+    factory, _ = databases
+    with factory() as db:
+        db.add(models.Order(
+            id=1, customer_id=1, updated_at=datetime(2024, 5, 1, 12, 5)
+        ))
+        db.commit()
+
+    # Nas réplicas o pedido ainda não existe
+    with factory(info={READ_ONLY: True}) as db:
+        assert repository.get_order_updated_at(db, 1) == datetime(
+            2024, 5, 1, 12, 5)
+        assert repository.get_order(db, 1)["updated_at"] == datetime(
+            2024, 5, 1, 12, 5)
+        assert db.info[READ_ONLY] is True
@@ -3,9 +3,12 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from ..main import app
+from ..services.security import verify_token
 import os
 from dotenv import load_dotenv
-from ..database.database import Base, get_db
+from ..database.database import (
+    Base, get_async_db, get_async_read_db, get_db
+)
 
 # Carregar .env.test
 load_dotenv(".env.test")
@@ -33,6 +36,8 @@ def override_get_db():
 
 # Substituir a dependência `get_db` pelo banco de testes
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_db
+app.dependency_overrides[get_async_read_db] = override_get_db
 
 client = TestClient(app)
 
@@ -48,3 +53,34 @@ def setup_database():
     Base.metadata.create_all(bind=engine)
     yield
     Base.metadata.drop_all(bind=engine)
+
+
+def test_menu_is_served_without_redirect(monkeypatch):
+    monkeypatch.setitem(
+        app.dependency_overrides, verify_token, lambda: {"id": 1}
+    )
+
+    response = client.get(
+        "/menu", headers=AUTH_HEADERS, follow_redirects=False
+    )
+
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert client.get(
+        "/menu", headers={**AUTH_HEADERS, "If-None-Match": etag},
+        follow_redirects=False,
+    ).status_code == 304
+
+
+def test_cors_exposes_cursor_and_etag_headers(monkeypatch):
+    monkeypatch.setitem(
+        app.dependency_overrides, verify_token, lambda: {"id": 1}
+    )
+
+    response = client.get(
+        "/menu", headers={**AUTH_HEADERS, "Origin": "http://localhost"}
+    )
+
+    exposed = response.headers["Access-Control-Expose-Headers"]
+    assert "X-Next-Cursor" in exposed
+    assert "ETag" in exposed
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from ..middleware import RequestMiddleware
+from ..services.http_clients import payment_async_client
+from ..tools.logging import request_id
+
+app = FastAPI()
+app.add_middleware(RequestMiddleware, sql_instrumentation=False)
+
+
+@app.get("/whoami")
+async def whoami():
+    return {"request_id": request_id.get()}
+
+
+@app.get("/pay")
+async def pay():
+    response = await payment_async_client.post("/payment")
+    return response.json()
+
+
+@app.get("/boom")
+async def boom():
+    raise RuntimeError("falhou")
+
+
+client = TestClient(app, raise_server_exceptions=False)
+
+
+def test_request_id_is_generated_and_returned():
+    response = client.get("/whoami")
+
+    assert response.headers["X-Request-ID"] == response.json()["request_id"]
+    assert len(response.headers["X-Request-ID"]) == 32
+    assert response.headers["Server-Timing"].startswith("app;dur=")
+
+
+@pytest.mark.parametrize("incoming, kept", [
+    ("pedido-123", True),
+    ("inválido com espaços", False),
+])
+def test_incoming_request_id_is_validated(incoming, kept):
+    response = client.get(
+        "/whoami", headers={"X-Request-ID": incoming.encode("utf-8")}
+    )
+
+    assert (response.json()["request_id"] == incoming) is kept
+
+
+def test_request_id_is_propagated_to_upstreams(fake_payment_service):
+    fake_payment_service.route("POST", "/payment", json={"ok": True})
+
+    client.get("/pay", headers={"X-Request-ID": "pedido-456"})
+
+    sent = fake_payment_service.requests[-1]
+    assert sent.headers["X-Request-ID"] == "pedido-456"
+    # Fora de uma requisição, nenhum ID é enviado
+    asyncio.run(payment_async_client.post("/payment"))
+    assert "X-Request-ID" not in fake_payment_service.requests[-1].headers
+
+
+def test_unhandled_errors_are_logged_with_request_id(caplog):
+    with caplog.at_level(logging.ERROR, logger="Application"):
+        response = client.get("/boom", headers={"X-Request-ID": "abc"})
+
+    assert response.status_code == 500
+    record = next(r for r in caplog.records if "Erro Não Tratado" in r.msg)
+    assert "falhou" in record.getMessage()
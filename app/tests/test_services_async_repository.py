@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from ..database.database import Base, async_database_url
+from ..models import models, schemas
+from ..services import async_repository
+from ..services.catalog_cache import catalog_cache
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add(models.Category(id=1, name="Lanches", enabled=True))
+        db.add(models.Product(id=1, name="X-Burger", price=12.0,
+                              category_id=1, enabled=True))
+        db.commit()
+    catalog_cache.clear()
+    yield url
+    catalog_cache.clear()
+    engine.dispose()
+
+
+async def create_and_list(db):
+    created = await async_repository.create_product(
+        db, schemas.ProductCreate(
+            name="Suco", price=7.0, category_id=1, enabled=True
+        )
+    )
+    products = await async_repository.get_products(db, category_id=1)
+    return created, products
+
+
+def test_async_session_runs_repository(database_url):
+    async def scenario():
+        engine = create_async_engine(async_database_url(database_url))
+        try:
+            async with async_sessionmaker(engine)() as db:
+                return await create_and_list(db)
+        finally:
+            await engine.dispose()
+
+    created, products = asyncio.run(scenario())
+
+    assert created.category.name == "Lanches"
+    assert [p.name for p in products] == ["X-Burger", "Suco"]
+
+
+def test_sync_session_runs_in_threadpool(database_url):
+    engine = create_engine(database_url)
+
+    async def scenario():
+        with sessionmaker(bind=engine)() as db:
+            return await create_and_list(db)
+
+    created, products = asyncio.run(scenario())
+    engine.dispose()
+
+    assert created.id == 2
+    assert [p.id for p in products] == [1, 2]
+
+
+def test_async_database_url():
+    assert async_database_url(
+        "postgresql://user:secret@db:5432/orders"
+    ) == "postgresql+asyncpg://user:secret@db:5432/orders"
+    assert async_database_url(
+        "postgresql+psycopg2://db/orders"
+    ) == "postgresql+asyncpg://db/orders"
+    assert async_database_url("sqlite:///./test.db") == (
+        "sqlite+aiosqlite:///./test.db"
+    )
@@ -0,0 +1,202 @@
+import json
+import pytest
+from sqlalchemy import create_engine, event, true
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from ..database.database import Base
+from ..models import models, schemas
+from ..services.http_cache import etag_matches
+from ..services import pagination, repository
+from ..services.catalog_cache import catalog_cache
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine)
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    db.add_all([
+        models.Category(id=1, name="Lanches", enabled=True),
+        models.Category(id=2, name="Bebidas", enabled=True),
+        models.Category(id=3, name="Antigos", enabled=False),
+    ])
+    db.add_all([
+        models.Product(id=1, name="X-Burger", price=12.0,
+                       category_id=1, enabled=True),
+        models.Product(id=2, name="Refrigerante", price=5.5,
+                       category_id=2, enabled=True),
+        models.Product(id=3, name="Sazonal", price=9.0,
+                       category_id=1, enabled=False),
+        models.Product(id=4, name="X-Salada", price=14.0,
+                       category_id=1, enabled=True),
+    ])
+    db.commit()
+    catalog_cache.clear()
+    catalog_cache.load(db)
+    yield db
+    catalog_cache.clear()
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def statements():
+    executed = []
+
+    def count(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield executed
+    event.remove(engine, "before_cursor_execute", count)
+
+
+def test_reads_are_served_without_queries(db, statements):
+    products = repository.get_products(db, limit=10)
+    by_category = repository.get_products(db, category_id=1, limit=10)
+    categories = repository.get_categories(db, limit=10)
+    product = repository.get_product(db, 3)
+
+    assert statements == []
+    assert [p.id for p in products] == [1, 2, 4]
+    assert [p.id for p in by_category] == [1, 4]
+    assert [c.id for c in categories] == [1, 2]
+    assert product.name == "Sazonal"
+    assert product.category.name == "Lanches"
+    assert repository.get_category(db, 99) is None
+    assert catalog_cache.stats()["hits"] == 5
+
+
+def test_cursor_pages_from_snapshot(db):
+    first = repository.get_products(db, limit=2, cursor="")
+    cursor = pagination.encode_cursor(first[-1].id)
+    second = repository.get_products(db, limit=2, cursor=cursor)
+
+    assert [p.id for p in first] == [1, 2]
+    assert [p.id for p in second] == [4]
+
+
+def test_product_writes_patch_snapshot(db):
+    version = catalog_cache.stats()["version"]
+    created = repository.create_product(db, schemas.ProductCreate(
+        name="Suco", price=7.0, category_id=2, enabled=True
+    ))
+    repository.update_product(
+        db, 1, schemas.ProductUpdate(enabled=False)
+    )
+
+    assert [p.id for p in repository.get_products(db, category_id=2)] == [
+        2, created.id
+    ]
+    assert [p.id for p in repository.get_products(db, category_id=1)] == [4]
+    assert catalog_cache.stats()["version"] == version + 2
+    assert catalog_cache.stats()["reloads"] == 1
+
+
+def test_category_update_is_reflected_in_products(db):
+    repository.update_category(
+        db, 1, schemas.CategoryUpdate(name="Sanduíches")
+    )
+
+    assert repository.get_category(db, 1).name == "Sanduíches"
+    assert repository.get_product(db, 4).category.name == "Sanduíches"
+
+
+def test_expired_snapshot_is_reloaded(db, monkeypatch):
+    db.add(models.Product(id=5, name="Água", price=3.0,
+                          category_id=2, enabled=True))
+    db.commit()
+    assert repository.get_product(db, 5) is None
+
+    monkeypatch.setattr(catalog_cache, "ttl", 0.000001)
+    assert repository.get_product(db, 5).name == "Água"
+    assert catalog_cache.stats()["misses"] == 1
+
+
+def test_menu_is_serialized_once_per_version(db):
+    menu = catalog_cache.menu(db)
+    body = json.loads(menu.body)
+
+    assert [c["id"] for c in body] == [1, 2]
+    assert [p["id"] for p in body[0]["products"]] == [1, 4]
+    assert catalog_cache.menu(db) is menu
+
+    repository.update_product(db, 2, schemas.ProductUpdate(price=6.0))
+    updated = catalog_cache.menu(db)
+    assert updated.etag != menu.etag
+    assert json.loads(updated.body)[1]["products"][0]["price"] == 6.0
+    assert catalog_cache.stats()["menu_builds"] == 2
+
+
+def test_catalog_etag_follows_content(db):
+    def current_etag():
+        return catalog_cache.etag(catalog_cache.snapshot(db))
+
+    etag = current_etag()
+
+    assert etag.startswith('W/"')
+    assert current_etag() == etag
+    catalog_cache.invalidate()
+    assert current_etag() == etag
+
+    repository.update_product(db, 2, schemas.ProductUpdate(price=6.0))
+    assert current_etag() != etag
+
+
+def test_etag_and_page_come_from_the_same_snapshot(db):
+    snapshot = catalog_cache.snapshot(db)
+    etag = catalog_cache.etag(snapshot)
+
+    repository.update_product(db, 2, schemas.ProductUpdate(price=6.0))
+
+    # A página montada com o snapshot da ETag não mistura a nova versão
+    product = repository.get_product(db, 2, snapshot=snapshot)
+    assert product == snapshot.products[2]
+    assert catalog_cache.etag(snapshot) == etag
+    assert repository.get_product(db, 2).price == 6.0
+
+
+def test_etag_matching():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert etag_matches('"abc"', 'W/"abc"')
+    assert not etag_matches('"x"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_sql_path_filters_enabled_rows(db, statements, monkeypatch):
+    monkeypatch.setattr(catalog_cache, "enabled", False)
+
+    products = repository.get_products(db, category_id=1, limit=10)
+    categories = repository.get_categories(db, limit=10)
+
+    assert [p.id for p in products] == [1, 4]
+    assert [c.id for c in categories] == [1, 2]
+    assert "products.enabled = 1" in statements[0]
+    assert "categories.enabled = 1" in statements[-1]
+
+
+def test_enabled_predicate_matches_partial_indexes():
+    predicate = (models.Product.enabled == true()).compile(
+        dialect=postgresql.dialect()
+    )
+    indexes = {
+        index.name: index for index in models.Product.__table__.indexes
+    }
+
+    assert str(predicate) == "products.enabled = true"
+    assert str(
+        indexes["ix_products_active_category_id_id"]
+        .dialect_options["postgresql"]["where"]
+    ) == "enabled"
@@ -0,0 +1,118 @@
+import asyncio
+from unittest.mock import patch
+import pytest
+from ..services.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+)
+
+
+def make_breaker(**kwargs):
+    options = {"window_size": 4, "minimum_calls": 4, "cooldown": 30}
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+def test_breaker_opens_when_failure_rate_reached():
+    breaker = make_breaker()
+    for result in (True, False, True, False):
+        breaker.before_call()
+        breaker.record_success() if result else breaker.record_failure()
+
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_breaker_needs_minimum_calls():
+    breaker = make_breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_breaker_half_open_after_cooldown():
+    breaker = make_breaker()
+    with patch("app.services.circuit_breaker.time.monotonic") as clock:
+        clock.return_value = 100.0
+        for _ in range(4):
+            breaker.record_failure()
+        assert breaker.state == CircuitState.OPEN
+
+        clock.return_value = 131.0
+        assert breaker.state == CircuitState.HALF_OPEN
+        breaker.before_call()
+        # Apenas uma chamada de teste por vez no estado semiaberto
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        breaker.record_success()
+        assert breaker.state == CircuitState.CLOSED
+
+
+def test_breaker_reopens_when_probe_fails():
+    breaker = make_breaker()
+    with patch("app.services.circuit_breaker.time.monotonic") as clock:
+        clock.return_value = 100.0
+        for _ in range(4):
+            breaker.record_failure()
+        clock.return_value = 131.0
+        breaker.before_call()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.retry_after() == pytest.approx(30)
+
+
+def test_cancelled_probe_releases_half_open_slot():
+    breaker = make_breaker()
+    with patch("app.services.circuit_breaker.time.monotonic") as clock:
+        clock.return_value = 100.0
+        for _ in range(4):
+            breaker.record_failure()
+        clock.return_value = 131.0
+
+        async def probe(started):
+            with breaker.call():
+                started.set()
+                await asyncio.sleep(10)
+
+        async def scenario():
+            started = asyncio.Event()
+            task = asyncio.create_task(probe(started))
+            await started.wait()
+            with pytest.raises(CircuitOpenError):
+                breaker.before_call()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(scenario())
+
+        # A vaga voltou: uma nova chamada de teste pode fechar o circuito
+        assert breaker.state == CircuitState.HALF_OPEN
+        with breaker.call():
+            breaker.record_success()
+        assert breaker.state == CircuitState.CLOSED
+
+
+def test_recorded_probe_does_not_release_a_newer_slot():
+    breaker = make_breaker()
+    with patch("app.services.circuit_breaker.time.monotonic") as clock:
+        clock.return_value = 100.0
+        for _ in range(4):
+            breaker.record_failure()
+        clock.return_value = 131.0
+
+        old_probe = breaker.call()
+        old_probe.__enter__()
+        breaker.record_failure()
+        clock.return_value = 162.0
+        breaker.before_call()
+        # A chamada antiga termina depois que a nova reservou a vaga
+        old_probe.__exit__(None, None, None)
+
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
@@ -0,0 +1,83 @@
+import asyncio
+from unittest.mock import patch
+import httpx
+import pytest
+import requests
+from ..services.http_clients import AsyncUpstreamClient, UpstreamClient
+
+
+def test_client_reuses_session_and_applies_timeouts():
+    client = UpstreamClient(
+        "test", "http://upstream", pool_size=5,
+        connect_timeout=0.5, read_timeout=1.5)
+    session = client.open()
+
+    with patch("requests.Session.get") as mock_get:
+        client.get("/auth")
+        client.get("/auth")
+
+    assert client.session is session
+    mock_get.assert_called_with("http://upstream/auth", timeout=(0.5, 1.5))
+    assert client.stats()["requests_total"] == 2
+    assert client.stats()["in_flight"] == 0
+    client.close()
+
+
+def test_client_counts_errors():
+    client = UpstreamClient("test", "http://upstream")
+
+    with patch("requests.Session.post") as mock_post:
+        mock_post.side_effect = requests.ConnectionError
+        with pytest.raises(requests.RequestException):
+            client.post("/payments/", json={})
+
+    assert client.stats()["errors_total"] == 1
+    client.close()
+
+
+def test_async_client_reuses_client_and_enforces_deadline():
+    async def handler(request):
+        if request.url.path == "/slow":
+            await asyncio.sleep(1)
+        return httpx.Response(200, json={"path": request.url.path})
+
+    client = AsyncUpstreamClient(
+        "test", "http://upstream", deadline=0.05,
+        transport=httpx.MockTransport(handler))
+
+    async def scenario():
+        first = client.client
+        response = await client.get("/fast")
+        assert client.client is first
+        with pytest.raises(httpx.TimeoutException):
+            await client.get("/slow")
+        response_with_deadline = await client.get("/fast", deadline=1)
+        await client.aclose()
+        return response, response_with_deadline
+
+    response, response_with_deadline = asyncio.run(scenario())
+
+    assert response.json() == {"path": "/fast"}
+    assert response_with_deadline.status_code == 200
+    assert client.stats()["requests_total"] == 3
+    assert client.stats()["deadlines_exceeded"] == 1
+    assert client.stats()["in_flight"] == 0
+
+
+def test_switching_transport_closes_previous_client():
+    client = AsyncUpstreamClient(
+        "test", "http://upstream",
+        transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+
+    async def scenario():
+        previous = client.client
+        await client.use_transport(
+            httpx.MockTransport(lambda request: httpx.Response(204)))
+        response = await client.get("/")
+        await client.aclose()
+        return previous, response
+
+    previous, response = asyncio.run(scenario())
+
+    assert previous.is_closed
+    assert response.status_code == 204
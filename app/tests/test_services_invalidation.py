@@ -0,0 +1,107 @@
+import json
+import threading
+from unittest.mock import MagicMock
+from ..services.catalog_cache import CatalogCache
+from ..services.invalidation import (
+    ALL,
+    InvalidationBus,
+    InvalidationEvent,
+    PostgresInvalidationBus,
+)
+
+
+def remote_event(entity, entity_id=1):
+    return InvalidationEvent(entity, entity_id, 1, "outra-replica")
+
+
+def test_local_bus_delivers_to_subscribers():
+    bus = InvalidationBus()
+    received = []
+    bus.subscribe(["order"], received.append)
+    bus.subscribe(["order"], received.append)
+
+    first = bus.publish("order", 10, {"status": "paid"})
+    second = bus.publish("product", 3)
+
+    assert received == [first]
+    assert first.data == {"status": "paid"}
+    assert second.version == first.version + 1
+    assert bus.stats()["published"] == 2
+
+
+def test_wildcard_event_reaches_every_handler_once():
+    bus = InvalidationBus()
+    received = []
+    bus.subscribe(["product", "category"], received.append)
+
+    bus.deliver(InvalidationEvent(ALL, None, 0, "listener"))
+
+    assert len(received) == 1
+
+
+def test_handler_errors_are_isolated():
+    bus = InvalidationBus()
+    received = []
+    bus.subscribe(["product"], MagicMock(side_effect=RuntimeError("x")))
+    bus.subscribe(["product"], received.append)
+
+    bus.publish("product", 1)
+
+    assert len(received) == 1
+    assert bus.stats()["handler_errors"] == 1
+
+
+def test_catalog_ignores_own_events_and_drops_on_remote():
+    bus = InvalidationBus()
+    cache = CatalogCache()
+    cache._snapshot = MagicMock()
+    bus.subscribe(["product"], cache.on_invalidation)
+
+    bus.publish("product", 1)
+    assert cache.stats()["invalidations"] == 0
+
+    bus.deliver(remote_event("product"))
+    assert cache.stats()["invalidations"] == 1
+    assert cache.stats()["loaded"] is False
+
+
+def test_postgres_bus_notifies_and_parses_payload():
+    engine = MagicMock()
+    conn = engine.connect.return_value.__enter__.return_value
+    bus = PostgresInvalidationBus(engine, "canal")
+    received = []
+    bus.subscribe(["category"], received.append)
+
+    event = bus.publish("category", 2)
+    params = conn.execute.call_args.args[1]
+    assert params["channel"] == "canal"
+    assert received == []
+
+    bus._receive(params["payload"])
+    bus._receive("não é json")
+    assert received == [event]
+    assert json.loads(params["payload"])["entity"] == "category"
+
+
+def test_postgres_bus_publishes_without_waiting_for_the_database():
+    engine = MagicMock()
+    conn = engine.connect.return_value.__enter__.return_value
+    released = threading.Event()
+    conn.commit.side_effect = lambda: released.wait(5)
+    bus = PostgresInvalidationBus(engine, "canal")
+    bus._start_publisher()
+
+    # O primeiro envio fica preso no banco; os seguintes só enfileiram
+    bus.publish("order", 1)
+    bus.publish("order", 2)
+    bus.publish("product", 3)
+    assert conn.commit.call_count <= 1
+    released.set()
+    bus.stop()
+
+    payloads = [
+        json.loads(call.args[1]["payload"])
+        for call in conn.execute.call_args_list
+    ]
+    assert [p["entity_id"] for p in payloads] == [1, 2, 3]
+    assert bus.stats()["publish_pending"] == 0
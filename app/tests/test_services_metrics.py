@@ -0,0 +1,73 @@
+import asyncio
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from ..middleware import RequestMiddleware
+from ..routers import metrics
+from ..services.http_clients import AsyncUpstreamClient
+from ..services.metrics import Exposition, Histogram, request_metrics
+
+app = FastAPI()
+app.add_middleware(RequestMiddleware)
+app.include_router(metrics.router)
+
+
+@app.get("/items/{item_id}")
+async def get_item(item_id: int):
+    return {"id": item_id}
+
+
+client = TestClient(app)
+
+
+def test_histogram_is_rendered_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(seconds)
+    exposition = Exposition()
+    exposition.histogram("latency_seconds", histogram, {"route": "/x"})
+
+    assert exposition.render().splitlines() == [
+        'latency_seconds_bucket{route="/x",le="0.1"} 2',
+        'latency_seconds_bucket{route="/x",le="1"} 3',
+        'latency_seconds_bucket{route="/x",le="+Inf"} 4',
+        'latency_seconds_sum{route="/x"} 3.65',
+        'latency_seconds_count{route="/x"} 4',
+    ]
+
+
+def test_requests_are_grouped_by_route_template():
+    request_metrics.clear()
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/items/abc")
+    client.get("/unknown/path")
+
+    body = client.get("/metrics").text
+
+    assert (
+        'http_requests_total{method="GET",route="/items/{item_id}",'
+        'status="200"} 2'
+    ) in body
+    assert (
+        'http_requests_total{method="GET",route="/items/{item_id}",'
+        'status="422"} 1'
+    ) in body
+    assert (
+        'http_requests_total{method="GET",route="unmatched",'
+        'status="404"} 1'
+    ) in body
+    assert '/unknown/path' not in body
+    assert 'http_requests_in_flight{method="GET"} 1' in body
+    assert "threadpool_queue_depth 0" in body
+
+
+def test_upstream_latency_is_recorded():
+    transport = httpx.MockTransport(lambda request: httpx.Response(200))
+    upstream = AsyncUpstreamClient(
+        "test", "http://upstream", transport=transport)
+
+    asyncio.run(upstream.get("/ok"))
+
+    assert upstream.latency.count == 1
+    assert upstream.latency.cumulative()[-1] == ("+Inf", 1)
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import threading
+from datetime import datetime
+
+import pytest
+
+from ..services import repository
+from ..services.invalidation import ALL, InvalidationBus, InvalidationEvent
+from ..services.order_stream import (
+    OrderBroadcaster,
+    OrderFilter,
+    TooManySubscribers,
+    stream_events,
+)
+
+
+def change(order_id=1, customer_id=10, status="paid"):
+    return {
+        "id": order_id,
+        "customer_id": customer_id,
+        "status": status,
+        "payment_status": "awaiting_payment",
+        "updated_at": "2024-05-01T12:00:00",
+    }
+
+
+def parse(chunks):
+    """Eventos (`event`, `data`) de um corpo `text/event-stream`."""
+    events = []
+    for block in b"".join(chunks).decode().split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines()
+            if not line.startswith(":")
+        )
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_filters_match_order_fields():
+    assert OrderFilter().matches(change())
+    assert OrderFilter(customer_id=10, status="paid").matches(change())
+    assert OrderFilter(order_id=1).matches(change())
+    assert not OrderFilter(order_id=2).matches(change())
+    assert not OrderFilter(customer_id=11).matches(change())
+    assert not OrderFilter(payment_status="pending").matches(change())
+
+
+async def collect(stream, after_subscribe=None):
+    """Lê o stream; `after_subscribe` roda quando a inscrição já existe."""
+    chunks = [await stream.__anext__()]
+    if after_subscribe is not None:
+        after_subscribe()
+    return chunks + [chunk async for chunk in stream]
+
+
+def test_changes_published_from_other_threads_reach_matching_streams():
+    bus = InvalidationBus()
+    broadcaster = OrderBroadcaster()
+    bus.subscribe(["order"], broadcaster.on_invalidation)
+
+    async def scenario():
+        other = broadcaster.subscribe(OrderFilter(customer_id=99))
+
+        def publish():
+            bus.publish("order", 1, change(1))
+            bus.publish("order", 2, change(2, customer_id=99))
+            broadcaster.close()
+
+        chunks = await collect(
+            stream_events(broadcaster, OrderFilter(customer_id=10),
+                          heartbeat=5),
+            threading.Thread(target=publish).start,
+        )
+        return chunks, other
+
+    chunks, other = asyncio.run(scenario())
+
+    assert chunks[0] == b"retry: 3000\n\n"
+    assert parse(chunks) == [("order", change(1))]
+    assert other.delivered == 1
+    stats = broadcaster.stats()
+    assert stats["connections"] == 1
+    assert stats["events"] == 2
+
+
+def test_slow_stream_drops_pending_events_and_resyncs():
+    broadcaster = OrderBroadcaster(buffer_size=2)
+
+    def publish():
+        for order_id in range(1, 5):
+            broadcaster.on_invalidation(
+                InvalidationEvent("order", order_id, order_id, "x",
+                                  change(order_id))
+            )
+        broadcaster.close()
+
+    async def scenario():
+        return await collect(
+            stream_events(broadcaster, OrderFilter(), heartbeat=5), publish
+        )
+
+    events = parse(asyncio.run(scenario()))
+
+    # 1 e 2 enchem o buffer; 3 o esvazia e vira um resync
+    assert events == [("resync", {}), ("order", change(4))]
+    stats = broadcaster.stats()
+    assert stats["dropped"] == 2
+    assert stats["resyncs"] == 1
+    assert stats["connections"] == 0
+
+
+def test_lost_bus_events_resync_every_stream():
+    broadcaster = OrderBroadcaster()
+
+    def publish():
+        broadcaster.on_invalidation(InvalidationEvent(ALL, None, 0, "x"))
+        broadcaster.close()
+
+    async def scenario():
+        return await collect(
+            stream_events(broadcaster, OrderFilter(customer_id=10),
+                          heartbeat=5),
+            publish,
+        )
+
+    assert parse(asyncio.run(scenario())) == [("resync", {})]
+
+
+def test_stream_sends_heartbeats_and_ends_at_max_duration():
+    broadcaster = OrderBroadcaster()
+
+    async def scenario():
+        return await collect(stream_events(
+            broadcaster, OrderFilter(), heartbeat=0.01, max_seconds=0.05))
+
+    chunks = asyncio.run(scenario())
+
+    assert b": keepalive\n\n" in chunks
+    assert broadcaster.stats()["connections"] == 0
+
+
+def test_connection_limit_is_enforced():
+    broadcaster = OrderBroadcaster(max_connections=1)
+
+    async def scenario():
+        broadcaster.subscribe(OrderFilter())
+        with pytest.raises(TooManySubscribers):
+            broadcaster.subscribe(OrderFilter())
+
+    asyncio.run(scenario())
+
+    assert broadcaster.stats()["rejected"] == 1
+
+
+def test_stream_subscribes_only_when_the_body_starts():
+    broadcaster = OrderBroadcaster(max_connections=1)
+
+    async def scenario():
+        # Um cliente que desconecta antes do corpo não ocupa vaga
+        stream_events(broadcaster, OrderFilter())
+        assert broadcaster.stats()["connections"] == 0
+
+        stream = stream_events(broadcaster, OrderFilter())
+        await stream.__anext__()
+        assert broadcaster.stats()["connections"] == 1
+        with pytest.raises(TooManySubscribers):
+            broadcaster.check_capacity()
+
+        # Sem vaga na hora da inscrição, o stream só pede a reconexão
+        chunks = await collect(stream_events(broadcaster, OrderFilter()))
+        assert chunks == [b"retry: 3000\n\n"]
+
+        await stream.aclose()
+        assert broadcaster.stats()["connections"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_order_changes_are_published_with_customer(monkeypatch):
+    bus = InvalidationBus()
+    received = []
+    bus.subscribe(["order"], received.append)
+    monkeypatch.setattr(repository, "invalidation_bus", bus)
+
+    class Order:
+        id = 7
+        customer_id = 10
+        status = "ready"
+        payment_status = "paid"
+        updated_at = datetime(2024, 5, 1, 12)
+
+    repository.publish_order_change(Order)
+
+    assert received[0].data == {
+        "id": 7,
+        "customer_id": 10,
+        "status": "ready",
+        "payment_status": "paid",
+        "updated_at": "2024-05-01T12:00:00",
+    }
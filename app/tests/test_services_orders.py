@@ -0,0 +1,181 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from ..database.database import Base
+from ..models import models, schemas
+from ..services import pagination, repository
+from ..services.http_cache import order_etag
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine)
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    category = models.Category(name="Lanches", enabled=True)
+    db.add(category)
+    db.flush()
+    db.add_all([
+        models.Product(id=1, name="X-Burger", price=12.0,
+                       category_id=category.id, enabled=True),
+        models.Product(id=2, name="Refrigerante", price=5.5,
+                       category_id=category.id, enabled=True),
+        models.Product(id=3, name="Sazonal", price=9.0,
+                       category_id=category.id, enabled=False),
+    ])
+    db.commit()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def make_order(*items):
+    return schemas.OrderCreate(
+        customer_id=10,
+        order_items=[
+            schemas.OrderItemCreate(product_id=product_id, quantity=quantity)
+            for product_id, quantity in items
+        ],
+        email="cliente@example.com",
+    )
+
+
+def test_create_order_uses_constant_number_of_queries(db, assert_max_queries):
+    with assert_max_queries(4) as statements:
+        order = repository.create_order(
+            db, make_order((1, 2), (2, 1), (1, 1), (2, 3))
+        )
+
+    # SELECT dos produtos, INSERT do pedido, dos itens e da outbox
+    assert len(statements) == 4
+    assert order["amount"] == pytest.approx(12.0 * 3 + 5.5 * 4)
+    assert [item["name"] for item in order["items"]] == [
+        "X-Burger", "Refrigerante", "X-Burger", "Refrigerante"
+    ]
+    assert all(item["id"] for item in order["items"])
+
+
+def test_create_order_writes_items_and_outbox(db):
+    order = repository.create_order(db, make_order((1, 1), (2, 2)))
+
+    assert db.query(models.OrderItem).filter_by(
+        order_id=order["id"]).count() == 2
+    outbox = db.query(models.PaymentOutbox).one()
+    assert outbox.order_id == order["id"]
+    assert outbox.customer_email == "cliente@example.com"
+
+
+@pytest.mark.parametrize("product_id", [3, 99])
+def test_create_order_rejects_unavailable_products(db, product_id):
+    with pytest.raises(HTTPException) as exc_info:
+        repository.create_order(db, make_order((1, 1), (product_id, 1)))
+
+    assert exc_info.value.status_code == 400
+    assert db.query(models.Order).count() == 0
+
+
+def test_get_order_serves_stored_prices(db, assert_max_queries):
+    created = repository.create_order(db, make_order((1, 2)))
+
+    # Alterar o preço não muda pedidos já criados
+    db.get(models.Product, 1).price = 99.0
+    db.commit()
+
+    with assert_max_queries(1) as statements:
+        order = repository.get_order(db, created["id"])
+
+    assert order["amount"] == pytest.approx(24.0)
+    assert order["items"][0]["price"] == pytest.approx(12.0)
+    assert order["items"][0]["name"] == "X-Burger"
+    assert not any("products" in statement for statement in statements)
+
+
+def test_order_etag_lookup_reads_a_single_column(db, assert_max_queries):
+    order = repository.create_order(db, make_order((1, 1)))
+
+    with assert_max_queries(1) as statements:
+        updated_at = repository.get_order_updated_at(db, order["id"])
+
+    assert updated_at == order["updated_at"]
+    assert "order_items" not in statements[0]
+    assert repository.get_order_updated_at(db, 999) is None
+
+    repository.update_order_status(
+        db, order["id"], schemas.OrderUpdate(status="paid")
+    )
+    assert order_etag(order["id"], updated_at) != order_etag(
+        order["id"], repository.get_order_updated_at(db, order["id"])
+    )
+
+
+def test_get_orders_filters_before_paginating(db):
+    for customer_id in (1, 2, 1, 2, 1):
+        order = make_order((1, 1))
+        order.customer_id = customer_id
+        repository.create_order(db, order)
+    first = db.query(models.Order).filter_by(customer_id=1).first()
+    first.status = "preparing"
+    db.commit()
+
+    orders = repository.get_orders(db, limit=2, customer_id=1)
+    assert [o["customer_id"] for o in orders] == [1, 1]
+    assert orders[0]["id"] > orders[1]["id"]
+
+    orders = repository.get_orders(db, skip=2, limit=2, customer_id=1)
+    assert [o["id"] for o in orders] == [first.id]
+
+    orders = repository.get_orders(db, status="preparing")
+    assert [o["id"] for o in orders] == [first.id]
+
+    assert repository.get_orders(db, payment_status="approved") == []
+
+
+def test_get_orders_cursor_pages_are_stable(db):
+    for _ in range(5):
+        repository.create_order(db, make_order((1, 1)))
+
+    seen = []
+    cursor = ""
+    while True:
+        page = repository.get_orders(db, limit=2, cursor=cursor)
+        seen.extend(order["id"] for order in page)
+        if len(page) < 2:
+            break
+        last = page[-1]
+        cursor = pagination.encode_cursor(last["created_at"], last["id"])
+        # Pedidos criados durante a paginação não deslocam as próximas páginas
+        repository.create_order(db, make_order((2, 1)))
+
+    assert len(seen) == 5
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_order_reads_and_updates_do_not_query_per_item(
+        db, assert_max_queries):
+    for _ in range(5):
+        order = repository.create_order(
+            db, make_order((1, 1), (2, 2), (1, 3))
+        )
+
+    # Pedidos e itens (`selectinload`)
+    with assert_max_queries(2):
+        orders = repository.get_orders(db, limit=10)
+    assert sum(len(o["items"]) for o in orders) == 15
+
+    # Pedido, UPDATE, recarga após o commit e itens
+    with assert_max_queries(4):
+        updated = repository.update_order_status(
+            db, order["id"], schemas.OrderUpdate(status="preparing")
+        )
+    assert len(updated["items"]) == 3
@@ -0,0 +1,45 @@
+from datetime import datetime
+import pytest
+from fastapi import HTTPException, Response
+from ..services import pagination
+
+
+def test_order_cursor_round_trip():
+    created_at = datetime(2026, 10, 17, 12, 30, 15, 123456)
+    cursor = pagination.encode_cursor(created_at, 42)
+
+    assert pagination.decode_order_cursor(cursor) == (created_at, 42)
+
+
+def test_empty_cursor_starts_cursor_mode():
+    assert pagination.decode_id_cursor("") is None
+
+
+def test_page_size_is_capped_in_both_modes():
+    assert pagination.page_size(500) == pagination.MAX_PAGE_SIZE
+    assert pagination.page_size(5) == 5
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "bnVsbA", "WzEsMl0"])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        pagination.decode_id_cursor(cursor)
+    assert exc_info.value.status_code == 400
+
+
+def test_next_cursor_only_for_full_pages():
+    response = Response()
+    pagination.set_next_cursor(response, [{"id": 1}], 2, "", "id")
+    assert pagination.NEXT_CURSOR_HEADER not in response.headers
+
+    pagination.set_next_cursor(response, [{"id": 1}, {"id": 2}], 2, "", "id")
+    cursor = response.headers[pagination.NEXT_CURSOR_HEADER]
+    assert pagination.decode_id_cursor(cursor) == 2
+
+
+def test_no_next_cursor_in_offset_mode():
+    response = Response()
+    pagination.set_next_cursor(
+        response, [{"id": 1}, {"id": 2}], 2, None, "id"
+    )
+    assert pagination.NEXT_CURSOR_HEADER not in response.headers
@@ -0,0 +1,233 @@
+import asyncio
+import json
+from unittest.mock import patch
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from ..database.database import Base
+from ..models import models
+from ..services.http_clients import payment_async_client
+from ..services.payment_outbox import PaymentOutboxDispatcher
+from ..services.repository import (
+    PaymentRequestError,
+    PaymentServiceUnavailable,
+    payment_breaker,
+)
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine)
+
+PAYMENT = {
+    "payment_id": "pay-1",
+    "amount": 10.0,
+    "qr_code": "qr",
+    "payment_link": "http://pay/1",
+}
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    order = models.Order(customer_id=1)
+    db.add(order)
+    db.flush()
+    db.add(models.PaymentOutbox(order_id=order.id, status="pending"))
+    db.commit()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def make_dispatcher(**kwargs):
+    return PaymentOutboxDispatcher(TestingSessionLocal, **kwargs)
+
+
+def test_dispatch_stores_payment_details(db):
+    dispatcher = make_dispatcher()
+
+    with patch(
+        "app.services.payment_outbox.request_payment", return_value=PAYMENT
+    ):
+        assert asyncio.run(dispatcher.dispatch_batch()) == 1
+
+    db.expire_all()
+    order = db.query(models.Order).one()
+    entry = db.query(models.PaymentOutbox).one()
+    assert order.payment_status == "awaiting_payment"
+    assert order.qr_code == "qr"
+    assert order.payment_link == "http://pay/1"
+    assert entry.status == "sent"
+    assert asyncio.run(dispatcher.dispatch_batch()) == 0
+
+
+def test_dispatch_failure_is_rescheduled_with_backoff(db):
+    dispatcher = make_dispatcher(backoff=60)
+
+    with patch(
+        "app.services.payment_outbox.request_payment",
+        side_effect=PaymentRequestError("HTTP 503"),
+    ):
+        asyncio.run(dispatcher.dispatch_batch())
+        # Reagendada para daqui a 60s, não é elegível novamente
+        assert asyncio.run(dispatcher.dispatch_batch()) == 0
+
+    db.expire_all()
+    entry = db.query(models.PaymentOutbox).one()
+    assert entry.status == "pending"
+    assert entry.attempts == 1
+    assert entry.last_error == "HTTP 503"
+
+
+def test_dispatch_moves_to_dead_letter_after_max_attempts(db):
+    dispatcher = make_dispatcher(max_attempts=2, backoff=0)
+
+    with patch(
+        "app.services.payment_outbox.request_payment",
+        side_effect=PaymentRequestError("timeout"),
+    ):
+        asyncio.run(dispatcher.dispatch_batch())
+        asyncio.run(dispatcher.dispatch_batch())
+
+    db.expire_all()
+    assert db.query(models.PaymentOutbox).one().status == "dead"
+    assert (
+        db.query(models.Order).one().payment_status
+        == "payment_service_unavailable"
+    )
+
+
+def test_backoff_is_exponential_jittered_and_capped():
+    dispatcher = make_dispatcher(backoff=2, max_backoff=10)
+    for attempts, ceiling in [(1, 2), (2, 4), (3, 8), (4, 10), (8, 10)]:
+        delay = dispatcher.backoff_delay(attempts)
+        assert ceiling / 2 <= delay <= ceiling
+
+
+def test_open_circuit_marks_order_unavailable_without_using_attempts(db):
+    dispatcher = make_dispatcher(backoff=0)
+
+    with patch(
+        "app.services.payment_outbox.request_payment",
+        side_effect=PaymentServiceUnavailable(retry_after=30),
+    ):
+        asyncio.run(dispatcher.dispatch_batch())
+
+    db.expire_all()
+    entry = db.query(models.PaymentOutbox).one()
+    assert entry.status == "pending"
+    assert entry.attempts == 0
+    assert (
+        db.query(models.Order).one().payment_status
+        == "payment_service_unavailable"
+    )
+
+
+def test_dispatch_calls_payment_service(db, fake_payment_service):
+    payment_breaker.reset()
+    fake_payment_service.route("POST", "/payments/", json=PAYMENT)
+    dispatcher = make_dispatcher()
+
+    assert asyncio.run(dispatcher.dispatch_batch()) == 1
+
+    payload = json.loads(fake_payment_service.requests[0].content)
+    assert payload["order_id"] == "1"
+    assert payload["currency"] == "BRL"
+    db.expire_all()
+    assert db.query(models.Order).one().payment_id == "pay-1"
+
+
+def test_slow_payment_service_is_rescheduled(
+        db, fake_payment_service, monkeypatch):
+    payment_breaker.reset()
+    monkeypatch.setattr(payment_async_client, "deadline", 0.05)
+    fake_payment_service.route("POST", "/payments/", json=PAYMENT, delay=1)
+    dispatcher = make_dispatcher(backoff=60)
+
+    asyncio.run(dispatcher.dispatch_batch())
+
+    db.expire_all()
+    entry = db.query(models.PaymentOutbox).one()
+    assert entry.status == "pending"
+    assert "Prazo" in entry.last_error
+    payment_breaker.reset()
+
+
+def test_invalid_payment_response_is_rescheduled_and_loop_keeps_running(
+        db, fake_payment_service):
+    payment_breaker.reset()
+    fake_payment_service.route("POST", "/payments/", content=b"<html>")
+    dispatcher = make_dispatcher(backoff=60, poll_interval=0.01)
+
+    async def scenario():
+        dispatcher.start()
+        for _ in range(200):
+            await asyncio.sleep(0.01)
+            if dispatcher.stats()["failed"]:
+                break
+        alive = not dispatcher._task.done()
+        await dispatcher.stop()
+        return alive
+
+    assert asyncio.run(scenario())
+
+    db.expire_all()
+    entry = db.query(models.PaymentOutbox).one()
+    assert entry.status == "pending"
+    assert entry.attempts == 1
+    assert "Resposta inválida" in entry.last_error
+    payment_breaker.reset()
+
+
+def test_unexpected_payment_result_counts_as_failed_attempt(db):
+    dispatcher = make_dispatcher(backoff=60)
+
+    with patch(
+        "app.services.payment_outbox.request_payment", return_value=["x"]
+    ):
+        asyncio.run(dispatcher.dispatch_batch())
+
+    db.expire_all()
+    entry = db.query(models.PaymentOutbox).one()
+    order = db.query(models.Order).one()
+    assert entry.status == "pending"
+    assert entry.attempts == 1
+    assert entry.last_error.startswith("AttributeError")
+    assert order.payment_id is None
+
+
+def test_entry_error_does_not_abort_the_batch(db):
+    second = models.Order(customer_id=2)
+    db.add(second)
+    db.flush()
+    db.add(models.PaymentOutbox(order_id=second.id, status="pending"))
+    db.commit()
+    # Uma entrada por vez: a conexão SQLite em memória é compartilhada
+    dispatcher = make_dispatcher(backoff=60, concurrency=1)
+    load_payload = dispatcher._load_payload
+
+    def broken_first_payload(entry):
+        if entry.order_id == 1:
+            raise KeyError("customer")
+        return load_payload(entry)
+
+    dispatcher._load_payload = broken_first_payload
+    with patch(
+        "app.services.payment_outbox.request_payment", return_value=PAYMENT
+    ):
+        assert asyncio.run(dispatcher.dispatch_batch()) == 2
+
+    db.expire_all()
+    failed, sent = db.query(models.PaymentOutbox).order_by(
+        models.PaymentOutbox.order_id).all()
+    assert failed.status == "pending"
+    assert failed.last_error.startswith("KeyError")
+    assert sent.status == "sent"
@@ -1,41 +1,162 @@
+import asyncio
+import time
+import httpx
+import jwt
 import pytest
 from unittest.mock import patch
-import requests
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
 from fastapi import HTTPException
-from ..services.security import verify_token
+from ..services import security
+from ..services.http_clients import auth_async_client
+from ..services.jwt_keys import SigningKeyStore
+from fastapi.security import HTTPAuthorizationCredentials
+from ..services.security import (
+    token_cache, verify_stream_token, verify_token,
+)
 
 
-def test_verify_token_valid():
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+def test_verify_token_valid(fake_auth_service):
     token = "valid-token"
     user_data = {"user_id": 1, "username": "testuser"}
+    fake_auth_service.route("GET", "/auth", json=user_data)
 
-    with patch("requests.get") as mock_get:
-        mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = user_data
+    result = asyncio.run(verify_token(token))
+    assert result == user_data
+    request = fake_auth_service.requests[0]
+    assert request.headers["Authorization"] == "Bearer valid-token"
 
-        result = verify_token(token)
-        assert result == user_data
 
-
-def test_verify_token_invalid():
+def test_verify_token_invalid(fake_auth_service):
     token = "invalid-token"
+    fake_auth_service.route("GET", "/auth", status_code=401)
 
-    with patch("requests.get") as mock_get:
-        mock_get.return_value.status_code = 401
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(verify_token(token))
+    assert exc_info.value.status_code == 401
+    assert exc_info.value.detail == "Token inválido ou expirado"
 
-        with pytest.raises(HTTPException) as exc_info:
-            verify_token(token)
-        assert exc_info.value.status_code == 401
-        assert exc_info.value.detail == "Token inválido ou expirado"
 
 
-def test_verify_token_service_error():
+def test_stream_token_accepts_query_parameter(fake_auth_service):
+    user_data = {"user_id": 1, "username": "testuser"}
+    fake_auth_service.route("GET", "/auth", json=user_data)
+    header = HTTPAuthorizationCredentials(
+        scheme="Bearer", credentials="header-token")
+
+    assert asyncio.run(
+        verify_stream_token(None, access_token="query-token")
+    ) == user_data
+    asyncio.run(verify_stream_token(header, access_token="query-token"))
+    assert [
+        request.headers["Authorization"]
+        for request in fake_auth_service.requests
+    ] == ["Bearer query-token", "Bearer header-token"]
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(verify_stream_token(None, access_token=None))
+    assert exc_info.value.status_code == 401
+
+
+def test_verify_token_service_error(fake_auth_service):
     token = "any-token"
+    fake_auth_service.route(
+        "GET", "/auth", error=httpx.ConnectError("connection refused")
+    )
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(verify_token(token))
+    assert exc_info.value.status_code == 500
+    assert exc_info.value.detail == "Erro ao conectar com o auth-service"
+
+
+def test_verify_token_deadline(fake_auth_service, monkeypatch):
+    monkeypatch.setattr(auth_async_client, "deadline", 0.05)
+    fake_auth_service.route("GET", "/auth", json={"id": 1}, delay=1)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(verify_token("slow-token"))
+    assert exc_info.value.status_code == 500
+    assert auth_async_client.stats()["deadlines_exceeded"] >= 1
+
+
+def test_verify_token_uses_cache(fake_auth_service):
+    token = "cached-token"
+    user_data = {"id": 1, "username": "testuser"}
+    fake_auth_service.route("GET", "/auth", json=user_data)
 
-    with patch("requests.get") as mock_get:
-        mock_get.side_effect = requests.RequestException
+    assert asyncio.run(verify_token(token)) == user_data
+    assert asyncio.run(verify_token(token)) == user_data
+    assert fake_auth_service.calls("GET", "/auth") == 1
+    assert token_cache.stats()["hits"] == 1
 
+
+def test_verify_token_caches_unauthorized(fake_auth_service):
+    token = "revoked-token"
+    fake_auth_service.route("GET", "/auth", status_code=401)
+
+    for _ in range(2):
         with pytest.raises(HTTPException) as exc_info:
-            verify_token(token)
-        assert exc_info.value.status_code == 500
-        assert exc_info.value.detail == "Erro ao conectar com o auth-service"
+            asyncio.run(verify_token(token))
+        assert exc_info.value.status_code == 401
+    assert fake_auth_service.calls("GET", "/auth") == 1
+
+
+@pytest.fixture
+def local_keys(tmp_path):
+    private_key = rsa.generate_private_key(
+        public_exponent=65537, key_size=2048
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    key_file = tmp_path / "public.pem"
+    key_file.write_bytes(public_pem)
+
+    store = SigningKeyStore(key_file=str(key_file), refresh_interval=0)
+    store.start()
+    with patch.object(security, "AUTH_VERIFICATION_MODE", "local"), \
+            patch.object(security, "signing_keys", store):
+        yield private_key
+
+
+def test_verify_token_locally(local_keys, fake_auth_service):
+    token = jwt.encode(
+        {"sub": "7", "username": "kiosk", "exp": time.time() + 60},
+        local_keys,
+        algorithm="RS256",
+    )
+
+    user = asyncio.run(verify_token(token))
+    assert fake_auth_service.requests == []
+    assert user["id"] == 7
+    assert user["username"] == "kiosk"
+
+
+def test_verify_token_locally_expired(local_keys):
+    token = jwt.encode(
+        {"sub": "7", "exp": time.time() - 60}, local_keys, algorithm="RS256"
+    )
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(verify_token(token))
+    assert exc_info.value.status_code == 401
+
+
+def test_verify_token_locally_bad_signature(local_keys):
+    other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    token = jwt.encode(
+        {"sub": "7", "exp": time.time() + 60}, other_key, algorithm="RS256"
+    )
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(verify_token(token))
+    assert exc_info.value.status_code == 401
@@ -0,0 +1,63 @@
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from ..models import schemas
+from ..services import serializers
+
+
+def make_order(created_at: datetime) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=7,
+        customer_id=3,
+        status="created",
+        payment_status="pending",
+        total_amount=21.5,
+        qr_code=None,
+        payment_link="https://pay/7",
+        created_at=created_at,
+        updated_at=created_at,
+    )
+
+
+def make_item(item_id: int, name) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=item_id, product_id=1, product_name=name,
+        unit_price=10.75, quantity=2,
+    )
+
+
+def test_order_bytes_match_pydantic_serialization():
+    for created_at in (
+            datetime(2024, 5, 1, 12, 30, 0, 123456),
+            datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)):
+        order = serializers.order(
+            make_order(created_at), [make_item(1, "Pizza"), make_item(2, None)]
+        )
+
+        expected = schemas.OrderRead(**order).model_dump_json()
+        assert serializers.dumps(order) == expected.encode()
+
+
+def test_missing_product_name_uses_placeholder():
+    order = serializers.order(
+        make_order(datetime(2024, 5, 1)), [make_item(1, None)]
+    )
+
+    assert order["items"][0]["name"] == serializers.PRODUCT_NOT_FOUND
+
+
+def test_catalog_responses_are_json_lists():
+    category = schemas.CategoryRead(id=1, name="Bebidas", enabled=True)
+    product = schemas.ProductRead(
+        id=2, name="Suco", price=8.0, category_id=1, enabled=True,
+        category=category,
+    )
+
+    response = serializers.products_response([product])
+
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == [product.model_dump()]
+    assert json.loads(
+        serializers.categories_response([category]).body
+    ) == [category.model_dump()]
@@ -0,0 +1,56 @@
+import base64
+import json
+import time
+from ..services.token_cache import INVALID_TOKEN, TokenCache
+
+
+def make_jwt(claims: dict) -> str:
+    payload = base64.urlsafe_b64encode(
+        json.dumps(claims).encode()
+    ).rstrip(b"=").decode()
+    return f"header.{payload}.signature"
+
+
+def test_cache_hit_and_miss():
+    cache = TokenCache(ttl=60)
+    assert cache.get("token") is None
+
+    cache.set_user("token", {"id": 1})
+    assert cache.get("token") == {"id": 1}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_respects_token_expiration():
+    cache = TokenCache(ttl=60)
+    expired = make_jwt({"sub": "1", "exp": time.time() - 10})
+
+    cache.set_user(expired, {"id": 1})
+    assert cache.get(expired) is None
+
+
+def test_cache_stores_invalid_tokens():
+    cache = TokenCache(negative_ttl=5)
+    cache.set_invalid("token")
+    assert cache.get("token") is INVALID_TOKEN
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TokenCache(max_entries=2)
+    cache.set_user("a", {"id": 1})
+    cache.set_user("b", {"id": 2})
+    cache.get("a")
+    cache.set_user("c", {"id": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"id": 1}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_invalidate():
+    cache = TokenCache()
+    cache.set_user("token", {"id": 1})
+
+    assert cache.invalidate("token") is True
+    assert cache.get("token") is None
+    assert cache.invalidate("token") is False
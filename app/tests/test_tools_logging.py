@@ -0,0 +1,60 @@
+import json
+import logging
+import queue
+import sys
+from ..tools.logging import (
+    JsonFormatter, RequestQueueHandler, SamplingFilter, request_id
+)
+
+
+def make_record(level=logging.INFO, msg="Pedido %s criado", args=(7,),
+                **extra):
+    record = logging.LogRecord(
+        "Application", level, __file__, 1, msg, args, None
+    )
+    record.__dict__.update(extra)
+    return record
+
+
+def test_queue_handler_prepares_record_in_caller_context():
+    log_queue = queue.SimpleQueue()
+    handler = RequestQueueHandler(log_queue)
+    token = request_id.set("abc123")
+    try:
+        try:
+            raise ValueError("falhou")
+        except ValueError:
+            record = make_record()
+            record.exc_info = sys.exc_info()
+            handler.emit(record)
+    finally:
+        request_id.reset(token)
+
+    queued = log_queue.get_nowait()
+    assert queued.msg == "Pedido 7 criado"
+    assert queued.args is None
+    assert queued.request_id == "abc123"
+    assert queued.exc_info is None
+    assert "ValueError: falhou" in queued.exc_text
+
+
+def test_json_formatter_is_compact_and_keeps_extra_fields():
+    record = make_record(db_queries=3, request_id="abc123")
+
+    line = JsonFormatter().format(record)
+    entry = json.loads(line)
+
+    assert "\n" not in line and ": " not in line
+    assert entry["msg"] == "Pedido 7 criado"
+    assert entry["level"] == "INFO"
+    assert entry["request_id"] == "abc123"
+    assert entry["db_queries"] == 3
+    assert "pathname" not in entry and "funcName" not in entry
+
+
+def test_sampling_filter_keeps_warnings():
+    sampler = SamplingFilter(0.0)
+
+    assert not sampler.filter(make_record(logging.INFO))
+    assert sampler.filter(make_record(logging.WARNING))
+    assert SamplingFilter(1.0).filter(make_record(logging.INFO))
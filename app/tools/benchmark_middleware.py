@@ -0,0 +1,102 @@
+"""
+Micro-benchmark do custo dos middlewares por requisição.
+
+Compara requisições por segundo em `/health` sem middleware, com o antigo
+middleware baseado em `BaseHTTPMiddleware` e com o `RequestMiddleware`
+(ASGI puro). As requisições passam pelo `ASGITransport` do httpx, sem
+rede, para que a diferença medida seja a da pilha de middlewares.
+
+Uso:
+    DATABASE_URL=sqlite:///./bench.db python -m app.tools.benchmark_middleware
+"""
+import argparse
+import asyncio
+import time
+from typing import Callable, Dict
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from ..middleware import RequestMiddleware
+
+
+class BaseHTTPExceptionLoggingMiddleware(BaseHTTPMiddleware):
+    """Middleware usado antes do `RequestMiddleware`, para comparação."""
+
+    async def dispatch(self, request: Request, call_next):  # noqa PLR6301
+        try:
+            return await call_next(request)
+        except Exception:
+            raise HTTPException(
+                status_code=500, detail='Internal Server Error')
+
+
+def build_app(configure: Callable[[FastAPI], None]) -> FastAPI:
+    app = FastAPI()
+    configure(app)
+
+    # `async def`, para que o threadpool não domine a medição
+    @app.get('/health')
+    async def health_check() -> dict:
+        return {'status': 'Operational'}
+
+    return app
+
+
+STACKS: Dict[str, Callable[[FastAPI], None]] = {
+    'sem middleware': lambda app: None,
+    'BaseHTTPMiddleware': (
+        lambda app: app.add_middleware(BaseHTTPExceptionLoggingMiddleware)
+    ),
+    'RequestMiddleware': (
+        lambda app: app.add_middleware(
+            RequestMiddleware, sql_instrumentation=False
+        )
+    ),
+}
+
+
+async def requests_per_second(
+        app: FastAPI, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+            transport=transport, base_url='http://bench') as client:
+        # Aquecimento
+        for _ in range(50):
+            await client.get('/health')
+
+        remaining = requests
+
+        async def worker() -> None:
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                response = await client.get('/health')
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - started)
+
+
+async def main(requests: int, concurrency: int, rounds: int) -> None:
+    baseline = None
+    for name, configure in STACKS.items():
+        app = build_app(configure)
+        # Melhor de algumas rodadas, para reduzir o ruído da máquina
+        rps = max([
+            await requests_per_second(app, requests, concurrency)
+            for _ in range(rounds)
+        ])
+        baseline = baseline or rps
+        print(f'{name:<20} {rps:>10.0f} req/s ({rps / baseline:.0%})')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.rounds))
@@ -1,6 +1,13 @@
+import atexit
+import copy
+import json
 import logging
 import os
-from datetime import datetime
+import queue
+import random
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 
 # Criação do diretório de logs se não existir
 log_directory = '/tmp/logs'
@@ -11,16 +18,114 @@ if not os.path.exists(log_directory):
 log_filename = datetime.now().strftime('%Y-%m-%d') + '.log'
 log_filepath = os.path.join(log_directory, log_filename)
 
-# Configuração do logger
-logging.basicConfig(
-    level=logging.INFO,
-    format=(
-        '%(asctime)s - %(filename)s - %(pathname)s - %(name)s - '
-        '%(lineno)s - %(levelname)s - %(funcName)s - '
-        '%(threadName)s - %(message)s'
-    ),
-    handlers=[logging.FileHandler(log_filepath), logging.StreamHandler()],
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+# "json" (uma linha compacta por registro) ou "text"
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json').lower()
+# Nível e amostragem dos logs de rotina emitidos a cada requisição
+LOG_REQUEST_LEVEL = os.environ.get('LOG_REQUEST_LEVEL', LOG_LEVEL).upper()
+LOG_REQUEST_SAMPLE_RATE = float(
+    os.environ.get('LOG_REQUEST_SAMPLE_RATE', '1.0')
 )
 
+# ID da requisição em andamento, definido pelo `RequestMiddleware`
+REQUEST_ID_HEADER = 'X-Request-ID'
+NO_REQUEST_ID = '-'
+request_id: ContextVar[str] = ContextVar(
+    'request_id', default=NO_REQUEST_ID
+)
+
+# Atributos padrão do `LogRecord`; os demais vêm de `extra=`
+_RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord('', 0, '', 0, '', (), None).__dict__
+) | {'message', 'asctime', 'request_id'}
+
+
+class RequestQueueHandler(QueueHandler):
+    """
+    Envia os registros para a fila do `QueueListener`.
+
+    Na thread de quem loga, apenas interpola a mensagem, formata a exceção
+    e anota o ID da requisição (que vive em uma `ContextVar` e não chegaria
+    à thread do listener). A formatação da saída e a escrita em disco ficam
+    com o listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.request_id = request_id.get()
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON compacta por registro, com os campos de `extra=`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(
+                record.created, timezone.utc
+            ).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'request_id': getattr(record, 'request_id', NO_REQUEST_ID),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(
+            entry, ensure_ascii=False, separators=(',', ':'), default=str
+        )
+
+
+class SamplingFilter(logging.Filter):
+    """Deixa passar só uma fração `rate` dos registros abaixo de WARNING."""
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+_exception_formatter = logging.Formatter()
+
+if LOG_FORMAT == 'json':
+    formatter: logging.Formatter = JsonFormatter()
+else:
+    formatter = logging.Formatter(
+        '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'
+    )
+
+handlers = [logging.FileHandler(log_filepath), logging.StreamHandler()]
+for handler in handlers:
+    handler.setFormatter(formatter)
+
+# Quem loga só enfileira; uma thread do listener formata e escreve
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
+
+logging.basicConfig(level=LOG_LEVEL, handlers=[RequestQueueHandler(log_queue)])
+
 logging.getLogger('passlib.registry').setLevel(logging.WARNING)
 logger = logging.getLogger('Application')
+
+# Logs de rotina por requisição (rotas e consultas), com nível e amostragem
+# próprios para não pesarem no caminho quente
+request_logger = logging.getLogger('Application.requests')
+request_logger.setLevel(LOG_REQUEST_LEVEL)
+request_logger.addFilter(SamplingFilter(LOG_REQUEST_SAMPLE_RATE))